@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="auditlog",
+            name="audit_logs_user_id_fbfd51_idx",
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["user", "created_at", "id"],
+                name="audit_logs_user_id_108800_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["created_at", "id"], name="audit_logs_created_d81eab_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="securityevent",
+            index=models.Index(
+                fields=["user", "created_at", "id"],
+                name="security_ev_user_id_084792_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="securityevent",
+            index=models.Index(
+                fields=["created_at", "id"], name="security_ev_created_badf87_idx"
+            ),
+        ),
+    ]
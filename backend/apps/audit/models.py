@@ -39,7 +39,9 @@ class AuditLog(models.Model):
         db_table = "audit_logs"
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=["user", "created_at"]),
+            # Cursor pagination (core.pagination): per user, then all logs
+            models.Index(fields=["user", "created_at", "id"]),
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["action", "created_at"]),
             models.Index(fields=["resource_type", "resource_id"]),
         ]
@@ -94,6 +96,9 @@ class SecurityEvent(models.Model):
         indexes = [
             models.Index(fields=["event_type", "severity"]),
             models.Index(fields=["resolved", "created_at"]),
+            # Cursor pagination (core.pagination): per user, then all events
+            models.Index(fields=["user", "created_at", "id"]),
+            models.Index(fields=["created_at", "id"]),
         ]
 
     def __str__(self):
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from django.utils import timezone
 from datetime import timedelta
 
+from core.pagination import CreatedAtCursorPagination
 from .models import AuditLog, SecurityEvent, SystemMetrics
 from .serializers import (
     AuditLogSerializer,
@@ -17,6 +18,7 @@ class AuditLogListView(generics.ListAPIView):
 
     serializer_class = AuditLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         # Only show logs for the current user unless they're admin
@@ -41,6 +43,7 @@ class SecurityEventListView(generics.ListAPIView):
 
     serializer_class = SecurityEventSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         # Only show events for the current user unless they're admin
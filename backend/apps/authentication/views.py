@@ -7,9 +7,11 @@ from django.utils import timezone
 from django.conf import settings
 import pyotp
 import qrcode
-import io
 import base64
 
+from core.crypto.renderer import render_png
+from core.utils.network import get_client_ip
+
 from .models import User, TwoFactorBackupCode, LoginAttempt
 from .serializers import (
     UserSerializer,
@@ -57,7 +59,7 @@ def login(request):
     # Track login attempt
     login_attempt = LoginAttempt.objects.create(
         user=user,
-        ip_address=request.META.get("REMOTE_ADDR"),
+        ip_address=get_client_ip(request),
         user_agent=request.META.get("HTTP_USER_AGENT", ""),
         success=False,
     )
@@ -127,10 +129,8 @@ def setup_2fa(request):
     qr.add_data(totp_uri)
     qr.make(fit=True)
 
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    qr_code_data = base64.b64encode(buffer.getvalue()).decode()
+    png = render_png(qr.get_matrix(), box_size=qr.box_size, mono=True)
+    qr_code_data = base64.b64encode(png).decode()
 
     return Response(
         {"secret": secret, "qr_code": f"data:image/png;base64,{qr_code_data}"},
@@ -46,6 +46,8 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=["user", "is_read", "created_at"]),
             models.Index(fields=["notification_type", "created_at"]),
+            # Cursor pagination (core.pagination)
+            models.Index(fields=["user", "created_at", "id"]),
         ]
 
     def __str__(self):
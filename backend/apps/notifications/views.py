@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.utils import timezone
 
+from core.pagination import CreatedAtCursorPagination
 from .models import Notification, NotificationTemplate, NotificationPreference
 from .serializers import (
     NotificationSerializer,
@@ -17,6 +18,7 @@ class NotificationListView(generics.ListAPIView):
 
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
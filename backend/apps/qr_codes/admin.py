@@ -1,6 +1,13 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import QRCode, QRVerification, QRCodeTemplate
+from .models import (
+    QRCode,
+    QRVerification,
+    QRCodeTemplate,
+    QRIssuanceJob,
+    QRSignatureBatch,
+)
+from .services.status import change_qr_status
 
 
 @admin.register(QRCode)
@@ -15,6 +22,7 @@ class QRCodeAdmin(admin.ModelAdmin):
     ]
     list_filter = ["status", "created_at", "expires_at"]
     search_fields = ["unique_code", "user__email", "company__name"]
+    # Statut modifié par les actions seulement (change_qr_status)
     readonly_fields = [
         "id",
         "unique_code",
@@ -22,29 +30,35 @@ class QRCodeAdmin(admin.ModelAdmin):
         "signature",
         "hash_value",
         "salt",
+        "status",
+        "revoked_at",
+        "status_changed_at",
         "created_at",
     ]
     raw_id_fields = ["user", "company"]
-    actions = ["revoke_qr_codes", "suspend_qr_codes"]
+    actions = ["revoke_qr_codes", "suspend_qr_codes", "activate_qr_codes"]
 
     def revoke_qr_codes(self, request, queryset):
         """Révoque les QR codes sélectionnés"""
-        from django.utils import timezone
-
-        updated = queryset.update(
-            status=QRCode.Status.REVOKED, revoked_at=timezone.now()
-        )
+        updated = change_qr_status(queryset, QRCode.Status.REVOKED)
         self.message_user(request, f"{updated} QR codes révoqués avec succès.")
 
     revoke_qr_codes.short_description = "Révoquer les QR codes sélectionnés"
 
     def suspend_qr_codes(self, request, queryset):
         """Suspend les QR codes sélectionnés"""
-        updated = queryset.update(status=QRCode.Status.SUSPENDED)
+        updated = change_qr_status(queryset, QRCode.Status.SUSPENDED)
         self.message_user(request, f"{updated} QR codes suspendus avec succès.")
 
     suspend_qr_codes.short_description = "Suspendre les QR codes sélectionnés"
 
+    def activate_qr_codes(self, request, queryset):
+        """Réactive les QR codes sélectionnés"""
+        updated = change_qr_status(queryset, QRCode.Status.ACTIVE)
+        self.message_user(request, f"{updated} QR codes réactivés avec succès.")
+
+    activate_qr_codes.short_description = "Réactiver les QR codes sélectionnés"
+
 
 @admin.register(QRVerification)
 class QRVerificationAdmin(admin.ModelAdmin):
@@ -55,6 +69,45 @@ class QRVerificationAdmin(admin.ModelAdmin):
     raw_id_fields = ["qr_code"]
 
 
+@admin.register(QRIssuanceJob)
+class QRIssuanceJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "user", "status", "done", "failed", "total", "created_at"]
+    list_filter = ["status", "created_at"]
+    search_fields = ["user__email"]
+    readonly_fields = ["done", "failed", "errors", "started_at", "finished_at"]
+    raw_id_fields = ["user", "company"]
+
+
+@admin.register(QRSignatureBatch)
+class QRSignatureBatchAdmin(admin.ModelAdmin):
+    list_display = ["root", "size", "key_id", "status", "created_at"]
+    list_filter = ["status", "signature_algorithm", "created_at"]
+    search_fields = ["root"]
+    # Statut modifié par l'action seulement (QRSignatureBatch.revoke)
+    readonly_fields = [
+        "id",
+        "root",
+        "signature",
+        "key_id",
+        "signature_algorithm",
+        "size",
+        "status",
+        "created_at",
+        "revoked_at",
+    ]
+    raw_id_fields = ["issuance_job"]
+    actions = ["revoke_batches"]
+
+    def revoke_batches(self, request, queryset):
+        """Révoque les lots sélectionnés et tous leurs QR codes"""
+        revoked = 0
+        for batch in queryset.filter(status=QRSignatureBatch.Status.ACTIVE):
+            revoked += batch.revoke()
+        self.message_user(request, f"Lots révoqués ({revoked} QR codes).")
+
+    revoke_batches.short_description = "Révoquer les lots sélectionnés"
+
+
 @admin.register(QRCodeTemplate)
 class QRCodeTemplateAdmin(admin.ModelAdmin):
     list_display = ["name", "created_by", "is_active", "created_at"]
@@ -5,3 +5,11 @@ class QrCodesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.qr_codes"
     verbose_name = "QR Codes"
+
+    def ready(self):
+        from .services.verification_cache import on_qr_code_status_changed
+        from .signals import qr_code_status_changed
+
+        qr_code_status_changed.connect(
+            on_qr_code_status_changed, dispatch_uid="qr_verification_cache"
+        )
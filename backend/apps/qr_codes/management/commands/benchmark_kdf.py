@@ -0,0 +1,40 @@
+"""
+Benchmark des KDF de payload : codes générés par seconde pour chaque KDF
+"""
+
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from core.crypto.kdf import KDF_REGISTRY
+from core.crypto.qr_generator import SecureQRGenerator
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit de génération de QR codes pour chaque KDF enregistrée"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=200)
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        user = SimpleNamespace(id=uuid.uuid4())
+
+        self.stdout.write(f"{'KDF':<16} {'derive/s':>12} {'codes/s':>12}")
+        for name, kdf in KDF_REGISTRY.items():
+            salt = b"\x00" * 32
+            data = b'{"id": "ST-CI-2025-00000000"}'
+            start = time.perf_counter()
+            for _ in range(count):
+                kdf.derive(data, salt)
+            derive_rate = count / (time.perf_counter() - start)
+
+            generator = SecureQRGenerator(kdf=name)
+            start = time.perf_counter()
+            for _ in range(count):
+                generator.generate(user=user)
+            code_rate = count / (time.perf_counter() - start)
+
+            self.stdout.write(f"{name:<16} {derive_rate:>12.1f} {code_rate:>12.1f}")
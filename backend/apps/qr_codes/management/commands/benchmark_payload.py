@@ -0,0 +1,44 @@
+"""
+Comparaison des formats de payload v1 / v2 : taille du symbole et temps de rendu
+"""
+
+import time
+import uuid
+from io import BytesIO
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from core.crypto.payload import PAYLOAD_ENCODERS, encode_qr_payload
+from core.crypto.qr_generator import SecureQRGenerator, build_qr
+
+
+class Command(BaseCommand):
+    help = "Affiche la version QR, le nombre de modules et le temps de rendu par format"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=20)
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        qr_data = SecureQRGenerator().generate(user=SimpleNamespace(id=uuid.uuid4()))[
+            "qr_data"
+        ]
+
+        self.stdout.write(
+            f"{'format':<8} {'chars':>6} {'version':>8} {'modules':>8} {'render ms':>10}"
+        )
+        for payload_format in PAYLOAD_ENCODERS:
+            payload = encode_qr_payload(qr_data, payload_format)
+
+            start = time.perf_counter()
+            for _ in range(count):
+                qr = build_qr(payload)
+                img = qr.make_image(fill_color="#059669", back_color="white")
+                img.save(BytesIO(), format="PNG")
+            render_ms = (time.perf_counter() - start) * 1000 / count
+
+            self.stdout.write(
+                f"{payload_format:<8} {len(payload):>6} {qr.version:>8} "
+                f"{qr.modules_count:>8} {render_ms:>10.1f}"
+            )
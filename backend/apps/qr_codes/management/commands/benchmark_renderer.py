@@ -0,0 +1,60 @@
+"""
+Comparaison du rendu PNG : PilImage de qrcode (module par module) contre
+l'agrandissement NumPy de core.crypto.renderer
+"""
+
+import time
+from io import BytesIO
+
+import qrcode
+from django.core.management.base import BaseCommand
+
+from core.crypto.qr_generator import ERROR_CORRECTION_LEVELS
+from core.crypto.renderer import render_png
+
+
+class Command(BaseCommand):
+    help = "Affiche le temps de rendu PNG par version QR, qrcode contre NumPy"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=20)
+        parser.add_argument("--versions", type=int, nargs="+", default=[5, 10, 20])
+        parser.add_argument("--box-size", type=int, default=10)
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        box_size = options["box_size"]
+
+        self.stdout.write(
+            f"{'version':>8} {'modules':>8} {'qrcode ms':>10} {'numpy ms':>10} "
+            f"{'speedup':>8}"
+        )
+        for version in options["versions"]:
+            qr = qrcode.QRCode(
+                version=version,
+                error_correction=ERROR_CORRECTION_LEVELS["H"],
+                box_size=box_size,
+            )
+            qr.add_data("ST-CI-2025-0A1B2C3D")
+            qr.make(fit=False)
+
+            start = time.perf_counter()
+            for _ in range(count):
+                img = qr.make_image(fill_color="#059669", back_color="white")
+                img.save(BytesIO(), format="PNG")
+            legacy_ms = (time.perf_counter() - start) * 1000 / count
+
+            start = time.perf_counter()
+            for _ in range(count):
+                render_png(
+                    qr.get_matrix(),
+                    box_size=box_size,
+                    fill_color="#059669",
+                    back_color="#ffffff",
+                )
+            numpy_ms = (time.perf_counter() - start) * 1000 / count
+
+            self.stdout.write(
+                f"{version:>8} {qr.modules_count:>8} {legacy_ms:>10.1f} "
+                f"{numpy_ms:>10.1f} {legacy_ms / numpy_ms:>7.1f}x"
+            )
@@ -0,0 +1,59 @@
+"""
+Benchmark des algorithmes de signature : signatures et vérifications par
+seconde, taille de signature et version du symbole QR v2 obtenu
+"""
+
+import base64
+import secrets
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.crypto.payload import encode_qr_payload
+from core.crypto.qr_generator import build_qr
+from core.crypto.signers import SIGNER_REGISTRY
+
+
+class Command(BaseCommand):
+    help = "Mesure sign/s et verify/s pour chaque algorithme de signature enregistré"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        # Chiffré de taille réaliste (nonce + payload AES-GCM)
+        data = base64.b64encode(secrets.token_bytes(220))
+
+        self.stdout.write(
+            f"{'algorithm':<16} {'sign/s':>10} {'verify/s':>10} "
+            f"{'sig bytes':>10} {'QR version':>11}"
+        )
+        for name, signer in SIGNER_REGISTRY.items():
+            private_key = signer.generate_private_key()
+            public_key = private_key.public_key()
+
+            start = time.perf_counter()
+            for _ in range(count):
+                signature = signer.sign(private_key, data)
+            sign_rate = count / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for _ in range(count):
+                signer.verify(public_key, signature, data)
+            verify_rate = count / (time.perf_counter() - start)
+
+            payload = encode_qr_payload(
+                {
+                    "id": "ST-CI-2025-0A1B2C3D",
+                    "kid": f"{name}-1",
+                    "alg": name,
+                    "data": data.decode("ascii"),
+                    "sig": base64.b64encode(signature).decode("ascii"),
+                },
+                "v2",
+            )
+            self.stdout.write(
+                f"{name:<16} {sign_rate:>10.1f} {verify_rate:>10.1f} "
+                f"{len(signature):>10} {build_qr(payload).version:>11}"
+            )
@@ -0,0 +1,238 @@
+"""
+Charge comparée de la vérification WSGI (verify/verify/, DRF synchrone) et
+ASGI (verify/async/)
+
+Chaque chemin reçoit le même nombre de requêtes, chacune sur un code
+différent (pas de réponse en cache) :
+    WSGI  handler Django appelé depuis --wsgi-threads threads (gthread)
+    ASGI  application ASGI appelée depuis une seule boucle, --concurrency
+          requêtes en vol
+
+--db-latency ajoute une attente à chaque requête SQL, pour simuler
+l'aller-retour réseau vers PostgreSQL : une base SQLite locale ne fait
+presque jamais attendre. La journalisation passe par le tampon d'écriture
+différée, comme en production ; limites de débit et délestage sont
+désactivés (toutes les requêtes viennent de 127.0.0.1).
+
+Crée un utilisateur et ses QR codes de test, supprimés à la fin.
+"""
+
+import asyncio
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+
+from apps.qr_codes.services.admission import reset_admission_controller
+from apps.qr_codes.services.issuance import issue_qr_codes
+from apps.qr_codes.services.renditions import Rendition
+from apps.qr_codes.services.verification_cache import local_cache
+from apps.qr_codes.services.verification_log import get_verification_buffer
+
+WSGI_PATH = "/api/qr-codes/verify/verify/"
+ASGI_PATH = "/api/qr-codes/verify/async/"
+
+
+class _ThreadSampler:
+    """Nombre maximal de threads du processus pendant un bloc"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stopped = threading.Event()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count() - 1)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        self._thread.join()
+
+
+class Command(BaseCommand):
+    help = "Compare débit et latence de la vérification WSGI et ASGI"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument("--wsgi-threads", type=int, default=8)
+        parser.add_argument(
+            "--db-latency", type=float, default=2.0, help="ms ajoutées par requête SQL"
+        )
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        latency = options["db_latency"] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            connection.execute_wrappers.append(slow_query)
+
+        buffer = None
+        user = get_user_model().objects.create_user(
+            username=f"benchmark-{uuid.uuid4().hex[:8]}",
+            email=f"benchmark-{uuid.uuid4().hex[:8]}@example.com",
+            password=uuid.uuid4().hex,
+        )
+        try:
+            qr_codes = issue_qr_codes(
+                user, [{"company": None, "expires_days": 30}] * count, "127.0.0.1"
+            )
+            bodies = [
+                json.dumps({"qr_data": Rendition(qr).payload()}).encode("utf-8")
+                for qr in qr_codes
+            ]
+
+            connection_created.connect(add_latency)
+            for connection in connections.all(initialized_only=True):
+                connection.execute_wrappers.append(slow_query)
+            with override_settings(
+                QR_VERIFICATION_FLUSH_INTERVAL=3600,
+                QR_VERIFY_IP_RATE=0,
+                QR_VERIFY_CODE_RATE=0,
+                QR_VERIFY_MAX_IN_FLIGHT=0,
+                QR_VERIFY_LATENCY_TARGET=0,
+            ):
+                reset_admission_controller()
+                self.stdout.write(
+                    f"{count} requêtes, latence SQL simulée {options['db_latency']} ms"
+                )
+                self.stdout.write(
+                    f"{'path':<6} {'in flight':>9} {'req/s':>8} {'p50 ms':>8} "
+                    f"{'p99 ms':>8} {'threads':>8}"
+                )
+                threads = options["wsgi_threads"]
+                with _ThreadSampler() as sampler:
+                    elapsed, latencies = self._run_wsgi(bodies, threads)
+                self._report("wsgi", threads, elapsed, latencies, sampler.peak)
+
+                concurrency = options["concurrency"]
+                with _ThreadSampler() as sampler:
+                    elapsed, latencies = self._run_asgi(bodies, concurrency)
+                self._report("asgi", concurrency, elapsed, latencies, sampler.peak)
+                buffer = get_verification_buffer()
+        finally:
+            connection_created.disconnect(add_latency)
+            for connection in connections.all(initialized_only=True):
+                if slow_query in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(slow_query)
+            reset_admission_controller()
+            if buffer is not None:
+                buffer.flush()
+            user.delete()
+
+    def _reset_caches(self):
+        cache.clear()
+        local_cache.clear()
+
+    def _report(self, name, in_flight, elapsed, latencies, threads):
+        latencies = sorted(latencies)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"{name:<6} {in_flight:>9} {len(latencies) / elapsed:>8.1f} "
+            f"{statistics.median(latencies) * 1000:>8.1f} {p99 * 1000:>8.1f} "
+            f"{threads:>8}"
+        )
+
+    def _run_wsgi(self, bodies, threads):
+        self._reset_caches()
+        application = get_wsgi_application()
+
+        def call(body):
+            environ = {
+                "REQUEST_METHOD": "POST",
+                "PATH_INFO": WSGI_PATH,
+                "SCRIPT_NAME": "",
+                "QUERY_STRING": "",
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "SERVER_PROTOCOL": "HTTP/1.1",
+                "REMOTE_ADDR": "127.0.0.1",
+                "CONTENT_TYPE": "application/json",
+                "CONTENT_LENGTH": str(len(body)),
+                "HTTP_HOST": "localhost",
+                "wsgi.input": BytesIO(body),
+                "wsgi.url_scheme": "http",
+                "wsgi.errors": BytesIO(),
+                "wsgi.multithread": True,
+                "wsgi.multiprocess": False,
+                "wsgi.run_once": False,
+            }
+            start = time.perf_counter()
+            result = application(environ, lambda status, headers: None)
+            b"".join(result)
+            result.close()
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            latencies = list(executor.map(call, bodies))
+        return time.perf_counter() - start, latencies
+
+    def _run_asgi(self, bodies, concurrency):
+        self._reset_caches()
+        application = get_asgi_application()
+
+        async def call(body, slots):
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "POST",
+                "scheme": "http",
+                "path": ASGI_PATH,
+                "raw_path": ASGI_PATH.encode(),
+                "query_string": b"",
+                "root_path": "",
+                "headers": [
+                    (b"host", b"localhost"),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+                "client": ("127.0.0.1", 0),
+                "server": ("localhost", 80),
+            }
+            messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # Pas de déconnexion : attente jusqu'à l'annulation par Django
+                await asyncio.Event().wait()
+
+            async def send(message):
+                pass
+
+            async with slots:
+                start = time.perf_counter()
+                await application(scope, receive, send)
+                return time.perf_counter() - start
+
+        async def run():
+            slots = asyncio.Semaphore(concurrency)
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(call(body, slots) for body in bodies))
+            return time.perf_counter() - start, latencies
+
+        return asyncio.run(run())
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_codes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qrcode',
+            name='key_id',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+    ]
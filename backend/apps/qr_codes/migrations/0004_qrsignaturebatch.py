@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:51
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("qr_codes", "0003_qrissuancejob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="qrcode",
+            name="batch_index",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="qrcode",
+            name="merkle_proof",
+            field=models.TextField(blank=True),
+        ),
+        migrations.CreateModel(
+            name="QRSignatureBatch",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, primary_key=True, serialize=False
+                    ),
+                ),
+                ("root", models.CharField(max_length=64, unique=True)),
+                ("signature", models.TextField()),
+                ("key_id", models.CharField(max_length=50)),
+                ("signature_algorithm", models.CharField(max_length=50)),
+                ("size", models.PositiveIntegerField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("ACTIVE", "Actif"), ("REVOKED", "Révoqué")],
+                        default="ACTIVE",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("revoked_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "issuance_job",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="signature_batches",
+                        to="qr_codes.qrissuancejob",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "qr_signature_batches",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="qrcode",
+            name="batch",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="qr_codes",
+                to="qr_codes.qrsignaturebatch",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("qr_codes", "0004_qrsignaturebatch"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QRCodeSequence",
+            fields=[
+                (
+                    "year",
+                    models.PositiveSmallIntegerField(primary_key=True, serialize=False),
+                ),
+                ("next_value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "qr_code_sequences",
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("qr_codes", "0005_qrcodesequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="qrcode",
+            name="status_changed_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
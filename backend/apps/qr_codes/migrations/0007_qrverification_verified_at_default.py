@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("qr_codes", "0006_qrcode_status_changed_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="qrverification",
+            name="verified_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
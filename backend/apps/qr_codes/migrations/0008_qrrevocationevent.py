@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("qr_codes", "0007_qrverification_verified_at_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QRRevocationEvent",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("unique_code", models.CharField(max_length=50)),
+                ("revoked", models.BooleanField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "qr_revocation_events",
+                "ordering": ["id"],
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0001_initial"),
+        ("qr_codes", "0008_qrrevocationevent"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QRCodeCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total", models.IntegerField(default=0)),
+                ("active", models.IntegerField(default=0)),
+                ("suspended", models.IntegerField(default=0)),
+                ("revoked", models.IntegerField(default=0)),
+                ("expired", models.IntegerField(default=0)),
+                ("verifications_today", models.IntegerField(default=0)),
+                ("verification_day", models.DateField(blank=True, null=True)),
+                ("rebuilt_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "company",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="qr_code_counter",
+                        to="companies.company",
+                    ),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="qr_code_counter",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "qr_code_counters",
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            models.Q(
+                                ("company__isnull", False), ("user__isnull", True)
+                            ),
+                            models.Q(
+                                ("company__isnull", True), ("user__isnull", False)
+                            ),
+                            _connector="OR",
+                        ),
+                        name="qr_code_counter_single_owner",
+                    )
+                ],
+            },
+        ),
+    ]
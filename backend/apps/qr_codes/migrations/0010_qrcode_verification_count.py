@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_verification_count(apps, schema_editor):
+    QRCode = apps.get_model("qr_codes", "QRCode")
+    QRVerification = apps.get_model("qr_codes", "QRVerification")
+    counts = (
+        QRVerification.objects.filter(qr_code=OuterRef("pk"))
+        .order_by()
+        .values("qr_code")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    QRCode.objects.update(verification_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("qr_codes", "0009_qrcodecounter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="qrcode",
+            name="verification_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_verification_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0001_initial"),
+        ("qr_codes", "0010_qrcode_verification_count"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="qrverification",
+            name="qr_verifica_qr_code_e754d9_idx",
+        ),
+        migrations.AddIndex(
+            model_name="qrcode",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="qr_codes_user_id_5ceb79_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="qrverification",
+            index=models.Index(
+                fields=["qr_code", "verified_at", "id"],
+                name="qr_verifica_qr_code_ea20c7_idx",
+            ),
+        ),
+    ]
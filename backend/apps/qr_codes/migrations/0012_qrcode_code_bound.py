@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("qr_codes", "0011_cursor_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="qrcode",
+            name="code_bound",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("qr_codes", "0012_qrcode_code_bound"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="qrissuancejob",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "En attente"),
+                    ("RUNNING", "En cours"),
+                    ("FINALIZING", "Finalisation"),
+                    ("COMPLETED", "Terminé"),
+                    ("FAILED", "Échoué"),
+                ],
+                default="PENDING",
+                max_length=20,
+            ),
+        ),
+    ]
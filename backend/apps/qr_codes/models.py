@@ -28,6 +28,10 @@ class QRCode(models.Model):
     # Métadonnées
     version = models.CharField(max_length=10, default="1.0")
     algorithm = models.CharField(max_length=50, default="AES256-GCM")
+    key_id = models.CharField(max_length=50, blank=True)
+    # Signature (ou feuille de Merkle) couvrant aussi unique_code : seuls
+    # ces codes sont vérifiables hors ligne (voir services.offline_bundle)
+    code_bound = models.BooleanField(default=False)
 
     # Relations
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="qr_codes")
@@ -44,11 +48,35 @@ class QRCode(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     revoked_at = models.DateTimeField(null=True, blank=True)
+    # Dernier changement de statut : relecture incrémentale de l'index de statuts
+    status_changed_at = models.DateTimeField(null=True, blank=True, db_index=True)
     last_verified_at = models.DateTimeField(null=True, blank=True)
+    # Nombre de vérifications journalisées, tenu à jour avec last_verified_at
+    verification_count = models.PositiveIntegerField(default=0)
 
     # Image QR code
     qr_image = models.ImageField(upload_to="qr_codes/", blank=True, null=True)
 
+    # Job d'émission asynchrone d'origine
+    issuance_job = models.ForeignKey(
+        "QRIssuanceJob",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="qr_codes",
+    )
+
+    # Signature par lot : index et preuve d'inclusion dans l'arbre de Merkle
+    batch = models.ForeignKey(
+        "QRSignatureBatch",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="qr_codes",
+    )
+    batch_index = models.PositiveIntegerField(null=True, blank=True)
+    merkle_proof = models.TextField(blank=True)
+
     class Meta:
         db_table = "qr_codes"
         ordering = ["-created_at"]
@@ -56,6 +84,8 @@ class QRCode(models.Model):
             models.Index(fields=["unique_code"]),
             models.Index(fields=["status"]),
             models.Index(fields=["expires_at"]),
+            # Pagination par curseur de la liste (core.pagination)
+            models.Index(fields=["user", "created_at", "id"]),
         ]
 
     def __str__(self):
@@ -82,19 +112,206 @@ class QRVerification(models.Model):
     error_code = models.CharField(max_length=50, blank=True)
     error_message = models.TextField(blank=True)
 
-    verified_at = models.DateTimeField(auto_now_add=True)
+    # Horodatage du scan, posé par le tampon d'écriture différée
+    verified_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = "qr_verifications"
         ordering = ["-verified_at"]
         indexes = [
-            models.Index(fields=["qr_code", "verified_at"]),
+            # Historique d'un code, paginé par curseur (core.pagination)
+            models.Index(fields=["qr_code", "verified_at", "id"]),
         ]
 
     def __str__(self):
         return f"{self.qr_code.unique_code} - {self.ip_address} - {'Valid' if self.is_valid else 'Invalid'}"
 
 
+class QRIssuanceJob(models.Model):
+    """Job d'émission asynchrone de QR codes"""
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("En attente")
+        RUNNING = "RUNNING", _("En cours")
+        # Codes émis, archive en cours d'écriture
+        FINALIZING = "FINALIZING", _("Finalisation")
+        COMPLETED = "COMPLETED", _("Terminé")
+        FAILED = "FAILED", _("Échoué")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="qr_issuance_jobs"
+    )
+    company = models.ForeignKey(
+        "companies.Company", on_delete=models.SET_NULL, null=True, blank=True
+    )
+    expires_days = models.PositiveIntegerField(default=365)
+    ip_address = models.GenericIPAddressField(null=True)
+    user_agent = models.TextField(blank=True)
+
+    # Progression
+    total = models.PositiveIntegerField()
+    done = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+
+    # Archive (manifeste CSV + images) disponible en fin de job
+    result_file = models.FileField(upload_to="qr_jobs/", blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "qr_issuance_jobs"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.id} - {self.done}/{self.total}"
+
+
+class QRSignatureBatch(models.Model):
+    """Lot de QR codes signés une seule fois, via la racine de Merkle"""
+
+    class Status(models.TextChoices):
+        ACTIVE = "ACTIVE", _("Actif")
+        REVOKED = "REVOKED", _("Révoqué")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    root = models.CharField(max_length=64, unique=True)
+    signature = models.TextField()
+    key_id = models.CharField(max_length=50)
+    signature_algorithm = models.CharField(max_length=50)
+    size = models.PositiveIntegerField()
+
+    issuance_job = models.ForeignKey(
+        QRIssuanceJob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="signature_batches",
+    )
+
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.ACTIVE
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "qr_signature_batches"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.root[:16]} ({self.size})"
+
+    def is_active(self):
+        return self.status == self.Status.ACTIVE
+
+    def revoke(self):
+        """Révoque le lot et tous ses QR codes encore actifs"""
+        from .services.status import change_qr_status
+
+        self.status = self.Status.REVOKED
+        self.revoked_at = timezone.now()
+        self.save(update_fields=["status", "revoked_at"])
+        return change_qr_status(
+            self.qr_codes.filter(status=QRCode.Status.ACTIVE), QRCode.Status.REVOKED
+        )
+
+
+class QRCodeSequence(models.Model):
+    """
+    Séquence annuelle des unique_code
+
+    Les workers y réservent des blocs de numéros (voir
+    services.sequence.CodeAllocator).
+    """
+
+    year = models.PositiveSmallIntegerField(primary_key=True)
+    next_value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "qr_code_sequences"
+
+    def __str__(self):
+        return f"{self.year} - {self.next_value}"
+
+
+class QRRevocationEvent(models.Model):
+    """
+    Journal ordonné des changements de statut
+
+    L'id sert de numéro de séquence aux lots de vérification hors ligne :
+    un terminal ne télécharge que les événements postérieurs à son dernier
+    numéro (voir services.offline_bundle).
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    unique_code = models.CharField(max_length=50)
+    # False : code réactivé, à retirer de la liste de révocation
+    revoked = models.BooleanField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "qr_revocation_events"
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.id} - {self.unique_code}"
+
+
+class QRCodeCounter(models.Model):
+    """
+    Compteurs de QR codes d'un utilisateur ou d'une entreprise
+
+    Tenus à jour à l'émission, aux changements de statut et à la
+    journalisation des vérifications (voir services.counters), et
+    recalculés périodiquement.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="qr_code_counter",
+    )
+    company = models.OneToOneField(
+        "companies.Company",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="qr_code_counter",
+    )
+
+    total = models.IntegerField(default=0)
+    active = models.IntegerField(default=0)
+    suspended = models.IntegerField(default=0)
+    revoked = models.IntegerField(default=0)
+    expired = models.IntegerField(default=0)
+    # Vérifications du jour verification_day (remis à zéro le jour suivant)
+    verifications_today = models.IntegerField(default=0)
+    verification_day = models.DateField(null=True, blank=True)
+    rebuilt_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "qr_code_counters"
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(user__isnull=True, company__isnull=False)
+                | models.Q(user__isnull=False, company__isnull=True),
+                name="qr_code_counter_single_owner",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id or self.company_id} - {self.total}"
+
+
 class QRCodeTemplate(models.Model):
     """Templates for QR code generation."""
 
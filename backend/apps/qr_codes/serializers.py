@@ -1,5 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import QRCode, QRVerification
+from .models import QRCode, QRVerification, QRIssuanceJob
+from apps.companies.models import Company
+from core.crypto.payload import PAYLOAD_ENCODERS
+from core.crypto.renderer import RENDER_FORMATS
 
 
 class QRCodeSerializer(serializers.ModelSerializer):
@@ -17,9 +21,20 @@ class QRCodeSerializer(serializers.ModelSerializer):
             "created_at",
             "expires_at",
             "last_verified_at",
+            "verification_count",
             "is_valid",
         ]
-        read_only_fields = ["id", "unique_code", "created_at"]
+        # Statut : uniquement par change_qr_status (action revoke), qui tient
+        # à jour révocations, index, cache et compteurs
+        read_only_fields = [
+            "id",
+            "unique_code",
+            "status",
+            "created_at",
+            "expires_at",
+            "last_verified_at",
+            "verification_count",
+        ]
 
     def get_is_valid(self, obj):
         return obj.is_valid()
@@ -29,3 +44,134 @@ class QRVerificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = QRVerification
         fields = "__all__"
+
+
+class QRVerifyBatchSerializer(serializers.Serializer):
+    """Corps de POST /api/qr-codes/verify/batch/"""
+
+    qr_data = serializers.ListField(
+        child=serializers.CharField(trim_whitespace=False),
+        allow_empty=False,
+        max_length=settings.QR_VERIFY_BATCH_MAX,
+    )
+
+
+class QROfflineBundleQuerySerializer(serializers.Serializer):
+    """Paramètres de GET /api/qr-codes/verify/bundle/"""
+
+    since = serializers.IntegerField(min_value=0, required=False)
+
+
+class QRStatisticsQuerySerializer(serializers.Serializer):
+    """Paramètres de GET /api/qr-codes/statistics/"""
+
+    company = serializers.UUIDField(required=False)
+
+
+class QRImageQuerySerializer(serializers.Serializer):
+    """Paramètres de rendu de GET /api/qr-codes/<id>/image/"""
+
+    # "format" est réservé par DRF (suffixe de rendu), d'où "output"
+    output = serializers.ChoiceField(choices=RENDER_FORMATS, default="png")
+    size = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    border = serializers.IntegerField(min_value=0, max_value=16, default=4)
+    fill = serializers.RegexField(r"^#[0-9a-fA-F]{6}$", default="#059669")
+    back = serializers.RegexField(r"^#[0-9a-fA-F]{6}$", default="#ffffff")
+    dpi = serializers.IntegerField(min_value=72, max_value=2400, required=False)
+    module_mm = serializers.FloatField(min_value=0.1, max_value=10, required=False)
+    # "url" : URL courte /v/<code>, pour les scans à l'appareil photo
+    payload = serializers.ChoiceField(choices=sorted(PAYLOAD_ENCODERS), required=False)
+
+    def validate(self, attrs):
+        if "module_mm" in attrs and "dpi" not in attrs and attrs["output"] != "svg":
+            raise serializers.ValidationError("module_mm requires dpi for PNG")
+        return attrs
+
+
+class QRCodeBulkItemSerializer(serializers.Serializer):
+    company = serializers.PrimaryKeyRelatedField(
+        queryset=Company.objects.all(), required=False, allow_null=True
+    )
+    expires_days = serializers.IntegerField(min_value=1, max_value=3650, required=False)
+
+
+class QRCodeBulkCreateSerializer(serializers.Serializer):
+    count = serializers.IntegerField(min_value=1, required=False)
+    company = serializers.PrimaryKeyRelatedField(
+        queryset=Company.objects.all(), required=False, allow_null=True
+    )
+    expires_days = serializers.IntegerField(min_value=1, max_value=3650, default=365)
+    items = QRCodeBulkItemSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        items = attrs.get("items")
+        count = attrs.get("count")
+
+        if items is None and count is None:
+            raise serializers.ValidationError("count or items is required")
+        if items is not None and count is not None and count != len(items):
+            raise serializers.ValidationError("count does not match len(items)")
+
+        total = len(items) if items is not None else count
+        if total > settings.QR_BULK_MAX_COUNT:
+            raise serializers.ValidationError(
+                f"At most {settings.QR_BULK_MAX_COUNT} QR codes per request"
+            )
+        return attrs
+
+    def get_items(self):
+        """Liste des codes à émettre, valeurs par défaut appliquées"""
+        data = self.validated_data
+        defaults = {
+            "company": data.get("company"),
+            "expires_days": data["expires_days"],
+        }
+        if "items" not in data:
+            return [dict(defaults) for _ in range(data["count"])]
+        return [{**defaults, **item} for item in data["items"]]
+
+
+class QRIssuanceJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QRIssuanceJob
+        fields = [
+            "id",
+            "status",
+            "company",
+            "expires_days",
+            "total",
+            "done",
+            "failed",
+            "errors",
+            "download_url",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = [
+            "id",
+            "status",
+            "done",
+            "failed",
+            "errors",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        extra_kwargs = {"expires_days": {"min_value": 1, "max_value": 3650}}
+
+    def validate_total(self, value):
+        if not 1 <= value <= settings.QR_ISSUANCE_MAX_COUNT:
+            raise serializers.ValidationError(
+                f"total must be between 1 and {settings.QR_ISSUANCE_MAX_COUNT}"
+            )
+        return value
+
+    def get_download_url(self, obj):
+        if obj.status != QRIssuanceJob.Status.COMPLETED or not obj.result_file:
+            return None
+        request = self.context.get("request")
+        url = obj.result_file.url
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,151 @@
+"""
+QR Code verification admission control
+
+Endpoint public de vérification, dans l'ordre :
+
+    1. limite de débit par IP (seaux à jetons partagés dans le cache) :
+       429 + Retry-After
+    2. contrôle d'admission du processus : trop de requêtes en cours, ou
+       latence moyenne au-dessus de QR_VERIFY_LATENCY_TARGET : 503 +
+       Retry-After
+    3. après la vérification, limite de débit par unique_code : 429
+
+Le seau d'un code n'est débité que par une vérification valide, donc
+authentifiée (signature, chiffré enregistré du code) : un payload forgé
+portant l'identifiant d'un vrai code ne peut pas épuiser son seau.
+
+Sous surcharge, un client qui a encore plus de la moitié de son seau IP
+(scans occasionnels) reste prioritaire : le délestage porte d'abord sur
+les clients qui enchaînent les requêtes.
+
+Un débit à 0 désactive la limite correspondante.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from core.exceptions import RateLimitError, ServiceUnavailableError
+from core.utils.ratelimit import AdmissionController, Bucket, RateLimiter
+
+PRIORITY_HEADROOM = 0.5
+
+rate_limiter = RateLimiter(prefix="qr_verify:bucket:")
+
+
+def _consume(kind: str, bucket: Bucket):
+    (decision,) = rate_limiter.consume([bucket])
+    if not decision.allowed:
+        rate_limiter.count(f"{kind}_limited")
+        raise RateLimitError(
+            "Too many verification requests",
+            details={"retry_after": max(1, int(decision.retry_after + 0.999))},
+        )
+    return decision
+
+
+def check_rate_limits(ip_address: str) -> float:
+    """
+    Consomme un jeton du seau de l'IP
+
+    Returns:
+        Marge restante du seau IP (0 à 1)
+
+    Raises:
+        RateLimitError: limite atteinte (details["retry_after"])
+    """
+    if not settings.QR_VERIFY_IP_RATE or not ip_address:
+        return 1.0
+    decision = _consume(
+        "ip",
+        Bucket(
+            f"ip:{ip_address}",
+            settings.QR_VERIFY_IP_RATE,
+            settings.QR_VERIFY_IP_BURST,
+        ),
+    )
+    rate_limiter.count("allowed")
+    return decision.headroom
+
+
+def check_code_rate_limit(context):
+    """
+    Consomme un jeton du seau du code, après une vérification valide
+
+    Un résultat invalide ne débite rien : l'identifiant n'est alors pas
+    authentifié.
+
+    Raises:
+        RateLimitError: limite atteinte (details["retry_after"])
+    """
+    if not settings.QR_VERIFY_CODE_RATE or not context.result["valid"]:
+        return
+    _consume(
+        "code",
+        Bucket(
+            f"code:{context.code}",
+            settings.QR_VERIFY_CODE_RATE,
+            settings.QR_VERIFY_CODE_BURST,
+        ),
+    )
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Contrôleur unique du processus"""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController(
+                    max_in_flight=settings.QR_VERIFY_MAX_IN_FLIGHT,
+                    latency_target=settings.QR_VERIFY_LATENCY_TARGET,
+                )
+    return _controller
+
+
+def reset_admission_controller():
+    """Oublie le contrôleur courant (tests, changement de configuration)"""
+    global _controller
+    with _controller_lock:
+        _controller = None
+
+
+def admit(ip_address: str) -> float:
+    """
+    Admet une vérification ; à faire suivre de release()
+
+    Returns:
+        Instant d'admission, à passer à release()
+
+    Raises:
+        RateLimitError: limite de débit atteinte (429)
+        ServiceUnavailableError: vérification délestée (503)
+    """
+    headroom = check_rate_limits(ip_address)
+    admitted, reason = get_admission_controller().try_enter(
+        priority=headroom >= PRIORITY_HEADROOM
+    )
+    if not admitted:
+        raise ServiceUnavailableError(
+            "Verification service overloaded",
+            code=reason,
+            details={"retry_after": settings.QR_VERIFY_SHED_RETRY_AFTER},
+        )
+    return time.perf_counter()
+
+
+def release(admitted_at: float):
+    get_admission_controller().leave(time.perf_counter() - admitted_at)
+
+
+def admission_stats():
+    """Compteurs des limites de débit et du contrôle d'admission"""
+    return {
+        "rate_limits": rate_limiter.stats(),
+        "admission": get_admission_controller().stats(),
+    }
@@ -0,0 +1,313 @@
+"""
+QR Code issued-code filter
+
+Filtre de Bloom des unique_code émis, partagé en lecture seule (mmap) par
+tous les workers d'une machine : un payload portant un code jamais émis
+est refusé avant toute vérification cryptographique ou requête SQL.
+
+    en-tête   magic "QRBF", version u8, built_at f64, watermark f64,
+              capacity u64, count u64, bits u64, hashes u8
+    filtre    bits / 8 octets (core.utils.bloom)
+
+La tâche rebuild_code_filter ajoute au filtre existant les codes créés
+depuis le filigrane précédent (moins QR_CODE_FILTER_OVERLAP secondes),
+ou le reconstruit entièrement quand sa capacité est atteinte, puis le
+remplace atomiquement (os.replace).
+
+Les codes émis depuis la dernière reconstruction ne sont pas dans le
+filtre : l'émission les inscrit dans le cache (mark_issued) pour
+QR_CODE_FILTER_RECENT_TTL secondes, avec l'heure de la dernière émission.
+Chaque processus relit cette heure au plus une fois par intervalle de
+contrôle ; le cache n'est consulté, avant un refus, que si des codes ont
+été émis depuis la construction du filtre. Filtre absent ou plus vieux que
+QR_CODE_FILTER_MAX_AGE : aucun refus.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ..models import QRCode
+from core.utils.bloom import BloomFilter, optimal_size
+
+MAGIC = b"QRBF"
+FORMAT_VERSION = 1
+HEADER = struct.Struct(">4sBddQQQB")
+
+RECENT_PREFIX = "qr_code_filter:recent:"
+ISSUED_AT_KEY = "qr_code_filter:issued_at"
+
+
+def mark_issued(unique_codes):
+    """Inscrit des codes émis, en attendant leur entrée dans le filtre"""
+    entries = {RECENT_PREFIX + code: 1 for code in unique_codes}
+    # Expire avec les codes : sans heure d'émission, aucun code récent
+    entries[ISSUED_AT_KEY] = time.time()
+    cache.set_many(entries, settings.QR_CODE_FILTER_RECENT_TTL)
+
+
+def _is_recent(unique_code: str) -> bool:
+    return cache.get(RECENT_PREFIX + unique_code) is not None
+
+
+class _Mapped(NamedTuple):
+    """Fichier mappé et son en-tête, remplacés d'un bloc au rechargement"""
+
+    bloom: BloomFilter
+    built_at: float
+    watermark: float
+    capacity: int
+    count: int
+
+
+class CodeFilter:
+    """Lecteur du filtre, rechargé quand le fichier est remplacé"""
+
+    def __init__(self, path, max_age: float, check_interval: float = 1.0):
+        self.path = str(path)
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self.counters = Counter()
+        self._lock = threading.Lock()
+        self._mapped = None
+        self._identity = None
+        self._next_check = 0.0
+        self._issued_at = 0.0
+        self._next_stamp_check = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._mapped = None
+                self._identity = None
+                return
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if identity == self._identity:
+                return
+
+            with open(self.path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            (
+                magic,
+                version,
+                built_at,
+                watermark,
+                capacity,
+                count,
+                num_bits,
+                num_hashes,
+            ) = HEADER.unpack_from(mapping, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                mapping.close()
+                self._mapped = None
+                return
+            bits = memoryview(mapping)[HEADER.size : HEADER.size + num_bits // 8]
+            self._mapped = _Mapped(
+                BloomFilter(num_bits, num_hashes, bits),
+                built_at,
+                watermark,
+                capacity,
+                count,
+            )
+            self._identity = identity
+
+    def _fresh(self) -> Optional[_Mapped]:
+        self._refresh()
+        mapped = self._mapped
+        if mapped is None or time.time() - mapped.built_at > self.max_age:
+            return None
+        return mapped
+
+    def _issued_since(self, mapped: _Mapped) -> bool:
+        """
+        Des codes ont-ils été émis depuis la construction du filtre ?
+
+        L'heure de dernière émission est relue au plus une fois par
+        intervalle de contrôle : un code émis dans la dernière seconde
+        peut être refusé, comme avant l'exécution de son on_commit.
+        """
+        now = time.monotonic()
+        if now >= self._next_stamp_check:
+            issued_at = cache.get(ISSUED_AT_KEY) or 0.0
+            with self._lock:
+                self._issued_at = issued_at
+                self._next_stamp_check = now + self.check_interval
+        # Même recouvrement que la mise à jour incrémentale (horloges)
+        return self._issued_at > mapped.watermark - settings.QR_CODE_FILTER_OVERLAP
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self.counters[outcome] += 1
+
+    def might_exist(self, unique_code: str) -> bool:
+        """
+        False seulement si le code n'a certainement jamais été émis
+
+        Compteurs : present (dans le filtre), recent (émis depuis la
+        reconstruction), absent (refusé), unavailable (filtre absent ou
+        trop ancien).
+        """
+        mapped = self._fresh()
+        if mapped is None:
+            self._count("unavailable")
+            return True
+        if unique_code in mapped.bloom:
+            self._count("present")
+            return True
+        if self._issued_since(mapped) and _is_recent(unique_code):
+            self._count("recent")
+            return True
+        self._count("absent")
+        return False
+
+    def stats(self):
+        mapped = self._fresh()
+        with self._lock:
+            counters = dict(self.counters)
+        if mapped is None:
+            return {"available": False, "counters": counters}
+        bloom = mapped.bloom
+        return {
+            "available": True,
+            "built_at": datetime.fromtimestamp(
+                mapped.built_at, tz=dt_timezone.utc
+            ).isoformat(),
+            "count": mapped.count,
+            "capacity": mapped.capacity,
+            "size_bytes": bloom.size,
+            "hashes": bloom.num_hashes,
+            "false_positive_rate": bloom.false_positive_rate(mapped.count),
+            "counters": counters,
+        }
+
+
+def _read_filter(path):
+    """Filtre existant (modifiable), capacité, nombre de codes, filigrane"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, _, watermark, capacity, count, num_bits, num_hashes = (
+        HEADER.unpack_from(data, 0)
+    )
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Unsupported code filter")
+    bits = bytearray(data[HEADER.size : HEADER.size + num_bits // 8])
+    if len(bits) != num_bits // 8:
+        raise ValueError("Truncated code filter")
+    return BloomFilter(num_bits, num_hashes, bits), capacity, count, watermark
+
+
+def build_code_filter(path=None, full=False) -> int:
+    """
+    Met à jour le filtre et le met en place atomiquement
+
+    Returns:
+        Nombre de codes du filtre
+    """
+    path = str(path or settings.QR_CODE_FILTER_PATH)
+    error_rate = settings.QR_CODE_FILTER_ERROR_RATE
+    started = time.time()
+
+    bloom = None
+    if not full and os.path.exists(path):
+        try:
+            bloom, capacity, count, watermark = _read_filter(path)
+        except (OSError, ValueError, struct.error):
+            bloom = None
+        else:
+            since = datetime.fromtimestamp(watermark, tz=dt_timezone.utc) - timedelta(
+                seconds=settings.QR_CODE_FILTER_OVERLAP
+            )
+            codes = list(
+                QRCode.objects.filter(created_at__gte=since).values_list(
+                    "unique_code", flat=True
+                )
+            )
+            # Capacité atteinte ou taux d'erreur modifié : reconstruction
+            if count + len(codes) > capacity or (bloom.num_bits, bloom.num_hashes) != (
+                optimal_size(capacity, error_rate)
+            ):
+                bloom = None
+
+    if bloom is None:
+        count = QRCode.objects.count()
+        capacity = max(settings.QR_CODE_FILTER_MIN_CAPACITY, 2 * count)
+        bloom = BloomFilter.for_capacity(capacity, error_rate)
+        codes = QRCode.objects.values_list("unique_code", flat=True).iterator(
+            chunk_size=5000
+        )
+        count = 0
+
+    for unique_code in codes:
+        # Relecture du recouvrement : un code déjà présent n'est pas recompté
+        if unique_code not in bloom:
+            bloom.add(unique_code)
+            count += 1
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".qr_codes.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    FORMAT_VERSION,
+                    time.time(),
+                    started,
+                    capacity,
+                    count,
+                    bloom.num_bits,
+                    bloom.num_hashes,
+                )
+            )
+            f.write(bloom.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return count
+
+
+_code_filter = None
+_code_filter_lock = threading.Lock()
+
+
+def get_code_filter() -> CodeFilter:
+    """Lecteur unique du processus"""
+    global _code_filter
+    if _code_filter is None:
+        with _code_filter_lock:
+            if _code_filter is None:
+                _code_filter = CodeFilter(
+                    settings.QR_CODE_FILTER_PATH,
+                    max_age=settings.QR_CODE_FILTER_MAX_AGE,
+                )
+    return _code_filter
+
+
+def reset_code_filter():
+    """Oublie le lecteur courant (tests, changement de configuration)"""
+    global _code_filter
+    with _code_filter_lock:
+        _code_filter = None
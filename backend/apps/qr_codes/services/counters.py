@@ -0,0 +1,172 @@
+"""
+QR Code counters
+
+Une ligne QRCodeCounter par utilisateur et par entreprise : nombre de
+codes par statut et vérifications du jour. L'endpoint statistics les lit
+en une requête, quel que soit le nombre de codes.
+
+Mises à jour incrémentales (UPDATE ... SET x = x + n) :
+
+    émission              total et active
+    changement de statut  ancien statut -1, nouveau +1
+    vérification          verifications_today (remis à zéro chaque jour)
+
+Seules les lignes existantes sont mises à jour : une ligne absente est
+calculée à la première lecture (une agrégation conditionnelle). Une
+écriture qui contourne ces chemins (QRCode.objects.create, shell) fait
+dériver les compteurs jusqu'au recalcul périodique (rebuild_qr_counters).
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime, time
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from ..models import QRCode, QRCodeCounter, QRVerification
+
+STATUS_FIELDS = {
+    QRCode.Status.ACTIVE: "active",
+    QRCode.Status.SUSPENDED: "suspended",
+    QRCode.Status.REVOKED: "revoked",
+    QRCode.Status.EXPIRED: "expired",
+}
+OWNER_FIELDS = ("user_id", "company_id")
+
+
+def count_by_status(queryset):
+    """Total et nombre de codes par statut, en une seule requête"""
+    return queryset.aggregate(
+        total=Count("pk"),
+        **{
+            field: Count("pk", filter=Q(status=status))
+            for status, field in STATUS_FIELDS.items()
+        },
+    )
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _owners(user_id, company_id):
+    """Propriétaires (champ, id) dont les compteurs incluent un code"""
+    owners = [("user_id", user_id)]
+    if company_id is not None:
+        owners.append(("company_id", company_id))
+    return owners
+
+
+def _apply(deltas):
+    """deltas : {(champ, id): Counter(champ du compteur -> variation)}"""
+    for (owner_field, owner_id), changes in deltas.items():
+        changes = {field: n for field, n in changes.items() if n}
+        if changes:
+            QRCodeCounter.objects.filter(**{owner_field: owner_id}).update(
+                **{field: F(field) + n for field, n in changes.items()}
+            )
+
+
+def count_issued(qr_codes):
+    """Codes émis (actifs), à appeler dans la transaction d'insertion"""
+    deltas = defaultdict(Counter)
+    for qr_code in qr_codes:
+        for owner in _owners(qr_code.user_id, qr_code.company_id):
+            deltas[owner]["total"] += 1
+            deltas[owner][STATUS_FIELDS[qr_code.status]] += 1
+    _apply(deltas)
+
+
+def count_status_changes(rows, new_status):
+    """
+    Args:
+        rows: (user_id, company_id, ancien statut) des codes modifiés
+    """
+    deltas = defaultdict(Counter)
+    for user_id, company_id, old_status in rows:
+        for owner in _owners(user_id, company_id):
+            deltas[owner][STATUS_FIELDS[old_status]] -= 1
+            deltas[owner][STATUS_FIELDS[new_status]] += 1
+    _apply(deltas)
+
+
+def count_verifications(owners):
+    """
+    Args:
+        owners: (user_id, company_id) du code, pour chaque vérification
+    """
+    counts = Counter()
+    for user_id, company_id in owners:
+        for owner in _owners(user_id, company_id):
+            counts[owner] += 1
+
+    today = timezone.localdate()
+    for (owner_field, owner_id), n in counts.items():
+        # Les deux expressions lisent l'ancien verification_day
+        QRCodeCounter.objects.filter(**{owner_field: owner_id}).update(
+            verifications_today=Case(
+                When(verification_day=today, then=F("verifications_today") + n),
+                default=Value(n),
+            ),
+            verification_day=today,
+        )
+
+
+def rebuild_counter(owner_field, owner_id) -> QRCodeCounter:
+    """Recalcule les compteurs d'un propriétaire depuis QRCode et QRVerification"""
+    today = timezone.localdate()
+    owner = owner_field.removesuffix("_id")
+    values = count_by_status(QRCode.objects.filter(**{owner_field: owner_id}))
+    values["verifications_today"] = QRVerification.objects.filter(
+        **{f"qr_code__{owner}": owner_id}, verified_at__gte=_day_start(today)
+    ).count()
+    values["verification_day"] = today
+    values["rebuilt_at"] = timezone.now()
+    try:
+        with transaction.atomic():
+            counter, _ = QRCodeCounter.objects.update_or_create(
+                **{owner_field: owner_id}, defaults=values
+            )
+    except IntegrityError:
+        # Ligne créée en parallèle par une autre lecture
+        counter = QRCodeCounter.objects.get(**{owner_field: owner_id})
+    return counter
+
+
+def get_counters(user=None, company=None):
+    """
+    Compteurs d'un utilisateur ou d'une entreprise
+
+    Returns:
+        Dict total, active, suspended, revoked, expired, verifications_today
+    """
+    owner_field, owner_id = ("user_id", user.pk) if user else ("company_id", company.pk)
+    counter = QRCodeCounter.objects.filter(**{owner_field: owner_id}).first()
+    if counter is None:
+        counter = rebuild_counter(owner_field, owner_id)
+
+    stats = {"total": counter.total}
+    stats.update({field: getattr(counter, field) for field in STATUS_FIELDS.values()})
+    stats["verifications_today"] = (
+        counter.verifications_today
+        if counter.verification_day == timezone.localdate()
+        else 0
+    )
+    return stats
+
+
+def rebuild_counters() -> int:
+    """
+    Recalcule toutes les lignes existantes (dérive, écritures concurrentes)
+
+    Returns:
+        Nombre de lignes recalculées
+    """
+    owners = QRCodeCounter.objects.values_list(*OWNER_FIELDS)
+    for user_id, company_id in owners:
+        if user_id is not None:
+            rebuild_counter("user_id", user_id)
+        else:
+            rebuild_counter("company_id", company_id)
+    return len(owners)
@@ -0,0 +1,167 @@
+"""
+QR Code issuance service
+"""
+
+from django.conf import settings
+from django.db import transaction
+
+from ..models import QRCode, QRSignatureBatch
+from .code_filter import mark_issued
+from .counters import count_issued
+from .sequence import allocate_unique_code
+from apps.audit.models import AuditLog
+from core.crypto.pool import generate_in_worker
+from core.crypto.qr_generator import SecureQRGenerator
+
+
+def issue_qr_codes(
+    user,
+    items,
+    ip_address=None,
+    user_agent="",
+    issuance_job=None,
+    crypto_pool=None,
+):
+    """
+    Émet un lot de QR codes
+
+    Args:
+        user: User instance
+        items: liste de dicts {"company": Company|None, "expires_days": int}
+        ip_address: IP du demandeur (journal d'audit)
+        user_agent: User-Agent du demandeur (journal d'audit)
+        issuance_job: QRIssuanceJob d'origine (optionnel)
+        crypto_pool: CryptoPool où répartir la génération (sinon en ligne)
+
+    Avec QR_MERKLE_BATCH_SIGNING, chaque lot d'au moins QR_MERKLE_MIN_BATCH
+    codes est signé une seule fois (racine de Merkle, QRSignatureBatch).
+
+    Returns:
+        Liste des QRCode créés, dans l'ordre de `items`
+
+    Raises:
+        ServiceUnavailableError: file du pool saturée (rien n'est émis)
+    """
+    generator = SecureQRGenerator()
+    batch_size = settings.QR_BULK_BATCH_SIZE
+    created = []
+
+    for start in range(0, len(items), batch_size):
+        chunk = items[start : start + batch_size]
+        batch_signing = (
+            settings.QR_MERKLE_BATCH_SIGNING
+            and len(chunk) >= settings.QR_MERKLE_MIN_BATCH
+        )
+        if crypto_pool is not None:
+            parts = _generate_in_pool(
+                crypto_pool, generator, user, chunk, batch_signing
+            )
+        elif batch_signing:
+            parts = [
+                generator.generate_batch([dict(item, user=user) for item in chunk])
+            ]
+        else:
+            parts = [
+                (
+                    None,
+                    [
+                        generator.generate(
+                            user=user,
+                            company=item.get("company"),
+                            expires_days=item.get("expires_days", 365),
+                        )
+                        for item in chunk
+                    ],
+                )
+            ]
+
+        signature_batches = []
+        results = []
+        batches = []
+        for batch, part_results in parts:
+            signature_batch = None
+            if batch is not None:
+                signature_batch = QRSignatureBatch(issuance_job=issuance_job, **batch)
+                signature_batches.append(signature_batch)
+            results.extend(part_results)
+            batches.extend([signature_batch] * len(part_results))
+
+        qr_codes = [
+            QRCode(
+                user=user,
+                company=item.get("company"),
+                unique_code=result["unique_code"],
+                encrypted_data=result["encrypted_data"],
+                signature=result["signature"],
+                hash_value=result["hash_value"],
+                salt=result["salt"],
+                key_id=result["key_id"],
+                algorithm=result["algorithm"],
+                version=result["version"],
+                expires_at=result["expires_at"],
+                issuance_job=issuance_job,
+                batch=signature_batch,
+                batch_index=result["merkle"]["index"] if result["merkle"] else None,
+                merkle_proof=result["merkle"]["proof"] if result["merkle"] else "",
+                code_bound=result["code_bound"],
+            )
+            for item, result, signature_batch in zip(chunk, results, batches)
+        ]
+
+        with transaction.atomic():
+            QRSignatureBatch.objects.bulk_create(signature_batches)
+            QRCode.objects.bulk_create(qr_codes)
+            count_issued(qr_codes)
+            AuditLog.objects.bulk_create(
+                [
+                    AuditLog(
+                        user=user,
+                        action="QR_GENERATED",
+                        resource_type="QRCode",
+                        resource_id=str(qr_code.id),
+                        description=f"QR code {qr_code.unique_code} généré",
+                        ip_address=ip_address,
+                        user_agent=user_agent,
+                    )
+                    for qr_code in qr_codes
+                ]
+            )
+            # Vérifiables avant leur entrée dans le filtre des codes émis
+            codes = [qr_code.unique_code for qr_code in qr_codes]
+            transaction.on_commit(lambda codes=codes: mark_issued(codes))
+
+        created.extend(qr_codes)
+
+    return created
+
+
+def _generate_in_pool(crypto_pool, generator, user, chunk, batch_signing):
+    """
+    Répartit la génération d'un lot sur les processus du pool
+
+    Les unique_code sont alloués ici : les processus du pool n'accèdent
+    jamais à la base. Chaque part signée par lot a sa propre racine.
+    """
+    entries = [
+        {
+            "unique_code": allocate_unique_code(),
+            "user_id": str(user.id),
+            "company_id": str(item["company"].id) if item.get("company") else None,
+            "expires_days": item.get("expires_days", 365),
+        }
+        for item in chunk
+    ]
+    options = {
+        "key_id": generator.key_id,
+        "kdf": generator.kdf.name,
+        "payload_format": generator.payload_format,
+    }
+    min_size = settings.QR_MERKLE_MIN_BATCH if batch_signing else 1
+    futures = crypto_pool.submit_many(
+        generate_in_worker,
+        [
+            (options, part, batch_signing)
+            for part in crypto_pool.split(entries, min_size)
+        ],
+    )
+    return [future.result() for future in futures]
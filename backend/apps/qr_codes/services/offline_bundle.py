@@ -0,0 +1,189 @@
+"""
+QR Code offline verification bundle
+
+Les terminaux de terrain vérifient les signatures sans réseau : il leur
+faut les clés publiques du trousseau et la liste des codes inactifs
+(révoqués, suspendus, expirés).
+
+    bundle = {
+        "format": 1, "mode": "full" | "delta", "seq", "since" (delta),
+        "generated_at",
+        "hash": {"algorithm": "sha256", "bits": 40},
+        "keys": [{"kid", "alg", "public_key"}],        # DER base64
+        "offline": {"kids", "v1", "v2"},                # payloads acceptés
+        "revoked": <ensemble>,                          # full
+        "added": <ensemble>, "removed": <ensemble>,     # delta
+    }
+    ensemble = {"count", "p", "data"}                   # Golomb-Rice, base64
+
+Seuls les payloads liés à leur unique_code ("bnd" : 1 en v1, versions
+0x05 et 0x06 en v2, voir core.crypto.payload) signés par une clé de
+"offline.kids" se vérifient hors ligne. Un payload antérieur ne lie pas
+son identifiant au chiffré signé : hors ligne, il pourrait être présenté
+sous le code d'un autre, le terminal le renvoie en ligne
+(offline_verifiable).
+
+Un code est représenté par les 40 premiers bits de SHA-256(unique_code).
+Le bundle est sérialisé en JSON canonique et signé avec la clé active ; le
+terminal vérifie la signature (clé épinglée) avant d'appliquer le contenu.
+
+Numéro de séquence : id du dernier QRRevocationEvent antérieur à
+QR_OFFLINE_SEQ_SETTLE secondes. Les événements plus récents sont livrés
+aussi, puis de nouveau au delta suivant (appliquer un événement deux fois
+est sans effet) : une transaction validée en retard n'est pas perdue.
+"""
+
+import base64
+import hashlib
+import json
+from datetime import timedelta
+
+from cryptography.hazmat.primitives import serialization
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from ..models import QRCode, QRRevocationEvent
+from core.crypto.keyring import get_keyring
+from core.crypto.payload import V2_BOUND_BATCH_VERSION, V2_BOUND_VERSION
+from core.utils import gcs
+
+BUNDLE_FORMAT = 2
+HASH_BITS = 40
+BUNDLE_CACHE_PREFIX = "qr_offline_bundle:full:"
+
+
+def code_hash(unique_code: str) -> int:
+    digest = hashlib.sha256(unique_code.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") >> (64 - HASH_BITS)
+
+
+def encode_set(unique_codes) -> dict:
+    values = {code_hash(code) for code in unique_codes}
+    p = gcs.rice_parameter(len(values), HASH_BITS)
+    return {
+        "count": len(values),
+        "p": p,
+        "data": base64.b64encode(gcs.encode(values, p)).decode("ascii"),
+    }
+
+
+def decode_set(encoded: dict) -> set:
+    """Inverse de encode_set (côté terminal ; utilisé par les tests)"""
+    data = base64.b64decode(encoded["data"])
+    return set(gcs.decode(data, encoded["count"], encoded["p"]))
+
+
+def current_sequence() -> int:
+    settled = timezone.now() - timedelta(seconds=settings.QR_OFFLINE_SEQ_SETTLE)
+    events = QRRevocationEvent.objects.filter(created_at__lte=settled)
+    return events.aggregate(seq=Max("id"))["seq"] or 0
+
+
+def _public_keys():
+    keyring = get_keyring()
+    keys = []
+    for key_id in keyring.key_ids():
+        try:
+            public_key = keyring.public_key(key_id)
+        except OSError:
+            # Clé déclarée mais non provisionnée sur cette machine
+            continue
+        der = public_key.public_bytes(
+            serialization.Encoding.DER,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        keys.append(
+            {
+                "kid": key_id,
+                "alg": keyring.algorithm(key_id),
+                "public_key": base64.b64encode(der).decode("ascii"),
+            }
+        )
+    return keys
+
+
+def _signed(bundle: dict) -> dict:
+    keyring = get_keyring()
+    body = json.dumps(bundle, sort_keys=True, separators=(",", ":"))
+    signature = keyring.signer().sign(keyring.private_key(), body.encode("utf-8"))
+    return {
+        "bundle": body,
+        "kid": keyring.active_key_id,
+        "alg": keyring.algorithm(),
+        "signature": base64.b64encode(signature).decode("ascii"),
+    }
+
+
+def _header(mode: str, seq: int) -> dict:
+    keys = _public_keys()
+    return {
+        "format": BUNDLE_FORMAT,
+        "mode": mode,
+        "seq": seq,
+        "generated_at": timezone.now().isoformat(),
+        "hash": {"algorithm": "sha256", "bits": HASH_BITS},
+        "keys": keys,
+        "offline": {
+            "kids": [key["kid"] for key in keys],
+            "v1": {"bnd": 1},
+            "v2": [V2_BOUND_VERSION, V2_BOUND_BATCH_VERSION],
+        },
+    }
+
+
+def offline_verifiable(qr_data: dict, bundle: dict) -> bool:
+    """
+    Le payload décodé peut-il être vérifié hors ligne avec ce bundle ?
+
+    Règle appliquée par les terminaux (côté terminal ; utilisé par les
+    tests) : payload lié à son code, signé par une clé du bundle.
+    """
+    policy = bundle.get("offline")
+    return bool(
+        policy and qr_data.get("bnd") == 1 and qr_data.get("kid") in policy["kids"]
+    )
+
+
+def build_full_bundle() -> dict:
+    """Liste complète des codes inactifs, mise en cache par numéro de séquence"""
+    seq = current_sequence()
+    cache_key = BUNDLE_CACHE_PREFIX + str(seq)
+    signed = cache.get(cache_key)
+    if signed is None:
+        bundle = _header("full", seq)
+        inactive = QRCode.objects.exclude(status=QRCode.Status.ACTIVE)
+        bundle["revoked"] = encode_set(
+            inactive.values_list("unique_code", flat=True).iterator(chunk_size=5000)
+        )
+        signed = _signed(bundle)
+        cache.set(cache_key, signed, settings.QR_OFFLINE_BUNDLE_CACHE_TTL)
+    return signed
+
+
+def build_bundle(since=None) -> dict:
+    """
+    Bundle signé : complet, ou changements depuis `since`
+
+    Un delta trop long (plus de QR_OFFLINE_DELTA_MAX événements), ou un
+    `since` postérieur à la séquence courante (base restaurée), donne un
+    bundle complet.
+    """
+    if since is None:
+        return build_full_bundle()
+
+    seq = current_sequence()
+    events = QRRevocationEvent.objects.filter(id__gt=since)
+    if since > seq or events.count() > settings.QR_OFFLINE_DELTA_MAX:
+        return build_full_bundle()
+
+    # Dernier événement de chaque code
+    latest = dict(events.order_by("id").values_list("unique_code", "revoked"))
+    bundle = _header("delta", seq)
+    bundle["since"] = since
+    bundle["added"] = encode_set(code for code, revoked in latest.items() if revoked)
+    bundle["removed"] = encode_set(
+        code for code, revoked in latest.items() if not revoked
+    )
+    return _signed(bundle)
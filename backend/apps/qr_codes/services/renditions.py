@@ -0,0 +1,197 @@
+"""
+QR Code rendition service
+
+Les images ne sont plus produites à l'émission : elles sont rendues au
+premier téléchargement puis conservées dans le stockage, indexées par
+(code, format, taille, couleurs).
+
+Bornes : un PNG ne dépasse pas QR_RENDER_MAX_SIDE pixels de côté
+(too_large, vérifié avant tout rendu) et seules les
+QR_RENDITIONS_PER_CODE renditions les plus récentes d'un code sont
+conservées.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from core.crypto.keyring import get_keyring
+from core.crypto.payload import encode_qr_payload
+from core.crypto.qr_generator import build_qr, build_qr_data
+from core.crypto.renderer import render_png, render_svg
+
+RENDITION_CONTENT_TYPES = {
+    "png": "image/png",
+    "png-mono": "image/png",
+    "svg": "image/svg+xml",
+}
+RENDITION_EXTENSIONS = {"png": "png", "png-mono": "png", "svg": "svg"}
+
+
+class Rendition:
+    """Paramètres d'une rendition et clé de cache associée"""
+
+    def __init__(
+        self,
+        qr_code,
+        format="png",
+        box_size=10,
+        border=4,
+        fill_color="#059669",
+        back_color="#ffffff",
+        dpi=None,
+        module_mm=None,
+        payload_format=None,
+    ):
+        """
+        Args:
+            box_size: taille d'un module en pixels (ignorée si module_mm)
+            dpi: résolution d'impression enregistrée dans le PNG
+            module_mm: taille physique d'un module ; avec dpi, fixe box_size
+        """
+        self.qr_code = qr_code
+        self.format = format
+        self.border = border
+        self.dpi = dpi
+        self.module_mm = module_mm
+        if module_mm and dpi:
+            box_size = max(1, round(module_mm * dpi / 25.4))
+        self.box_size = box_size
+        if format == "png-mono":
+            fill_color, back_color = "#000000", "#ffffff"
+        self.fill_color = fill_color.lower()
+        self.back_color = back_color.lower()
+        self.payload_format = payload_format or settings.QR_PAYLOAD_FORMAT
+
+    @property
+    def digest(self) -> str:
+        """Empreinte stable : sert d'ETag fort et de nom de fichier"""
+        parts = [
+            self.qr_code.unique_code,
+            self.qr_code.signature,
+            self.payload_format,
+            self.format,
+            str(self.box_size),
+            str(self.border),
+            self.fill_color,
+            self.back_color,
+            str(self.dpi or ""),
+            str(self.module_mm or ""),
+        ]
+        if self.payload_format == "url":
+            parts.append(settings.QR_SHORT_URL_BASE)
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+    @property
+    def content_type(self) -> str:
+        return RENDITION_CONTENT_TYPES[self.format]
+
+    @property
+    def storage_name(self) -> str:
+        return (
+            f"{settings.QR_RENDITIONS_DIR}/{self.qr_code.unique_code}/"
+            f"{self.digest}.{RENDITION_EXTENSIONS[self.format]}"
+        )
+
+    @cached_property
+    def qr(self):
+        return build_qr(self.payload(), box_size=self.box_size, border=self.border)
+
+    @property
+    def pixel_size(self) -> int:
+        """Côté du PNG en pixels : modules, marge comprise, × box_size"""
+        return len(self.qr.get_matrix()) * self.box_size
+
+    @property
+    def too_large(self) -> bool:
+        """PNG au-delà de QR_RENDER_MAX_SIDE pixels (le SVG n'a pas de trame)"""
+        return self.format != "svg" and self.pixel_size > settings.QR_RENDER_MAX_SIDE
+
+    def payload(self) -> str:
+        qr_code = self.qr_code
+        keyring = get_keyring()
+        merkle = None
+        if qr_code.batch_id:
+            merkle = {
+                "index": qr_code.batch_index,
+                "size": qr_code.batch.size,
+                "proof": qr_code.merkle_proof,
+            }
+        qr_data = build_qr_data(
+            unique_code=qr_code.unique_code,
+            key_id=qr_code.key_id,
+            algorithm=qr_code.algorithm,
+            version=qr_code.version,
+            encrypted_data=qr_code.encrypted_data,
+            signature=qr_code.signature,
+            expires_at=qr_code.expires_at,
+            signature_algorithm=keyring.algorithm(
+                qr_code.key_id or keyring.legacy_key_id
+            ),
+            merkle=merkle,
+            code_bound=qr_code.code_bound,
+        )
+        return encode_qr_payload(qr_data, self.payload_format)
+
+    def render(self) -> bytes:
+        matrix = self.qr.get_matrix()
+        if self.format == "svg":
+            # En millimètres pour l'impression, sinon en pixels
+            return render_svg(
+                matrix,
+                box_size=self.module_mm or self.box_size,
+                fill_color=self.fill_color,
+                back_color=self.back_color,
+                unit="mm" if self.module_mm else "",
+            )
+        return render_png(
+            matrix,
+            box_size=self.box_size,
+            fill_color=self.fill_color,
+            back_color=self.back_color,
+            mono=self.format == "png-mono",
+            dpi=self.dpi,
+        )
+
+
+def get_rendition_content(rendition: Rendition) -> bytes:
+    """Retourne l'image depuis le cache de stockage, en la rendant au besoin"""
+    name = rendition.storage_name
+    if default_storage.exists(name):
+        try:
+            with default_storage.open(name, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # Évincée entre-temps : rendue de nouveau
+            pass
+
+    content = rendition.render()
+    saved_name = default_storage.save(name, ContentFile(content))
+    if saved_name != name:
+        # Rendu concurrent déjà enregistré : on garde un seul exemplaire
+        default_storage.delete(saved_name)
+    else:
+        evict_renditions(rendition.qr_code.unique_code)
+    return content
+
+
+def evict_renditions(unique_code: str):
+    """Ne garde que les QR_RENDITIONS_PER_CODE renditions les plus récentes"""
+    directory = f"{settings.QR_RENDITIONS_DIR}/{unique_code}"
+    _, files = default_storage.listdir(directory)
+    if len(files) <= settings.QR_RENDITIONS_PER_CODE:
+        return
+    names = sorted(
+        (f"{directory}/{file}" for file in files),
+        key=default_storage.get_modified_time,
+        reverse=True,
+    )
+    for name in names[settings.QR_RENDITIONS_PER_CODE :]:
+        default_storage.delete(name)
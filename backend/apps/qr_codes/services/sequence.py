@@ -0,0 +1,118 @@
+"""
+QR Code unique_code allocator
+
+Les codes ST-CI-YYYY-XXXXXXXX ne sont plus tirés au hasard : chaque
+processus réserve un bloc de numéros dans QRCodeSequence (une écriture
+par bloc), puis les fait passer par une permutation à clé sur 32 bits.
+Deux numéros distincts donnent deux codes distincts : ni aller-retour
+d'unicité ni nouvel essai à l'insertion, et bulk_create ne rencontre
+jamais de collision.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import QRCode, QRCodeSequence
+from core.crypto.kdf import derive_subkey
+from core.crypto.permutation import DOMAIN_SIZE, FeistelPermutation
+
+CODE_PREFIX = "ST-CI"
+PERMUTATION_KEY_INFO = b"stamp-tech-ivoire/unique-code-permutation"
+
+
+def permutation_key() -> bytes:
+    """
+    Clé de la permutation des unique_code
+
+    QR_CODE_PERMUTATION_KEY si elle est définie, sinon une sous-clé HKDF
+    de ENCRYPTION_KEY propre à cet usage : la clé de chiffrement elle-même
+    ne sert jamais de clé HMAC à la permutation.
+    """
+    if settings.QR_CODE_PERMUTATION_KEY:
+        return bytes.fromhex(settings.QR_CODE_PERMUTATION_KEY)
+    return derive_subkey(bytes.fromhex(settings.ENCRYPTION_KEY), PERMUTATION_KEY_INFO)
+
+
+def format_unique_code(year: int, value: int) -> str:
+    return f"{CODE_PREFIX}-{year}-{value:08X}"
+
+
+class CodeAllocator:
+    """
+    Distribue les unique_code d'un processus à partir de blocs réservés
+
+    Le bloc est lié au pid : un worker forké (Celery prefork) ne réutilise
+    jamais le bloc hérité de son parent.
+    """
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size or settings.QR_CODE_BLOCK_SIZE
+        self.key = permutation_key()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._year = None
+        self._codes = []
+
+    def allocate(self) -> str:
+        """Retourne un unique_code jamais attribué"""
+        year = timezone.now().year
+        with self._lock:
+            if self._pid != os.getpid() or self._year != year:
+                self._pid, self._year, self._codes = os.getpid(), year, []
+            while not self._codes:
+                self._codes = self._reserve_block(year)
+            return self._codes.pop()
+
+    def _reserve_block(self, year: int):
+        with transaction.atomic():
+            QRCodeSequence.objects.get_or_create(year=year)
+            sequence = QRCodeSequence.objects.select_for_update().get(year=year)
+            start = sequence.next_value
+            QRCodeSequence.objects.filter(year=year).update(
+                next_value=F("next_value") + self.block_size
+            )
+
+        end = min(start + self.block_size, DOMAIN_SIZE)
+        if start >= end:
+            raise RuntimeError(f"unique_code space exhausted for {year}")
+
+        permutation = FeistelPermutation(self.key, tweak=str(year).encode("ascii"))
+        codes = [
+            format_unique_code(year, permutation.permute(value))
+            for value in range(start, end)
+        ]
+
+        # Codes aléatoires émis avant la séquence : un contrôle par bloc
+        taken = set(
+            QRCode.objects.filter(unique_code__in=codes).values_list(
+                "unique_code", flat=True
+            )
+        )
+        # Servis par pop() : on inverse pour conserver l'ordre de la séquence
+        return [code for code in reversed(codes) if code not in taken]
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def allocate_unique_code() -> str:
+    """Alloue un unique_code avec l'allocateur unique du processus"""
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = CodeAllocator()
+    return _allocator.allocate()
+
+
+def reset_allocator():
+    """Oublie l'allocateur courant (tests, changement de configuration)"""
+    global _allocator
+    with _allocator_lock:
+        _allocator = None
@@ -0,0 +1,71 @@
+"""
+QR Code status changes
+
+Point de passage unique des changements de statut : la vue `revoke`, les
+actions d'administration, les lots de signature et la tâche d'expiration
+passent par ici pour que qr_code_status_changed soit toujours émis.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import QRCode, QRRevocationEvent
+from ..signals import qr_code_status_changed
+from .counters import count_status_changes
+from .status_index import mark_status_changed
+
+STATUS_CHANGE_CHUNK_SIZE = 1000
+
+
+def change_qr_status(queryset, new_status):
+    """
+    Passe les QR codes du queryset au statut `new_status`
+
+    Returns:
+        Nombre de QR codes modifiés
+    """
+    now = timezone.now()
+    fields = {"status": new_status, "status_changed_at": now}
+    if new_status == QRCode.Status.REVOKED:
+        fields["revoked_at"] = now
+
+    rows = list(
+        queryset.exclude(status=new_status).values_list(
+            "unique_code", "user_id", "company_id", "status"
+        )
+    )
+    codes = [row[0] for row in rows]
+    updated = 0
+    for start in range(0, len(codes), STATUS_CHANGE_CHUNK_SIZE):
+        chunk = codes[start : start + STATUS_CHANGE_CHUNK_SIZE]
+        with transaction.atomic():
+            updated += (
+                QRCode.objects.filter(unique_code__in=chunk)
+                .exclude(status=new_status)
+                .update(**fields)
+            )
+            # Compteurs par utilisateur et entreprise
+            count_status_changes(
+                [row[1:] for row in rows[start : start + STATUS_CHANGE_CHUNK_SIZE]],
+                new_status,
+            )
+            # Deltas de révocation des terminaux hors ligne, dans la même
+            # transaction : un code révoqué a toujours son événement
+            QRRevocationEvent.objects.bulk_create(
+                QRRevocationEvent(
+                    unique_code=code, revoked=new_status != QRCode.Status.ACTIVE
+                )
+                for code in chunk
+            )
+
+    if codes:
+        # L'index de statuts est périmé dès maintenant, puis de nouveau après
+        # commit : une reconstruction intermédiaire n'a pas vu ces changements
+        mark_status_changed()
+        # Invalidation après commit : avant, une lecture concurrente pourrait
+        # remettre en cache l'ancien statut
+        transaction.on_commit(mark_status_changed)
+        transaction.on_commit(
+            lambda: qr_code_status_changed.send(sender=QRCode, unique_codes=codes)
+        )
+    return updated
@@ -0,0 +1,287 @@
+"""
+QR Code status index
+
+Fichier trié, partagé en lecture seule (mmap) par tous les workers d'une
+machine, qui permet de refuser un code révoqué, suspendu ou expiré sans
+requête SQL.
+
+    en-tête   magic "QRSI", version u8, built_at f64, watermark f64, count u32
+    entrées   clé u64 (SHA-256 tronqué du unique_code), statut u8,
+              expires_at u32 (epoch), id du QRCode (16 octets)
+
+Les entrées sont triées par clé : recherche dichotomique en O(log n). La
+tâche rebuild_status_index réécrit le fichier à partir des changements
+depuis le dernier filigrane, puis le remplace atomiquement (os.replace).
+
+L'index est considéré périmé (retour à la base) s'il est trop ancien ou si
+un changement de statut a eu lieu après son filigrane.
+"""
+
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import QRCode
+
+MAGIC = b"QRSI"
+FORMAT_VERSION = 1
+HEADER = struct.Struct(">4sBddI")
+RECORD = struct.Struct(">QBI16s")
+KEY = struct.Struct(">Q")
+
+STATUS_CODES = {
+    QRCode.Status.ACTIVE: 1,
+    QRCode.Status.SUSPENDED: 2,
+    QRCode.Status.REVOKED: 3,
+    QRCode.Status.EXPIRED: 4,
+}
+CODE_STATUSES = {code: status for status, code in STATUS_CODES.items()}
+# Deux codes partagent la même clé tronquée : décision laissée à la base
+AMBIGUOUS = 0xFF
+
+# Horodatage du dernier changement de statut, posé par change_qr_status
+STATUS_CHANGED_KEY = "qr_status_index:changed_at"
+
+
+def code_key(unique_code: str) -> int:
+    return int.from_bytes(
+        hashlib.sha256(unique_code.encode("utf-8")).digest()[:8], "big"
+    )
+
+
+def mark_status_changed():
+    """Signale un changement de statut : l'index est périmé jusqu'à sa reconstruction"""
+    cache.set(STATUS_CHANGED_KEY, time.time(), None)
+
+
+class StatusIndexEntry(NamedTuple):
+    status: str
+    expires_at: datetime
+    qr_code_id: uuid.UUID
+
+    def error(self) -> Optional[str]:
+        """Message de refus, ou None si le code est actif et non expiré"""
+        if self.status == QRCode.Status.ACTIVE and self.expires_at > timezone.now():
+            return None
+        return f"QR code is {self.status.lower()}"
+
+
+class _Keys:
+    """Vue séquence des clés d'un index mappé, pour bisect"""
+
+    def __init__(self, buffer, count):
+        self.buffer = buffer
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return KEY.unpack_from(self.buffer, HEADER.size + index * RECORD.size)[0]
+
+
+class _Mapped(NamedTuple):
+    """Fichier mappé et son en-tête, remplacés d'un bloc au rechargement"""
+
+    mapping: mmap.mmap
+    built_at: float
+    watermark: float
+    count: int
+
+
+class StatusIndex:
+    """Lecteur de l'index, rechargé quand le fichier est remplacé"""
+
+    def __init__(self, path, max_age: float, check_interval: float = 1.0):
+        self.path = str(path)
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mapped = None
+        self._identity = None
+        self._next_check = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._mapped = None
+                self._identity = None
+                return
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if identity == self._identity:
+                return
+
+            with open(self.path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, built_at, watermark, count = HEADER.unpack_from(mapping, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                mapping.close()
+                self._mapped = None
+                return
+            # L'ancien mapping est libéré par le ramasse-miettes une fois
+            # les lectures en cours terminées
+            self._mapped = _Mapped(mapping, built_at, watermark, count)
+            self._identity = identity
+
+    def _fresh(self) -> Optional[_Mapped]:
+        self._refresh()
+        mapped = self._mapped
+        if mapped is None or time.time() - mapped.built_at > self.max_age:
+            return None
+        changed_at = cache.get(STATUS_CHANGED_KEY)
+        if changed_at is not None and changed_at > mapped.watermark:
+            return None
+        return mapped
+
+    def is_fresh(self) -> bool:
+        return self._fresh() is not None
+
+    def lookup(self, unique_code: str) -> Optional[StatusIndexEntry]:
+        """
+        Statut d'un code d'après l'index
+
+        Returns:
+            None si l'index est périmé, ou si le code est absent ou ambigu :
+            l'appelant interroge alors la base
+        """
+        mapped = self._fresh()
+        if mapped is None:
+            return None
+        mapping, count = mapped.mapping, mapped.count
+
+        key = code_key(unique_code)
+        index = bisect.bisect_left(_Keys(mapping, count), key)
+        if index >= count:
+            return None
+        found, status, expires, qr_code_id = RECORD.unpack_from(
+            mapping, HEADER.size + index * RECORD.size
+        )
+        if found != key or status == AMBIGUOUS:
+            return None
+        return StatusIndexEntry(
+            status=CODE_STATUSES[status],
+            expires_at=datetime.fromtimestamp(expires, tz=dt_timezone.utc),
+            qr_code_id=uuid.UUID(bytes=qr_code_id),
+        )
+
+
+def _read_records(path):
+    """Entrées d'un index existant : {clé: (statut, expires, id)} et filigrane"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, _, watermark, count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Unsupported status index")
+    records = {}
+    for offset in range(HEADER.size, HEADER.size + count * RECORD.size, RECORD.size):
+        key, status, expires, qr_code_id = RECORD.unpack_from(data, offset)
+        records[key] = (status, expires, qr_code_id)
+    return records, watermark
+
+
+def build_status_index(path=None, full=False) -> int:
+    """
+    Reconstruit l'index et le met en place atomiquement
+
+    Incrémental par défaut : seuls les codes créés ou modifiés depuis le
+    filigrane précédent (moins QR_STATUS_INDEX_OVERLAP secondes, pour les
+    transactions validées en retard) sont relus.
+
+    Returns:
+        Nombre d'entrées de l'index
+    """
+    path = str(path or settings.QR_STATUS_INDEX_PATH)
+    started = time.time()
+
+    records, queryset = {}, QRCode.objects.all()
+    if not full and os.path.exists(path):
+        try:
+            records, watermark = _read_records(path)
+        except (OSError, ValueError, struct.error):
+            records = {}
+        else:
+            since = datetime.fromtimestamp(watermark, tz=dt_timezone.utc) - timedelta(
+                seconds=settings.QR_STATUS_INDEX_OVERLAP
+            )
+            queryset = queryset.filter(
+                Q(created_at__gte=since) | Q(status_changed_at__gte=since)
+            )
+
+    rows = queryset.values_list("unique_code", "status", "expires_at", "id")
+    for unique_code, status, expires_at, qr_code_id in rows.iterator(chunk_size=5000):
+        key = code_key(unique_code)
+        previous = records.get(key)
+        if previous is not None and previous[2] != qr_code_id.bytes:
+            # Collision de clé tronquée entre deux codes distincts
+            records[key] = (AMBIGUOUS, 0, b"\x00" * 16)
+            continue
+        records[key] = (
+            STATUS_CODES[status],
+            min(int(expires_at.timestamp()), 2**32 - 1),
+            qr_code_id.bytes,
+        )
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".qr_status.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(
+                HEADER.pack(MAGIC, FORMAT_VERSION, time.time(), started, len(records))
+            )
+            for key in sorted(records):
+                f.write(RECORD.pack(key, *records[key]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(records)
+
+
+_status_index = None
+_status_index_lock = threading.Lock()
+
+
+def get_status_index() -> StatusIndex:
+    """Lecteur unique du processus"""
+    global _status_index
+    if _status_index is None:
+        with _status_index_lock:
+            if _status_index is None:
+                _status_index = StatusIndex(
+                    settings.QR_STATUS_INDEX_PATH,
+                    max_age=settings.QR_STATUS_INDEX_MAX_AGE,
+                )
+    return _status_index
+
+
+def reset_status_index():
+    """Oublie le lecteur courant (tests, changement de configuration)"""
+    global _status_index
+    with _status_index_lock:
+        _status_index = None
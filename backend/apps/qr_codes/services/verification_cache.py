@@ -0,0 +1,315 @@
+"""
+QR Code verification cache
+
+Deux niveaux : un LRU local au processus devant le cache Django.
+
+    qr_verify:sig:<sha256 du payload>  -> {"valid", "code", "root"}
+    qr_verify:resp:<unique_code>       -> {"response", "qr_code_id", "root", "data"}
+    qr_verify:ver:<unique_code>        -> version de statut, changée à l'invalidation
+
+Le contrôle de signature ne dépend que du payload (seuls les contrôles
+réussis sont conservés) ; la réponse dépend du statut du code et est
+invalidée par qr_code_status_changed. Une réponse n'est reprise que pour
+le chiffré enregistré du code ("data", son sha256) : un chiffré signé
+présenté sous l'identifiant d'un autre code repasse par la base.
+
+Dans les autres processus, une entrée locale vit au plus
+QR_VERIFY_LOCAL_TTL secondes ; l'index de statuts, consulté avant le
+cache, refuse entre-temps un code qu'il sait inactif.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.crypto.qr_generator import QRVerifier, VerificationContext
+
+SIGNATURE_PREFIX = "qr_verify:sig:"
+RESPONSE_PREFIX = "qr_verify:resp:"
+VERSION_PREFIX = "qr_verify:ver:"
+
+
+class LocalLRUCache:
+    """LRU borné et thread-safe, avec durée de vie par entrée"""
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalLRUCache(max_size=settings.QR_VERIFY_LOCAL_SIZE)
+
+
+def _get(key, local_ttl):
+    value = local_cache.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is not None:
+            local_cache.set(key, value, local_ttl)
+    return value
+
+
+def _set(key, value, ttl, local_ttl):
+    cache.set(key, value, ttl)
+    local_cache.set(key, value, min(ttl, local_ttl))
+
+
+def payload_digest(qr_data_str: str) -> str:
+    return hashlib.sha256(qr_data_str.strip().encode("utf-8")).hexdigest()
+
+
+def _check_signature(context: VerificationContext, verifier: QRVerifier):
+    """Étape signature, reprise du cache si le payload a déjà été vérifié"""
+    signature_ttl = settings.QR_VERIFY_SIGNATURE_TTL
+    signature_key = SIGNATURE_PREFIX + payload_digest(context.qr_data_str)
+    with context.stage("signature"):
+        check = _get(signature_key, signature_ttl)
+        if check is None:
+            verifier.stage_signature(context)
+            # Seuls les contrôles réussis sont conservés : un payload refusé,
+            # choisi par le client, n'occupe pas le cache
+            if not context.done:
+                check = {"valid": True, "code": context.code, "root": context.root}
+                _set(signature_key, check, signature_ttl, signature_ttl)
+        elif check["valid"]:
+            context.root = check["root"]
+        else:
+            context.reject("Invalid signature")
+
+
+def _cached_response(context: VerificationContext):
+    """Réponse en cache, pour la même racine de lot et le même chiffré"""
+    entry = _get(RESPONSE_PREFIX + context.code, settings.QR_VERIFY_LOCAL_TTL)
+    if entry is None or entry["root"] != context.root:
+        return
+    if context.qr_data is not None and entry.get("data") != payload_digest(
+        context.qr_data["data"]
+    ):
+        return
+    context.result = entry["response"]
+    context.qr_code_id = entry["qr_code_id"]
+
+
+def _status_versions(contexts) -> dict:
+    """Version de statut des codes, à lire avant la base"""
+    return cache.get_many([VERSION_PREFIX + context.code for context in contexts])
+
+
+def _storable(contexts, versions: dict):
+    """
+    Contextes dont la réponse peut être mise en cache
+
+    Un code dont la version de statut a changé depuis la lecture en base a
+    peut-être une réponse périmée, et son invalidation a déjà eu lieu.
+    """
+    contexts = [context for context in contexts if _should_store(context)]
+    current = _status_versions(contexts)
+    return [
+        context
+        for context in contexts
+        if current.get(VERSION_PREFIX + context.code)
+        == versions.get(VERSION_PREFIX + context.code)
+    ]
+
+
+def _store_response(context: VerificationContext):
+    response = context.result
+    ttl = settings.QR_VERIFY_CACHE_TTL
+    if response["valid"]:
+        # Un code valide ne doit pas survivre en cache à son expiration
+        expires_at = datetime.fromisoformat(response["data"]["expires_at"])
+        remaining = (expires_at - timezone.now()).total_seconds()
+        ttl = max(1, min(ttl, int(remaining)))
+    _set(
+        RESPONSE_PREFIX + context.code,
+        {
+            "response": response,
+            "qr_code_id": context.qr_code_id,
+            "root": context.root,
+            "data": payload_digest(context.qr_code.encrypted_data),
+        },
+        ttl,
+        settings.QR_VERIFY_LOCAL_TTL,
+    )
+
+
+def _prepare(qr_data_str: str, verifier: QRVerifier) -> VerificationContext:
+    """
+    Étapes qui n'ont pas besoin de la base : décodage, format, filtre des
+    codes émis, index de statuts, signature, puis réponse en cache (étape
+    "cache")
+    """
+    context = verifier.run(qr_data_str, stages=("decode", "format", "filter", "status"))
+    if not context.done:
+        _check_signature(context, verifier)
+    if not context.done:
+        with context.stage("cache"):
+            _cached_response(context)
+    return context
+
+
+def _should_store(context: VerificationContext) -> bool:
+    # Code introuvable : rien à mettre en cache
+    return context.qr_code is not None
+
+
+def cached_verify(qr_data_str: str, verifier: QRVerifier = None):
+    """
+    Vérifie un payload en s'appuyant sur le cache
+
+    Returns:
+        VerificationContext (result, qr_code_id, qr_code si lu en base,
+        timings)
+    """
+    verifier = verifier or QRVerifier()
+    context = _prepare(qr_data_str, verifier)
+    if not context.done:
+        versions = _status_versions([context])
+        verifier.run(context, stages=("record", "response"))
+        if _storable([context], versions):
+            _store_response(context)
+    return context
+
+
+def cached_verify_code(unique_code: str, verifier: QRVerifier = None):
+    """
+    Vérifie un code seul (URL courte /v/<code>), sans payload ni signature
+
+    Mêmes filtre, index de statuts et cache de réponses que cached_verify.
+
+    Returns:
+        VerificationContext
+    """
+    verifier = verifier or QRVerifier()
+    context = verifier.run(
+        VerificationContext.for_code(unique_code), stages=("filter", "status")
+    )
+    if not context.done:
+        with context.stage("cache"):
+            _cached_response(context)
+    if not context.done:
+        versions = _status_versions([context])
+        verifier.run(context, stages=("record", "response"))
+        if _storable([context], versions):
+            _store_response(context)
+    return context
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Threads de vérification de signature (cryptography libère le GIL)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.QR_VERIFY_BATCH_WORKERS,
+                    thread_name_prefix="qr-verify",
+                )
+    return _executor
+
+
+async def acached_verify(qr_data_str: str, verifier: QRVerifier = None):
+    """
+    cached_verify pour les vues asynchrones
+
+    Signature et accès au cache s'exécutent dans le pool de threads de
+    vérification ; seule la lecture en base passe par l'ORM asynchrone.
+
+    Returns:
+        VerificationContext
+    """
+    verifier = verifier or QRVerifier()
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+
+    context = await loop.run_in_executor(executor, _prepare, qr_data_str, verifier)
+    if not context.done:
+        versions = await loop.run_in_executor(executor, _status_versions, [context])
+        await verifier.arun_record(context)
+        if await loop.run_in_executor(executor, _storable, [context], versions):
+            await loop.run_in_executor(executor, _store_response, context)
+    return context
+
+
+def cached_verify_many(payloads: List[str], verifier: QRVerifier = None):
+    """
+    Vérifie plusieurs payloads : signatures en parallèle, une requête SQL
+
+    Returns:
+        VerificationContext pour chaque payload, dans l'ordre
+    """
+    verifier = verifier or QRVerifier()
+    contexts = list(
+        _get_executor().map(lambda payload: _prepare(payload, verifier), payloads)
+    )
+    pending = [context for context in contexts if not context.done]
+    versions = _status_versions(pending)
+    verifier.load_records(pending)
+    for context in _storable(pending, versions):
+        _store_response(context)
+    return contexts
+
+
+def invalidate_verification_cache(unique_codes):
+    """
+    Supprime les réponses en cache des codes donnés (les deux niveaux)
+
+    La version de statut change d'abord : une vérification qui a lu la base
+    avant le changement ne remet pas sa réponse en cache.
+    """
+    version = uuid.uuid4().hex
+    cache.set_many(
+        {VERSION_PREFIX + code: version for code in unique_codes},
+        settings.QR_VERIFY_CACHE_TTL,
+    )
+    keys = [RESPONSE_PREFIX + code for code in unique_codes]
+    for key in keys:
+        local_cache.delete(key)
+    cache.delete_many(keys)
+
+
+def on_qr_code_status_changed(sender, unique_codes, **kwargs):
+    invalidate_verification_cache(unique_codes)
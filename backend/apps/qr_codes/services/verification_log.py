@@ -0,0 +1,284 @@
+"""
+QR Code verification log (write-behind)
+
+Chaque scan public écrivait une ligne QRVerification et mettait à jour
+QRCode.last_verified_at : deux écritures synchrones par requête, et la
+ligne d'un code très scanné devenait un point de contention.
+
+Les événements sont désormais mis en mémoire puis écrits par un thread
+toutes les QR_VERIFICATION_FLUSH_INTERVAL secondes : un bulk_create pour
+l'historique, une seule mise à jour de last_verified_at et
+verification_count par code. Le tampon
+est borné (les plus anciens événements sont abandonnés si la base ne suit
+plus) et vidé à l'arrêt du processus.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Case, DateTimeField, F, IntegerField, Value, When
+from django.utils import timezone
+
+from ..models import QRCode, QRVerification
+from .counters import count_verifications
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+
+
+class VerificationBuffer:
+    """
+    Tampon des vérifications d'un processus
+
+    Args:
+        flush_interval: secondes entre deux écritures du thread
+        flush_size: nombre d'événements qui déclenche une écriture anticipée
+        max_size: au-delà, les événements les plus anciens sont abandonnés
+    """
+
+    def __init__(self, flush_interval: float, flush_size: int, max_size: int):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_size = max_size
+        self.pid = os.getpid()
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._verifications = []
+        self._last_verified = {}
+
+    def add(self, qr_code_id, is_valid, ip_address=None, user_agent=""):
+        """Enregistre une vérification, sans requête SQL"""
+        verification = QRVerification(
+            qr_code_id=qr_code_id,
+            is_valid=is_valid,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            verified_at=timezone.now(),
+        )
+        with self._lock:
+            self._verifications.append(verification)
+            self._last_verified[qr_code_id] = verification.verified_at
+            overflow = len(self._verifications) - self.max_size
+            if overflow > 0:
+                del self._verifications[:overflow]
+                self.dropped += overflow
+            pending = len(self._verifications)
+        if pending >= self.flush_size:
+            self._wakeup.set()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._verifications)
+
+    def flush(self) -> int:
+        """
+        Écrit les événements en attente
+
+        Returns:
+            Nombre de vérifications écrites
+        """
+        if self.pid != os.getpid():
+            # Tampon hérité d'un fork : ces événements sont écrits par le parent
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                verifications, self._verifications = self._verifications, []
+                last_verified, self._last_verified = self._last_verified, {}
+            if not verifications:
+                return 0
+
+            try:
+                with transaction.atomic():
+                    # Codes supprimés depuis le scan : leurs événements sont perdus
+                    existing = _owners(last_verified)
+                    verifications = [
+                        v for v in verifications if v.qr_code_id in existing
+                    ]
+                    QRVerification.objects.bulk_create(
+                        verifications, batch_size=FLUSH_BATCH_SIZE
+                    )
+                    count_verifications(existing[v.qr_code_id] for v in verifications)
+                    _touch_last_verified(
+                        {pk: at for pk, at in last_verified.items() if pk in existing},
+                        Counter(v.qr_code_id for v in verifications),
+                    )
+            except DatabaseError:
+                logger.exception(
+                    "Échec d'écriture de %d vérifications", len(verifications)
+                )
+                self._requeue(verifications, last_verified)
+                return 0
+            return len(verifications)
+
+    def _requeue(self, verifications, last_verified):
+        """Remet en tête du tampon un lot non écrit, dans la limite de max_size"""
+        with self._lock:
+            for pk, at in last_verified.items():
+                if self._last_verified.get(pk) is None or self._last_verified[pk] < at:
+                    self._last_verified[pk] = at
+            self._verifications[:0] = verifications
+            overflow = len(self._verifications) - self.max_size
+            if overflow > 0:
+                del self._verifications[:overflow]
+                self.dropped += overflow
+
+    def start(self):
+        """Démarre le thread d'écriture (une fois par processus)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="qr-verification-log", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self):
+        """Arrête le thread et écrit ce qui reste"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Échec du thread d'écriture des vérifications")
+
+
+def _owners(qr_code_ids):
+    """{id du QRCode: (user_id, company_id)} des codes encore en base"""
+    return {
+        pk: (user_id, company_id)
+        for pk, user_id, company_id in QRCode.objects.filter(
+            pk__in=list(qr_code_ids)
+        ).values_list("pk", "user_id", "company_id")
+    }
+
+
+def _touch_last_verified(last_verified, counts):
+    """
+    last_verified_at et verification_count de plusieurs codes, en une
+    requête par tranche
+
+    Args:
+        counts: nombre de vérifications écrites par code
+    """
+    items = list(last_verified.items())
+    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+        chunk = items[start : start + FLUSH_BATCH_SIZE]
+        QRCode.objects.filter(pk__in=[pk for pk, _ in chunk]).update(
+            last_verified_at=Case(
+                *[When(pk=pk, then=Value(at)) for pk, at in chunk],
+                output_field=DateTimeField(),
+            ),
+            verification_count=F("verification_count")
+            + Case(
+                *[When(pk=pk, then=Value(counts[pk])) for pk, _ in chunk],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        )
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_verification_buffer():
+    """Tampon du processus, ou None si QR_VERIFICATION_FLUSH_INTERVAL vaut 0"""
+    global _buffer
+    if not settings.QR_VERIFICATION_FLUSH_INTERVAL:
+        return None
+    # Tampon (et thread) hérité d'un fork : on repart d'un tampon vide
+    if _buffer is None or _buffer.pid != os.getpid():
+        with _buffer_lock:
+            if _buffer is None or _buffer.pid != os.getpid():
+                _buffer = VerificationBuffer(
+                    flush_interval=settings.QR_VERIFICATION_FLUSH_INTERVAL,
+                    flush_size=settings.QR_VERIFICATION_FLUSH_SIZE,
+                    max_size=settings.QR_VERIFICATION_BUFFER_MAX,
+                )
+                _buffer.start()
+                atexit.register(_buffer.stop)
+    return _buffer
+
+
+def record_verification(qr_code_id, is_valid, ip_address=None, user_agent=""):
+    """Journalise une vérification, en différé si le tampon est actif"""
+    record_verifications([(qr_code_id, is_valid)], ip_address, user_agent)
+
+
+def record_verifications(verifications, ip_address=None, user_agent=""):
+    """
+    Journalise plusieurs vérifications d'une même requête
+
+    Args:
+        verifications: couples (id du QRCode, valide)
+    """
+    buffer = get_verification_buffer()
+    if buffer is not None:
+        for qr_code_id, is_valid in verifications:
+            buffer.add(qr_code_id, is_valid, ip_address, user_agent)
+        return
+
+    now = timezone.now()
+    QRVerification.objects.bulk_create(
+        [
+            QRVerification(
+                qr_code_id=qr_code_id,
+                is_valid=is_valid,
+                ip_address=ip_address,
+                user_agent=user_agent,
+                verified_at=now,
+            )
+            for qr_code_id, is_valid in verifications
+        ],
+        batch_size=FLUSH_BATCH_SIZE,
+    )
+    owners = _owners({qr_code_id for qr_code_id, _ in verifications})
+    count_verifications(
+        owners[qr_code_id] for qr_code_id, _ in verifications if qr_code_id in owners
+    )
+    _touch_last_verified(
+        {qr_code_id: now for qr_code_id, _ in verifications},
+        Counter(qr_code_id for qr_code_id, _ in verifications),
+    )
+
+
+# Tâches de journalisation en cours, référencées jusqu'à leur fin
+_background_tasks = set()
+
+
+def record_verification_soon(qr_code_id, is_valid, ip_address=None, user_agent=""):
+    """
+    record_verification depuis une vue asynchrone, sans attendre l'écriture
+
+    Avec le tampon actif, l'ajout se fait sur place (aucune E/S).
+    """
+    buffer = get_verification_buffer()
+    if buffer is not None:
+        buffer.add(qr_code_id, is_valid, ip_address, user_agent)
+        return
+
+    task = asyncio.get_running_loop().create_task(
+        sync_to_async(record_verification)(qr_code_id, is_valid, ip_address, user_agent)
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
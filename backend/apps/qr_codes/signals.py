@@ -0,0 +1,9 @@
+"""
+QR Code signals
+"""
+
+from django.dispatch import Signal
+
+# Envoyé après tout changement de statut (révocation, suspension,
+# expiration), avec unique_codes : liste des codes concernés
+qr_code_status_changed = Signal()
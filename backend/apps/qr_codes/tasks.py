@@ -1,7 +1,19 @@
+import csv
+import io
+import logging
+import tempfile
+import zipfile
+
 from celery import shared_task
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 from django.core.mail import send_mail
-from .models import QRCode
+from .models import QRCode, QRIssuanceJob
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
@@ -29,13 +41,47 @@ def check_expiring_qr_codes():
 @shared_task
 def mark_expired_qr_codes():
     """Marque les QR codes expirés"""
-    expired = QRCode.objects.filter(
-        status=QRCode.Status.ACTIVE, expires_at__lt=timezone.now()
-    ).update(status=QRCode.Status.EXPIRED)
+    from .services.status import change_qr_status
+
+    expired = change_qr_status(
+        QRCode.objects.filter(
+            status=QRCode.Status.ACTIVE, expires_at__lt=timezone.now()
+        ),
+        QRCode.Status.EXPIRED,
+    )
 
     return f"{expired} QR codes marqués comme expirés"
 
 
+@shared_task
+def rebuild_status_index(full=False):
+    """Reconstruit l'index de statuts partagé (toutes les 15 s via beat)"""
+    from .services.status_index import build_status_index
+
+    count = build_status_index(full=full)
+
+    return f"{count} QR codes dans l'index de statuts"
+
+
+@shared_task
+def rebuild_qr_counters():
+    """Recalcule les compteurs par utilisateur et entreprise (toutes les heures)"""
+    from .services.counters import rebuild_counters
+
+    count = rebuild_counters()
+    return f"{count} compteurs recalculés"
+
+
+@shared_task
+def rebuild_code_filter(full=False):
+    """Met à jour le filtre des codes émis (toutes les minutes via beat)"""
+    from .services.code_filter import build_code_filter
+
+    count = build_code_filter(full=full)
+
+    return f"{count} QR codes dans le filtre des codes émis"
+
+
 @shared_task
 def generate_daily_report():
     """Génère un rapport quotidien"""
@@ -87,3 +133,181 @@ def backup_database():
     )
 
     return f"Backup créé: {backup_file}"
+
+
+@shared_task
+def run_qr_issuance_job(job_id):
+    """Découpe un job d'émission en tranches traitées en parallèle"""
+    job = QRIssuanceJob.objects.get(pk=job_id)
+    if job.status != QRIssuanceJob.Status.PENDING:
+        return f"Job {job_id} déjà lancé"
+
+    job.status = QRIssuanceJob.Status.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "started_at"])
+
+    # Une tranche par worker concurrent, arrondie au chunk supérieur
+    chunk_size = settings.QR_ISSUANCE_CHUNK_SIZE
+    concurrency = max(1, settings.QR_ISSUANCE_CONCURRENCY)
+    chunks = -(-job.total // chunk_size)
+    slice_size = -(-chunks // concurrency) * chunk_size
+
+    for start in range(0, job.total, slice_size):
+        issue_qr_issuance_slice.delay(str(job.id), min(slice_size, job.total - start))
+
+    return f"Job {job_id} lancé"
+
+
+@shared_task
+def issue_qr_issuance_slice(job_id, count):
+    """
+    Émet `count` QR codes d'un job, par chunks de QR_ISSUANCE_CHUNK_SIZE
+
+    Une erreur hors chunk compte le reste de la tranche en échec, pour que
+    le job soit tout de même clôturé ; une tranche dont le worker meurt est
+    rattrapée par fail_stale_issuance_jobs.
+    """
+    from .services.issuance import issue_qr_codes
+
+    reported = 0
+    try:
+        job = QRIssuanceJob.objects.select_related("user", "company").get(pk=job_id)
+        chunk_size = settings.QR_ISSUANCE_CHUNK_SIZE
+        item = {"company": job.company, "expires_days": job.expires_days}
+
+        for start in range(0, count, chunk_size):
+            size = min(chunk_size, count - start)
+            try:
+                issue_qr_codes(
+                    user=job.user,
+                    items=[dict(item) for _ in range(size)],
+                    ip_address=job.ip_address,
+                    user_agent=job.user_agent,
+                    issuance_job=job,
+                )
+            except Exception as e:
+                logger.exception("Échec d'un chunk du job %s", job_id)
+                _record_issuance_failure(job_id, size, str(e))
+            else:
+                # Une seule écriture de progression par chunk
+                QRIssuanceJob.objects.filter(pk=job_id).update(done=F("done") + size)
+            reported += size
+    except Exception as e:
+        logger.exception("Échec d'une tranche du job %s", job_id)
+        _record_issuance_failure(job_id, count - reported, str(e))
+
+    _finalize_issuance_job(job_id)
+
+
+@shared_task
+def fail_stale_issuance_jobs():
+    """
+    Clôt en échec les jobs RUNNING depuis plus de QR_ISSUANCE_JOB_TIMEOUT
+
+    Une tranche dont le worker est mort ne rend jamais compte : sans ce
+    rattrapage, son job resterait RUNNING. Les codes non comptés passent en
+    échec. 0 : désactivé.
+    """
+    from datetime import timedelta
+
+    timeout = settings.QR_ISSUANCE_JOB_TIMEOUT
+    if not timeout:
+        return "Rattrapage désactivé"
+
+    stale = QRIssuanceJob.objects.filter(
+        status=QRIssuanceJob.Status.RUNNING,
+        started_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).values_list("pk", flat=True)
+    failed = 0
+    for job_id in stale:
+        with transaction.atomic():
+            job = QRIssuanceJob.objects.select_for_update().get(pk=job_id)
+            if job.status != QRIssuanceJob.Status.RUNNING:
+                continue
+            job.failed = job.total - job.done
+            job.errors.append(
+                {"count": job.failed, "error": "timeout: tranches sans réponse"}
+            )
+            job.status = QRIssuanceJob.Status.FAILED
+            job.finished_at = timezone.now()
+            job.save(update_fields=["failed", "errors", "status", "finished_at"])
+        failed += 1
+
+    return f"{failed} jobs d'émission clos en échec"
+
+
+def _record_issuance_failure(job_id, count, error):
+    with transaction.atomic():
+        job = QRIssuanceJob.objects.select_for_update().get(pk=job_id)
+        job.failed += count
+        if len(job.errors) < settings.QR_ISSUANCE_MAX_ERRORS:
+            job.errors.append({"count": count, "error": error})
+        job.save(update_fields=["failed", "errors"])
+
+
+def _finalize_issuance_job(job_id):
+    """
+    Clôture le job quand toutes les tranches ont rendu compte
+
+    Sous verrou, la dernière tranche ne fait que réclamer le job
+    (FINALIZING). L'archive est écrite ensuite, hors transaction, dans un
+    fichier temporaire puis dans le stockage ; une seconde transaction
+    courte publie result_file.
+    """
+    with transaction.atomic():
+        job = QRIssuanceJob.objects.select_for_update().get(pk=job_id)
+        if job.status != QRIssuanceJob.Status.RUNNING:
+            return
+        if job.done + job.failed < job.total:
+            return
+
+        if job.done:
+            job.status = QRIssuanceJob.Status.FINALIZING
+            job.save(update_fields=["status"])
+        else:
+            job.status = QRIssuanceJob.Status.FAILED
+            job.finished_at = timezone.now()
+            job.save(update_fields=["status", "finished_at"])
+            return
+
+    try:
+        with tempfile.TemporaryFile() as archive:
+            _build_job_archive(job, archive)
+            archive.seek(0)
+            job.result_file.save(f"{job.id}.zip", File(archive), save=False)
+    except Exception as e:
+        logger.exception("Échec de l'archive du job %s", job_id)
+        job.status = QRIssuanceJob.Status.FAILED
+        job.errors.append({"count": 0, "error": f"archive: {e}"})
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "errors", "finished_at"])
+        return
+
+    with transaction.atomic():
+        job.status = QRIssuanceJob.Status.COMPLETED
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "finished_at", "result_file"])
+
+
+def _build_job_archive(job, fileobj):
+    """
+    Archive ZIP (manifest.csv + images PNG des codes émis) écrite dans fileobj
+
+    Les images sont rendues en mémoire : l'archive ne laisse pas de rendu
+    stocké par code.
+    """
+    from .services.renditions import Rendition
+
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(["id", "unique_code", "expires_at", "image"])
+
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as archive:
+        qr_codes = job.qr_codes.select_related("batch").order_by("created_at")
+        for qr in qr_codes.iterator():
+            image_name = f"images/{qr.unique_code}.png"
+            archive.writestr(image_name, Rendition(qr).render())
+            writer.writerow(
+                [qr.id, qr.unique_code, qr.expires_at.isoformat(), image_name]
+            )
+        archive.writestr("manifest.csv", manifest.getvalue())
@@ -0,0 +1,53 @@
+from rest_framework.test import APIClient, APITestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from apps.qr_codes.models import QRCode
+from apps.qr_codes.services.renditions import Rendition
+from apps.qr_codes.services.verification_cache import local_cache
+
+User = get_user_model()
+
+
+class QRCodeTestMixin:
+    """
+    Socle commun des tests de QR codes
+
+    Vide les caches de vérification, crée self.user et, si issue_code est
+    vrai, émet un QR code par l'API (self.qr_code) avec le payload imprimé
+    correspondant (self.payload). Les préparatifs propres à un test
+    (réglages, index) se font avant l'appel à super().setUp().
+    """
+
+    username = "porteur"
+    issue_code = True
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(
+            username=self.username,
+            email=f"{self.username}@example.com",
+            password="testpass123",
+            first_name="Awa",
+            last_name="Koné",
+        )
+        if self.issue_code:
+            self.qr_code = self.issue_qr_code()
+            self.payload = Rendition(self.qr_code).payload()
+
+    def issue_qr_code(self, **data):
+        """Émet un QR code par l'API au nom de self.user, puis valide la transaction"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post("/api/qr-codes/", data, format="json")
+        return QRCode.objects.get(pk=response.data["id"])
+
+
+class QRCodeAPITestCase(QRCodeTestMixin, APITestCase):
+    """QRCodeTestMixin avec self.client authentifié en self.user"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.user)
@@ -0,0 +1,201 @@
+from unittest import mock
+
+from rest_framework import status
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from apps.qr_codes.services.admission import (
+    get_admission_controller,
+    rate_limiter,
+    reset_admission_controller,
+)
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+from core.crypto.payload import decode_qr_payload, encode_qr_payload
+from core.utils.network import get_client_ip
+from core.utils.ratelimit import Bucket, RateLimiter
+
+URL = "/api/qr-codes/verify/verify/"
+
+
+class RateLimiterTestCase(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_burst_then_refill(self):
+        """Le seau accepte une rafale puis refuse jusqu'au remplissage"""
+        limiter = RateLimiter(prefix="test:")
+        bucket = Bucket("ip:1", rate=1000, burst=3)
+
+        decisions = [limiter.consume([bucket])[0] for _ in range(4)]
+
+        self.assertEqual([d.allowed for d in decisions], [True, True, True, False])
+        self.assertGreater(decisions[0].headroom, decisions[2].headroom)
+        self.assertLessEqual(decisions[3].retry_after, 0.001)
+
+    def test_refused_request_does_not_drain_other_buckets(self):
+        """Une requête refusée ne consomme aucun des autres seaux"""
+        limiter = RateLimiter(prefix="test:")
+        ip = Bucket("ip:1", rate=1, burst=2)
+        code = Bucket("code:A", rate=1, burst=1)
+
+        limiter.consume([ip, code])
+        self.assertFalse(limiter.consume([ip, code])[1].allowed)
+
+        self.assertTrue(limiter.consume([ip])[0].allowed)
+        self.assertFalse(limiter.consume([ip])[0].allowed)
+
+    def test_local_fallback_when_cache_fails(self):
+        """Sans cache partagé, la limite est tenue localement"""
+        limiter = RateLimiter(prefix="test:")
+        bucket = Bucket("ip:1", rate=1, burst=1)
+
+        with mock.patch(
+            "core.utils.ratelimit.cache.get_many", side_effect=ConnectionError
+        ):
+            self.assertTrue(limiter.consume([bucket])[0].allowed)
+            self.assertFalse(limiter.consume([bucket])[0].allowed)
+
+        self.assertEqual(limiter.stats()["fallback"], 2)
+
+
+class VerifyAdmissionTestCase(QRCodeAPITestCase):
+
+    username = "admission"
+
+    def setUp(self):
+        reset_admission_controller()
+        self.addCleanup(reset_admission_controller)
+        rate_limiter.counters.clear()
+        super().setUp()
+        self.client.force_authenticate(user=None)
+
+    def _verify(self, ip="10.0.0.1", payload=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                URL,
+                {"qr_data": payload or self.payload},
+                format="json",
+                REMOTE_ADDR=ip,
+            )
+
+    @override_settings(QR_VERIFY_IP_BURST=2)
+    def test_ip_rate_limit(self):
+        """Au-delà de la rafale, une même IP reçoit 429 avec Retry-After"""
+        self.assertEqual(self._verify().status_code, status.HTTP_200_OK)
+        self.assertEqual(self._verify().status_code, status.HTTP_200_OK)
+
+        response = self._verify()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+
+        # Autre client : non concerné
+        self.assertEqual(self._verify(ip="10.0.0.2").status_code, status.HTTP_200_OK)
+        self.assertEqual(rate_limiter.stats()["ip_limited"], 1)
+
+    @override_settings(QR_VERIFY_CODE_BURST=1)
+    def test_code_rate_limit(self):
+        """Un même code vérifié depuis plusieurs IP est limité"""
+        self.assertEqual(self._verify(ip="10.0.0.1").status_code, status.HTTP_200_OK)
+
+        response = self._verify(ip="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(rate_limiter.stats()["code_limited"], 1)
+
+    @override_settings(QR_VERIFY_CODE_BURST=1)
+    def test_forged_payloads_do_not_drain_code_bucket(self):
+        """Un payload forgé portant le code d'un autre ne débite pas son seau"""
+        qr_data = decode_qr_payload(self.payload)
+        forged = encode_qr_payload({**qr_data, "sig": qr_data["data"]}, "v2")
+
+        for _ in range(3):
+            response = self._verify(ip="10.0.0.2", payload=forged)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertFalse(response.data["valid"])
+
+        self.assertEqual(self._verify().status_code, status.HTTP_200_OK)
+        self.assertNotIn("code_limited", rate_limiter.stats())
+
+    @override_settings(QR_VERIFY_MAX_IN_FLIGHT=1)
+    def test_shed_when_too_many_in_flight(self):
+        """Trop de vérifications en cours : 503 plutôt qu'une file d'attente"""
+        controller = get_admission_controller()
+        controller.in_flight = 1
+
+        response = self._verify()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(controller.stats()["counters"]["shed_queue"], 1)
+
+    @override_settings(QR_VERIFY_IP_BURST=10)
+    def test_occasional_clients_kept_under_latency_pressure(self):
+        """Sous surcharge, le client qui enchaîne les scans est délesté d'abord"""
+        controller = get_admission_controller()
+
+        for _ in range(6):
+            self.assertEqual(self._verify(ip="10.0.0.1").status_code, 200)
+
+        controller.latency = 1.0
+        with mock.patch("core.utils.ratelimit.random.random", return_value=0.5):
+            flood = self._verify(ip="10.0.0.1")
+            occasional = self._verify(ip="10.0.0.2")
+
+        self.assertEqual(flood.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(occasional.status_code, status.HTTP_200_OK)
+        self.assertEqual(controller.stats()["counters"]["shed_latency"], 1)
+        self.assertEqual(controller.in_flight, 0)
+
+    def test_counters_exposed(self):
+        """Les compteurs d'admission sont exposés dans les métriques"""
+        self._verify()
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get("/api/qr-codes/verify/metrics/")
+
+        self.assertEqual(response.data["rate_limits"]["allowed"], 1)
+        self.assertEqual(response.data["admission"]["counters"]["admitted"], 1)
+
+    @override_settings(QR_VERIFY_IP_BURST=1)
+    async def test_async_ip_rate_limit(self):
+        """La vérification asynchrone applique la même limite par IP"""
+        responses = [
+            await self.async_client.post(
+                "/api/qr-codes/verify/async/",
+                {"qr_data": "not a payload"},
+                content_type="application/json",
+            )
+            for _ in range(2)
+        ]
+
+        self.assertEqual(responses[0].status_code, status.HTTP_200_OK)
+        self.assertEqual(responses[1].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", responses[1].headers)
+
+
+class ClientIPTestCase(SimpleTestCase):
+
+    def _ip(self, forwarded=None):
+        meta = {"REMOTE_ADDR": "10.0.0.9"}
+        if forwarded is not None:
+            meta["HTTP_X_FORWARDED_FOR"] = forwarded
+        return get_client_ip(RequestFactory().get("/", **meta))
+
+    def test_forwarded_for_ignored_without_trusted_proxy(self):
+        """Sans proxy de confiance, X-Forwarded-For est fourni par le client"""
+        self.assertEqual(self._ip("1.2.3.4"), "10.0.0.9")
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_rightmost_value_added_by_trusted_proxy(self):
+        """Une valeur forgée à gauche ne change pas l'adresse retenue"""
+        self.assertEqual(self._ip("1.2.3.4, 203.0.113.7"), "203.0.113.7")
+        self.assertEqual(self._ip("203.0.113.7"), "203.0.113.7")
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_proxy_count_from_the_right(self):
+        """Derrière deux proxys, le client est l'avant-dernière valeur"""
+        self.assertEqual(self._ip("1.2.3.4, 203.0.113.7, 172.16.0.1"), "203.0.113.7")
+        # En-tête trop court ou invalide : adresse de la connexion
+        self.assertEqual(self._ip("203.0.113.7"), "10.0.0.9")
+        self.assertEqual(self._ip("x, 172.16.0.1"), "10.0.0.9")
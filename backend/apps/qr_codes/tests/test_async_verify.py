@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.test import TestCase
+from apps.qr_codes.models import QRCode
+from apps.qr_codes.services.verification_log import VerificationBuffer
+from apps.qr_codes.tests.base import QRCodeTestMixin
+
+URL = "/api/qr-codes/verify/async/"
+
+
+class AsyncVerifyTestCase(QRCodeTestMixin, TestCase):
+
+    username = "asgi"
+
+    def setUp(self):
+        super().setUp()
+        self.buffer = VerificationBuffer(
+            flush_interval=60, flush_size=100, max_size=100
+        )
+        patcher = mock.patch(
+            "apps.qr_codes.services.verification_log.get_verification_buffer",
+            return_value=self.buffer,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _verify(self, qr_data):
+        return await self.async_client.post(
+            URL, {"qr_data": qr_data}, content_type="application/json"
+        )
+
+    async def test_same_response_as_sync_endpoint(self):
+        """La réponse est celle du point d'entrée synchrone"""
+        response = await self._verify(self.payload)
+        sync_response = await self.async_client.post(
+            "/api/qr-codes/verify/verify/",
+            {"qr_data": self.payload},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["valid"])
+        self.assertEqual(response.json()["data"]["holder"], "Awa Koné")
+        self.assertEqual(response.json(), sync_response.json())
+        # Journalisation différée : rien n'est écrit pendant la requête
+        self.assertEqual(len(self.buffer), 2)
+
+    async def test_revoked(self):
+        """Un code révoqué est refusé"""
+        await QRCode.objects.filter(pk=self.qr_code.pk).aupdate(
+            status=QRCode.Status.REVOKED
+        )
+
+        response = await self._verify(self.payload)
+
+        self.assertFalse(response.json()["valid"])
+        self.assertEqual(response.json()["error"], "QR code is revoked")
+
+    async def test_unknown_code(self):
+        """Un code supprimé est introuvable et n'est pas journalisé"""
+        await QRCode.objects.filter(pk=self.qr_code.pk).adelete()
+
+        response = await self._verify(self.payload)
+
+        self.assertEqual(response.json()["error"], "QR code not found")
+        self.assertEqual(len(self.buffer), 0)
+
+    async def test_invalid_requests(self):
+        """Corps invalide : 400 ; méthode GET : 405"""
+        response = await self.async_client.post(
+            URL, "not json", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((await self._verify("")).status_code, 400)
+        self.assertEqual((await self.async_client.get(URL)).status_code, 405)
+        self.assertFalse((await self._verify("garbage")).json()["valid"])
@@ -0,0 +1,53 @@
+from rest_framework import status
+from django.test import override_settings
+from apps.audit.models import AuditLog
+from apps.companies.models import Company
+from apps.qr_codes.models import QRCode
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+
+
+class QRCodeBulkAPITestCase(QRCodeAPITestCase):
+
+    username = "bulk"
+    issue_code = False
+
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(name="Ministère", sector="Public")
+
+    @override_settings(QR_BULK_BATCH_SIZE=2)
+    def test_bulk_create_by_count(self):
+        """Un lot est émis en un appel, avec un log d'audit par code"""
+        response = self.client.post(
+            "/api/qr-codes/bulk/",
+            {"count": 3, "company": str(self.company.id)},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(QRCode.objects.filter(company=self.company).count(), 3)
+        self.assertEqual(
+            AuditLog.objects.filter(user=self.user, action="QR_GENERATED").count(), 3
+        )
+
+    def test_bulk_create_with_items(self):
+        """Chaque élément peut préciser son entreprise et son expiration"""
+        response = self.client.post(
+            "/api/qr-codes/bulk/",
+            {"items": [{"company": str(self.company.id)}, {"expires_days": 30}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        first, second = response.data["results"]
+        self.assertEqual(first["company"], self.company.id)
+        self.assertIsNone(second["company"])
+
+    @override_settings(QR_BULK_MAX_COUNT=2)
+    def test_bulk_create_limit(self):
+        """Les lots au-delà de QR_BULK_MAX_COUNT sont refusés"""
+        response = self.client.post("/api/qr-codes/bulk/", {"count": 3}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(QRCode.objects.exists())
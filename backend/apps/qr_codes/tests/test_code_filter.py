@@ -0,0 +1,149 @@
+import base64
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from apps.qr_codes.models import QRCode
+from apps.qr_codes.services.code_filter import (
+    ISSUED_AT_KEY,
+    build_code_filter,
+    get_code_filter,
+    reset_code_filter,
+)
+from apps.qr_codes.services.renditions import Rendition
+from apps.qr_codes.services.verification_cache import cached_verify
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+from core.crypto.qr_generator import QRVerifier
+from core.utils.bloom import BloomFilter
+
+
+class BloomFilterTestCase(SimpleTestCase):
+
+    def test_no_false_negatives_and_bounded_error(self):
+        """Aucun faux négatif, faux positifs au taux prévu"""
+        bloom = BloomFilter.for_capacity(10000, 0.01)
+        for i in range(10000):
+            bloom.add(f"ST-CI-2026-{i:08X}")
+
+        self.assertTrue(all(f"ST-CI-2026-{i:08X}" in bloom for i in range(10000)))
+        false_positives = sum(f"ST-CI-2027-{i:08X}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 200)
+        self.assertAlmostEqual(bloom.false_positive_rate(10000), 0.01, delta=0.002)
+
+
+class CodeFilterTestCase(QRCodeAPITestCase):
+
+    username = "filtre"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "qr_codes.bloom")
+        settings_override = override_settings(QR_CODE_FILTER_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(reset_code_filter)
+        reset_code_filter()
+        super().setUp()
+
+    def _create(self, unique_code):
+        return QRCode.objects.create(
+            unique_code=unique_code,
+            user=self.user,
+            encrypted_data="x",
+            signature="x",
+            expires_at=timezone.now() + timedelta(days=30),
+        )
+
+    def _rebuild(self, **kwargs):
+        count = build_code_filter(**kwargs)
+        reset_code_filter()
+        return count
+
+    def _forged(self, unique_code):
+        qr_data = {"id": unique_code, "data": "eA==", "sig": "eA=="}
+        return base64.b64encode(json.dumps(qr_data).encode()).decode()
+
+    def test_unknown_code_rejected_before_signature(self):
+        """Un code absent du filtre est refusé sans requête ni signature"""
+        self.assertEqual(self._rebuild(), 1)
+
+        with mock.patch.object(QRVerifier, "_verify_message") as verify_message:
+            with self.assertNumQueries(0):
+                context = cached_verify(self._forged("ST-CI-2026-DEADBEEF"))
+
+        self.assertEqual(context.result["error"], "Unknown code")
+        self.assertNotIn("signature", context.timings)
+        verify_message.assert_not_called()
+        self.assertEqual(get_code_filter().counters["absent"], 1)
+
+    @override_settings(QR_CODE_FILTER_OVERLAP=0)
+    def test_absent_code_without_cache_lookup(self):
+        """Sans émission depuis la construction, l'heure d'émission est lue une fois"""
+        self._rebuild()
+
+        with mock.patch.object(cache, "get", wraps=cache.get) as cache_get:
+            for _ in range(3):
+                self.assertFalse(get_code_filter().might_exist("ST-CI-2026-DEADBEEF"))
+
+        cache_get.assert_called_once_with(ISSUED_AT_KEY)
+        self.assertEqual(get_code_filter().counters["absent"], 3)
+
+    def test_issued_code_verified(self):
+        """Un code présent dans le filtre est vérifié normalement"""
+        self._rebuild()
+
+        context = cached_verify(self.payload)
+
+        self.assertTrue(context.result["valid"])
+        self.assertEqual(get_code_filter().counters["present"], 1)
+
+    def test_code_issued_after_build_verified(self):
+        """Un code émis après la construction du filtre reste vérifiable"""
+        self._rebuild()
+        qr_code = self.issue_qr_code()
+
+        context = cached_verify(Rendition(qr_code).payload())
+
+        self.assertTrue(context.result["valid"])
+        self.assertEqual(get_code_filter().counters["recent"], 1)
+
+    @override_settings(QR_CODE_FILTER_MAX_AGE=0)
+    def test_old_filter_not_consulted(self):
+        """Un filtre trop ancien est ignoré"""
+        self._rebuild()
+
+        context = cached_verify(self._forged("ST-CI-2026-DEADBEEF"))
+
+        self.assertIn("signature", context.timings)
+        self.assertEqual(get_code_filter().counters["unavailable"], 1)
+        self.assertFalse(get_code_filter().stats()["available"])
+
+    def test_incremental_update(self):
+        """La reconstruction ajoute les nouveaux codes au filtre existant"""
+        self._rebuild()
+        self._create("ST-CI-2026-00000002")
+
+        self.assertEqual(self._rebuild(), 2)
+        self.assertTrue(get_code_filter().might_exist("ST-CI-2026-00000002"))
+
+        stats = get_code_filter().stats()
+        self.assertEqual(stats["count"], 2)
+        self.assertLess(stats["false_positive_rate"], 0.001)
+
+    @override_settings(QR_CODE_FILTER_MIN_CAPACITY=2)
+    def test_full_rebuild_when_capacity_reached(self):
+        """Capacité atteinte : le filtre est reconstruit plus grand"""
+        self._rebuild()
+        self.assertEqual(get_code_filter().stats()["capacity"], 2)
+
+        self._create("ST-CI-2026-00000002")
+        self._create("ST-CI-2026-00000003")
+
+        self.assertEqual(self._rebuild(), 3)
+        self.assertEqual(get_code_filter().stats()["capacity"], 6)
@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from rest_framework import status
+from django.utils import timezone
+from apps.companies.models import Company, CompanyMember
+from apps.qr_codes.models import QRCode, QRCodeCounter
+from apps.qr_codes.services.counters import count_by_status, rebuild_counters
+from apps.qr_codes.services.issuance import issue_qr_codes
+from apps.qr_codes.services.renditions import Rendition
+from apps.qr_codes.tasks import mark_expired_qr_codes
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+
+URL = "/api/qr-codes/statistics/"
+
+
+class QRCodeCounterTestCase(QRCodeAPITestCase):
+
+    username = "compteurs"
+    issue_code = False
+
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(name="Stamp Tech")
+        CompanyMember.objects.create(company=self.company, user=self.user)
+
+    def _issue(self, count, **item):
+        with self.captureOnCommitCallbacks(execute=True):
+            return issue_qr_codes(self.user, [item] * count, ip_address="127.0.0.1")
+
+    def _stats(self, **params):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_missing_row_computed_in_one_aggregate(self):
+        """Sans ligne de compteurs, une seule agrégation la crée"""
+        self._issue(3)
+
+        with self.assertNumQueries(1):
+            counts = count_by_status(QRCode.objects.filter(user=self.user))
+        self.assertEqual(counts["total"], 3)
+        self.assertEqual(counts["active"], 3)
+
+        self.assertEqual(self._stats()["total"], 3)
+        self.assertTrue(QRCodeCounter.objects.filter(user=self.user).exists())
+
+    def test_maintained_on_issue_revoke_and_expire(self):
+        """Émission, révocation et expiration tiennent les compteurs à jour"""
+        self._stats()
+        qr_codes = self._issue(3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/qr-codes/{qr_codes[0].id}/revoke/")
+        QRCode.objects.filter(pk=qr_codes[1].pk).update(
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_expired_qr_codes()
+
+        with self.assertNumQueries(1):
+            stats = self._stats()
+        self.assertEqual(
+            (stats["total"], stats["active"], stats["revoked"], stats["expired"]),
+            (3, 1, 1, 1),
+        )
+
+    def test_status_not_writable_through_api(self):
+        """Un PATCH ne contourne pas change_qr_status"""
+        (qr_code,) = self._issue(1)
+
+        response = self.client.patch(
+            f"/api/qr-codes/{qr_code.id}/",
+            {"status": QRCode.Status.REVOKED},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], QRCode.Status.ACTIVE)
+        self.assertEqual(self._stats()["active"], 1)
+
+    def test_verifications_today(self):
+        """Les vérifications du jour sont comptées puis remises à zéro"""
+        self._stats()
+        (qr_code,) = self._issue(1)
+        payload = Rendition(qr_code).payload()
+
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    "/api/qr-codes/verify/verify/", {"qr_data": payload}, format="json"
+                )
+        self.assertEqual(self._stats()["verifications_today"], 2)
+
+        # Le lendemain, le compteur repart de zéro
+        yesterday = timezone.localdate() - timedelta(days=1)
+        QRCodeCounter.objects.update(verification_day=yesterday)
+        self.assertEqual(self._stats()["verifications_today"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/qr-codes/verify/verify/", {"qr_data": payload}, format="json"
+            )
+        self.assertEqual(self._stats()["verifications_today"], 1)
+
+    def test_company_counters(self):
+        """Les compteurs d'une entreprise sont réservés à ses membres"""
+        self._stats(company=self.company.pk)
+        self._issue(2, company=self.company)
+        self._issue(1)
+
+        self.assertEqual(self._stats(company=self.company.pk)["total"], 2)
+        self.assertEqual(self._stats()["total"], 3)
+
+        other = Company.objects.create(name="Autre")
+        response = self.client.get(URL, {"company": other.pk})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(URL, {"company": "acme"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_corrects_drift(self):
+        """Le recalcul périodique corrige un compteur faux"""
+        self._stats()
+        self._issue(2)
+        QRCodeCounter.objects.update(total=40, active=40)
+
+        self.assertEqual(rebuild_counters(), 1)
+
+        self.assertEqual(self._stats()["active"], 2)
@@ -0,0 +1,183 @@
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from rest_framework import status
+from django.conf import settings
+from django.db import DatabaseError
+from django.test import override_settings
+from django.utils import timezone
+from apps.qr_codes import tasks
+from apps.qr_codes.models import QRCode, QRIssuanceJob
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+
+
+@override_settings(QR_ISSUANCE_CHUNK_SIZE=2, QR_ISSUANCE_CONCURRENCY=2)
+class QRIssuanceJobTestCase(QRCodeAPITestCase):
+
+    username = "jobs"
+    issue_code = False
+
+    def test_create_job_is_queued(self):
+        """La création d'un job répond 202 et le confie à Celery"""
+        with mock.patch.object(tasks.run_qr_issuance_job, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    "/api/qr-codes/jobs/", {"total": 5}, format="json"
+                )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], QRIssuanceJob.Status.PENDING)
+        delay.assert_called_once_with(response.data["id"])
+
+    def test_job_progress_and_download(self):
+        """Le job émet tous les codes par chunks et publie une archive"""
+        job = QRIssuanceJob.objects.create(
+            user=self.user, total=5, ip_address="127.0.0.1"
+        )
+
+        with mock.patch.object(
+            tasks.issue_qr_issuance_slice,
+            "delay",
+            side_effect=tasks.issue_qr_issuance_slice,
+        ) as delay:
+            tasks.run_qr_issuance_job(str(job.id))
+
+        # 3 chunks de 2 répartis sur 2 tranches
+        self.assertEqual(delay.call_count, 2)
+        self.assertEqual(QRCode.objects.filter(issuance_job=job).count(), 5)
+
+        response = self.client.get(f"/api/qr-codes/jobs/{job.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], QRIssuanceJob.Status.COMPLETED)
+        self.assertEqual(response.data["done"], 5)
+        self.assertIsNotNone(response.data["download_url"])
+
+        job.refresh_from_db()
+        with zipfile.ZipFile(job.result_file.open("rb")) as archive:
+            manifest = archive.read("manifest.csv").decode()
+        self.assertEqual(len(manifest.strip().splitlines()), 6)
+
+    def test_failed_chunk_is_recorded(self):
+        """Un chunk en échec est compté et son erreur conservée"""
+        job = QRIssuanceJob.objects.create(user=self.user, total=2)
+        job.status = QRIssuanceJob.Status.RUNNING
+        job.save()
+
+        with mock.patch(
+            "apps.qr_codes.services.issuance.issue_qr_codes",
+            side_effect=RuntimeError("boom"),
+        ):
+            tasks.issue_qr_issuance_slice(str(job.id), 2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, QRIssuanceJob.Status.FAILED)
+        self.assertEqual(job.failed, 2)
+        self.assertEqual(job.errors[0]["error"], "boom")
+
+    def test_failed_slice_closes_job(self):
+        """Une tranche en erreur hors chunk compte son reste en échec"""
+        job = QRIssuanceJob.objects.create(user=self.user, total=2)
+        job.status = QRIssuanceJob.Status.RUNNING
+        job.save()
+
+        with mock.patch.object(
+            QRIssuanceJob.objects,
+            "select_related",
+            side_effect=DatabaseError("connexion perdue"),
+        ):
+            tasks.issue_qr_issuance_slice(str(job.id), 2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, QRIssuanceJob.Status.FAILED)
+        self.assertEqual(job.failed, 2)
+        self.assertEqual(job.errors[0]["error"], "connexion perdue")
+
+    @override_settings(QR_ISSUANCE_JOB_TIMEOUT=3600)
+    def test_stale_job_failed(self):
+        """Un job dont une tranche n'a jamais rendu compte est clos en échec"""
+        started_at = timezone.now() - timedelta(hours=2)
+        stale = QRIssuanceJob.objects.create(
+            user=self.user,
+            total=3,
+            done=1,
+            status=QRIssuanceJob.Status.RUNNING,
+            started_at=started_at,
+        )
+        running = QRIssuanceJob.objects.create(
+            user=self.user,
+            total=3,
+            status=QRIssuanceJob.Status.RUNNING,
+            started_at=timezone.now(),
+        )
+
+        tasks.fail_stale_issuance_jobs()
+
+        stale.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual(stale.status, QRIssuanceJob.Status.FAILED)
+        self.assertEqual(stale.failed, 2)
+        self.assertIsNotNone(stale.finished_at)
+        self.assertEqual(running.status, QRIssuanceJob.Status.RUNNING)
+
+    def test_archive_built_after_claim(self):
+        """L'archive est écrite une fois le job réclamé (FINALIZING), hors verrou"""
+        job = QRIssuanceJob.objects.create(
+            user=self.user, total=2, ip_address="127.0.0.1"
+        )
+        job.status = QRIssuanceJob.Status.RUNNING
+        job.save()
+        statuses = []
+        build = tasks._build_job_archive
+
+        def build_archive(job, fileobj):
+            statuses.append(QRIssuanceJob.objects.get(pk=job.pk).status)
+            build(job, fileobj)
+
+        with mock.patch.object(tasks, "_build_job_archive", side_effect=build_archive):
+            tasks.issue_qr_issuance_slice(str(job.id), 2)
+
+        job.refresh_from_db()
+        self.assertEqual(statuses, [QRIssuanceJob.Status.FINALIZING])
+        self.assertEqual(job.status, QRIssuanceJob.Status.COMPLETED)
+        self.assertTrue(job.result_file.name.endswith(f"{job.id}.zip"))
+
+    def test_archive_does_not_store_renditions(self):
+        """Les images de l'archive sont rendues en mémoire, sans rendu stocké"""
+        job = QRIssuanceJob.objects.create(
+            user=self.user, total=2, ip_address="127.0.0.1"
+        )
+        job.status = QRIssuanceJob.Status.RUNNING
+        job.save()
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root
+        ):
+            tasks.issue_qr_issuance_slice(str(job.id), 2)
+            job.refresh_from_db()
+            self.assertEqual(job.status, QRIssuanceJob.Status.COMPLETED)
+            self.assertFalse(
+                os.path.exists(os.path.join(media_root, settings.QR_RENDITIONS_DIR))
+            )
+            with zipfile.ZipFile(job.result_file.path) as archive:
+                self.assertEqual(len(archive.namelist()), 3)
+
+    def test_archive_failure_fails_job(self):
+        """Une archive en échec ne laisse pas le job en FINALIZING"""
+        job = QRIssuanceJob.objects.create(
+            user=self.user, total=2, ip_address="127.0.0.1"
+        )
+        job.status = QRIssuanceJob.Status.RUNNING
+        job.save()
+
+        with mock.patch.object(
+            tasks, "_build_job_archive", side_effect=OSError("disque plein")
+        ):
+            tasks.issue_qr_issuance_slice(str(job.id), 2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, QRIssuanceJob.Status.FAILED)
+        self.assertEqual(job.done, 2)
+        self.assertIn("disque plein", job.errors[0]["error"])
@@ -0,0 +1,53 @@
+import uuid
+from types import SimpleNamespace
+
+from django.test import TestCase, override_settings
+
+from core.crypto.kdf import get_kdf, get_kdf_for_algorithm
+from core.crypto.qr_generator import (
+    SecureQRGenerator,
+    check_payload_key,
+    decrypt_payload,
+)
+
+
+class PayloadKDFTestCase(TestCase):
+
+    def setUp(self):
+        self.user = SimpleNamespace(id=uuid.uuid4())
+
+    @override_settings(QR_DEFAULT_KDF="hkdf-sha256")
+    def test_default_kdf_recorded(self):
+        """Les nouveaux codes enregistrent la KDF HKDF"""
+        result = SecureQRGenerator().generate(self.user)
+
+        self.assertEqual(result["algorithm"], "AES256-GCM/HKDF-SHA256")
+        self.assertEqual(result["version"], "1.1")
+        self.assertEqual(result["qr_data"]["enc"], result["algorithm"])
+
+    def test_legacy_pbkdf2_codes_still_decode(self):
+        """Un code PBKDF2 historique reste déchiffrable et vérifiable"""
+        result = SecureQRGenerator(kdf="pbkdf2-sha256").generate(self.user)
+        self.assertEqual(result["algorithm"], "AES256-GCM")
+
+        key = bytes.fromhex(result["hash_value"])
+        payload = decrypt_payload(result["encrypted_data"], key)
+
+        self.assertEqual(payload["id"], result["unique_code"])
+        self.assertTrue(
+            check_payload_key(
+                payload,
+                bytes.fromhex(result["salt"]),
+                key,
+                result["algorithm"],
+                result["version"],
+            )
+        )
+
+    def test_registry_lookup(self):
+        """La KDF se retrouve à partir de QRCode.algorithm/version"""
+        self.assertIs(
+            get_kdf_for_algorithm("AES256-GCM", "1.0"), get_kdf("pbkdf2-sha256")
+        )
+        with self.assertRaises(ValueError):
+            get_kdf("md5")
@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import SimpleTestCase
+
+from core.crypto.keyring import KeyRing
+
+
+def _write_key_pair(directory, name):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_path = os.path.join(directory, f"{name}_private.pem")
+    public_path = os.path.join(directory, f"{name}_public.pem")
+    with open(private_path, "wb") as f:
+        f.write(
+            private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+    with open(public_path, "wb") as f:
+        f.write(
+            private_key.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+        )
+    return private_path, public_path
+
+
+class KeyRingTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.private_path, self.public_path = _write_key_pair(self.tmpdir.name, "k1")
+        self.keyring = KeyRing(
+            keys={
+                "k1": {
+                    "private_key_path": self.private_path,
+                    "public_key_path": self.public_path,
+                }
+            },
+            active_key_id="k1",
+            check_interval=0,
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_keys_are_loaded_once(self):
+        """Les clés sont parsées une seule fois tant que le fichier ne change pas"""
+        self.assertIs(self.keyring.private_key(), self.keyring.private_key("k1"))
+        self.assertIs(self.keyring.public_key(), self.keyring.public_key("k1"))
+
+    def test_reload_on_mtime_change(self):
+        """Une rotation de fichier est prise en compte sans redémarrage"""
+        before = self.keyring.public_key()
+
+        _write_key_pair(self.tmpdir.name, "k1")
+        stat = os.stat(self.public_path)
+        os.utime(self.public_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        after = self.keyring.public_key()
+        self.assertIsNot(before, after)
+        self.assertNotEqual(before.public_numbers(), after.public_numbers())
+
+    def test_unknown_key_id(self):
+        """Un key id inconnu lève KeyError"""
+        with self.assertRaises(KeyError):
+            self.keyring.public_key("unknown")
@@ -0,0 +1,71 @@
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.qr_codes.models import QRVerification
+from apps.qr_codes.services.verification_log import record_verifications
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+
+User = get_user_model()
+
+
+class QRCodeVerificationHistoryTestCase(QRCodeAPITestCase):
+
+    username = "historique"
+
+    def test_list_does_not_load_verifications(self):
+        """La liste lit les compteurs sans charger l'historique"""
+        record_verifications([(self.qr_code.pk, True)] * 30)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/qr-codes/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        (item,) = response.data["results"]
+        self.assertEqual(item["verification_count"], 30)
+        self.assertIsNotNone(item["last_verified_at"])
+        self.assertFalse(
+            any(
+                "qr_verifications" in query["sql"] for query in queries.captured_queries
+            )
+        )
+
+    def test_count_follows_public_verifications(self):
+        """Le compteur suit les vérifications publiques"""
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    "/api/qr-codes/verify/verify/",
+                    {"qr_data": self.payload},
+                    format="json",
+                )
+
+        response = self.client.get(f"/api/qr-codes/{self.qr_code.id}/")
+
+        self.assertEqual(response.data["verification_count"], 2)
+
+    def test_history_paginated(self):
+        """L'historique d'un code est paginé par curseur"""
+        record_verifications([(self.qr_code.pk, True)] * 25, ip_address="10.0.0.1")
+
+        response = self.client.get(f"/api/qr-codes/{self.qr_code.id}/verifications/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertEqual(response.data["results"][0]["ip_address"], "10.0.0.1")
+
+        rest = self.client.get(response.data["next"])
+        self.assertEqual(len(rest.data["results"]), 5)
+        self.assertIsNone(rest.data["next"])
+
+    def test_history_of_other_users_codes_hidden(self):
+        """L'historique d'un autre utilisateur est invisible"""
+        other = User.objects.create_user(
+            username="autre", email="autre@example.com", password="testpass"
+        )
+        self.client.force_authenticate(user=other)
+
+        response = self.client.get(f"/api/qr-codes/{self.qr_code.id}/verifications/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(QRVerification.objects.count(), 0)
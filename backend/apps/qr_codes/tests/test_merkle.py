@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.qr_codes.models import QRCode, QRSignatureBatch
+from apps.qr_codes.services.issuance import issue_qr_codes
+from apps.qr_codes.services.renditions import Rendition
+from core.crypto.merkle import MerkleTree, compute_root
+from core.crypto.qr_generator import QRVerifier, verified_roots
+from core.crypto.signers import RSAPSSSigner
+
+User = get_user_model()
+
+
+class MerkleTreeTestCase(SimpleTestCase):
+
+    def test_every_proof_rebuilds_root(self):
+        """Toutes les preuves d'arbres de 1 à 33 feuilles redonnent la racine"""
+        for size in range(1, 34):
+            leaves = [f"leaf-{i}".encode() for i in range(size)]
+            tree = MerkleTree(leaves)
+            for index, leaf in enumerate(leaves):
+                self.assertEqual(
+                    compute_root(leaf, index, size, tree.proof(index)), tree.root
+                )
+
+    def test_tampered_leaf_or_proof(self):
+        """Une feuille, un index ou une preuve altérés ne redonnent pas la racine"""
+        leaves = [f"leaf-{i}".encode() for i in range(10)]
+        tree = MerkleTree(leaves)
+        proof = tree.proof(3)
+
+        self.assertNotEqual(compute_root(b"forged", 3, 10, proof), tree.root)
+        self.assertNotEqual(compute_root(leaves[3], 2, 10, proof), tree.root)
+        with self.assertRaises(ValueError):
+            compute_root(leaves[3], 3, 10, proof[:-1])
+
+
+@override_settings(QR_MERKLE_BATCH_SIGNING=True, QR_MERKLE_MIN_BATCH=4)
+class MerkleBatchIssuanceTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="merkle",
+            email="merkle@example.com",
+            password="testpass123",
+            first_name="Awa",
+            last_name="Koné",
+        )
+        verified_roots.clear()
+
+    def _payload(self, qr_code):
+        return Rendition(QRCode.objects.get(pk=qr_code.pk)).payload()
+
+    def test_one_signature_per_batch(self):
+        """Un lot de codes ne coûte qu'une opération de clé privée"""
+        with mock.patch.object(
+            RSAPSSSigner, "sign", autospec=True, side_effect=RSAPSSSigner.sign
+        ) as sign:
+            qr_codes = issue_qr_codes(self.user, [{}] * 10, ip_address="127.0.0.1")
+
+        self.assertEqual(sign.call_count, 1)
+        batch = QRSignatureBatch.objects.get()
+        self.assertEqual(batch.size, 10)
+        self.assertEqual(
+            sorted(qr_code.batch_index for qr_code in qr_codes), list(range(10))
+        )
+
+    def test_root_verified_once_then_cached(self):
+        """Le verifier vérifie la racine une fois puis s'appuie sur le cache"""
+        qr_codes = issue_qr_codes(self.user, [{}] * 8, ip_address="127.0.0.1")
+        payloads = [self._payload(qr_code) for qr_code in qr_codes]
+
+        with mock.patch.object(
+            RSAPSSSigner, "verify", autospec=True, side_effect=RSAPSSSigner.verify
+        ) as verify:
+            for payload in payloads:
+                self.assertTrue(QRVerifier().verify(payload)["valid"])
+
+        self.assertEqual(verify.call_count, 1)
+
+    def test_small_batches_signed_per_code(self):
+        """Sous QR_MERKLE_MIN_BATCH, chaque code garde sa propre signature"""
+        qr_codes = issue_qr_codes(self.user, [{}] * 2, ip_address="127.0.0.1")
+
+        self.assertFalse(QRSignatureBatch.objects.exists())
+        self.assertIsNone(qr_codes[0].batch_id)
+        self.assertTrue(QRVerifier().verify(self._payload(qr_codes[0]))["valid"])
+
+    def test_revoked_batch(self):
+        """La révocation d'un lot invalide tous ses codes, cache compris"""
+        qr_codes = issue_qr_codes(self.user, [{}] * 4, ip_address="127.0.0.1")
+        payload = self._payload(qr_codes[0])
+        self.assertTrue(QRVerifier().verify(payload)["valid"])
+
+        QRSignatureBatch.objects.get().revoke()
+
+        self.assertFalse(QRVerifier().verify(payload)["valid"])
+        self.assertEqual(QRCode.objects.filter(status=QRCode.Status.REVOKED).count(), 4)
@@ -0,0 +1,176 @@
+import base64
+import json
+import random
+from datetime import timedelta
+from unittest import mock
+
+from cryptography.hazmat.primitives.serialization import load_der_public_key
+from rest_framework import status
+from django.db import DatabaseError
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from apps.qr_codes.models import QRCode, QRRevocationEvent
+from apps.qr_codes.services.offline_bundle import (
+    code_hash,
+    decode_set,
+    offline_verifiable,
+)
+from apps.qr_codes.services.status import change_qr_status
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+from core.crypto.payload import decode_qr_payload
+from core.crypto.qr_generator import SecureQRGenerator
+from core.crypto.signers import get_signer
+from core.utils import gcs
+
+URL = "/api/qr-codes/verify/bundle/"
+
+
+class GolombRiceTestCase(SimpleTestCase):
+
+    def test_roundtrip(self):
+        """Encodage puis décodage redonnent l'ensemble trié, en peu de bits"""
+        values = {random.getrandbits(40) for _ in range(1000)} | {0, 2**40 - 1}
+        p = gcs.rice_parameter(len(values), 40)
+        data = gcs.encode(values, p)
+
+        self.assertEqual(gcs.decode(data, len(values), p), sorted(values))
+        # ~p + 2 bits par valeur au lieu de 40
+        self.assertLess(len(data), len(values) * (p + 3) / 8)
+
+    def test_empty(self):
+        """Un ensemble vide s'encode en zéro octet"""
+        self.assertEqual(gcs.encode([], 0), b"")
+        self.assertEqual(gcs.decode(b"", 0, 0), [])
+
+
+@override_settings(QR_OFFLINE_SEQ_SETTLE=0)
+class OfflineBundleTestCase(QRCodeAPITestCase):
+
+    username = "terrain"
+    issue_code = False
+
+    def setUp(self):
+        super().setUp()
+        self.qr_codes = [
+            QRCode.objects.create(
+                unique_code=f"ST-CI-2026-0000000{i}",
+                user=self.user,
+                encrypted_data="x",
+                signature="x",
+                expires_at=timezone.now() + timedelta(days=30),
+            )
+            for i in range(3)
+        ]
+
+    def _set_status(self, qr_code, new_status):
+        change_qr_status(QRCode.objects.filter(pk=qr_code.pk), new_status)
+
+    def _bundle(self, **params):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        signed = response.data
+        bundle = json.loads(signed["bundle"])
+
+        # Signature vérifiable avec la clé publique livrée dans le bundle
+        key = next(key for key in bundle["keys"] if key["kid"] == signed["kid"])
+        public_key = load_der_public_key(base64.b64decode(key["public_key"]))
+        self.assertTrue(
+            get_signer(signed["alg"]).verify(
+                public_key,
+                base64.b64decode(signed["signature"]),
+                signed["bundle"].encode("utf-8"),
+            )
+        )
+        return bundle
+
+    def test_full_bundle(self):
+        """Le lot complet liste les codes révoqués ou suspendus"""
+        self._set_status(self.qr_codes[0], QRCode.Status.REVOKED)
+        self._set_status(self.qr_codes[1], QRCode.Status.SUSPENDED)
+
+        bundle = self._bundle()
+
+        self.assertEqual(bundle["mode"], "full")
+        self.assertEqual(bundle["seq"], QRRevocationEvent.objects.latest("id").id)
+        revoked = decode_set(bundle["revoked"])
+        self.assertEqual(
+            revoked, {code_hash(qr.unique_code) for qr in self.qr_codes[:2]}
+        )
+
+    def test_only_bound_payloads_verifiable_offline(self):
+        """Seuls les payloads liés à leur code se vérifient hors ligne"""
+        bundle = self._bundle()
+        qr_payload = SecureQRGenerator(payload_format="v2").generate(self.user)[
+            "qr_payload"
+        ]
+        qr_data = decode_qr_payload(qr_payload)
+
+        self.assertEqual(bundle["format"], 2)
+        self.assertIn(qr_data["kid"], bundle["offline"]["kids"])
+        self.assertTrue(offline_verifiable(qr_data, bundle))
+        # Payload antérieur, sans lien code/signature : renvoyé en ligne
+        legacy = {key: value for key, value in qr_data.items() if key != "bnd"}
+        self.assertFalse(offline_verifiable(legacy, bundle))
+        self.assertFalse(offline_verifiable({**qr_data, "kid": "inconnue"}, bundle))
+
+    def test_delta(self):
+        """Le delta ne contient que les changements depuis le numéro donné"""
+        self._set_status(self.qr_codes[0], QRCode.Status.REVOKED)
+        seq = self._bundle()["seq"]
+
+        self._set_status(self.qr_codes[1], QRCode.Status.REVOKED)
+        self._set_status(self.qr_codes[0], QRCode.Status.ACTIVE)
+        bundle = self._bundle(since=seq)
+
+        self.assertEqual(bundle["mode"], "delta")
+        self.assertEqual(bundle["since"], seq)
+        self.assertGreater(bundle["seq"], seq)
+        self.assertEqual(
+            decode_set(bundle["added"]), {code_hash(self.qr_codes[1].unique_code)}
+        )
+        self.assertEqual(
+            decode_set(bundle["removed"]), {code_hash(self.qr_codes[0].unique_code)}
+        )
+
+        # À jour : delta vide
+        bundle = self._bundle(since=bundle["seq"])
+        self.assertEqual(bundle["added"]["count"], 0)
+        self.assertEqual(bundle["removed"]["count"], 0)
+
+    def test_status_kept_when_event_not_written(self):
+        """Sans événement de révocation, le changement de statut est annulé"""
+        with mock.patch.object(
+            QRRevocationEvent.objects, "bulk_create", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                self._set_status(self.qr_codes[0], QRCode.Status.REVOKED)
+
+        self.qr_codes[0].refresh_from_db()
+        self.assertEqual(self.qr_codes[0].status, QRCode.Status.ACTIVE)
+        self.assertFalse(QRRevocationEvent.objects.exists())
+
+    def test_unknown_sequence_returns_full_bundle(self):
+        """Un numéro inconnu renvoie le lot complet"""
+        self.assertEqual(self._bundle(since=1000)["mode"], "full")
+
+    @override_settings(QR_OFFLINE_DELTA_MAX=1)
+    def test_long_delta_returns_full_bundle(self):
+        """Un delta plus gros que le lot complet est remplacé par celui-ci"""
+        for qr_code in self.qr_codes:
+            self._set_status(qr_code, QRCode.Status.REVOKED)
+
+        self.assertEqual(self._bundle(since=0)["mode"], "full")
+
+    def test_requires_authentication(self):
+        """Le lot est réservé aux terminaux authentifiés"""
+        self.client.force_authenticate(user=None)
+        response = self.client.get(URL)
+        self.assertIn(
+            response.status_code,
+            (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN),
+        )
+
+    def test_invalid_since(self):
+        """Un numéro de séquence négatif est refusé"""
+        response = self.client.get(URL, {"since": -1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,74 @@
+from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.audit.models import AuditLog
+from apps.notifications.models import Notification
+from apps.qr_codes.services.issuance import issue_qr_codes
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+
+
+class CursorPaginationTestCase(QRCodeAPITestCase):
+
+    username = "curseur"
+    issue_code = False
+
+    def _walk(self, url, page_size):
+        """Parcourt toutes les pages ; aucune ne doit compter les lignes"""
+        ids = []
+        url = f"{url}?page_size={page_size}"
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            self.assertFalse(
+                any("COUNT(" in query["sql"] for query in queries.captured_queries)
+            )
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_qr_codes(self):
+        """La liste des QR codes est parcourue sans doublon ni COUNT"""
+        issue_qr_codes(self.user, [{}] * 7, ip_address="127.0.0.1")
+
+        ids = self._walk("/api/qr-codes/", page_size=3)
+
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(len(set(ids)), 7)
+
+    def test_same_timestamp_not_skipped_or_repeated(self):
+        """Des lignes de même date ne sont ni sautées ni répétées"""
+        now = timezone.now()
+        Notification.objects.bulk_create(
+            Notification(user=self.user, title=f"n{i}", message="", created_at=now)
+            for i in range(5)
+        )
+
+        ids = self._walk("/api/notifications/", page_size=2)
+
+        self.assertEqual(
+            sorted(ids), sorted(Notification.objects.values_list("pk", flat=True))
+        )
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_audit_logs(self):
+        """Le journal d'audit ne montre que les entrées de l'utilisateur"""
+        AuditLog.objects.bulk_create(
+            AuditLog(
+                user=self.user,
+                action="QR_VERIFIED",
+                resource_type="QRCode",
+                resource_id=str(i),
+                ip_address="127.0.0.1",
+            )
+            for i in range(5)
+        )
+        AuditLog.objects.create(
+            action="login", resource_type="User", resource_id="x", ip_address="::1"
+        )
+
+        ids = self._walk("/api/audit/logs/", page_size=2)
+
+        self.assertEqual(len(ids), 5)
@@ -0,0 +1,136 @@
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from apps.qr_codes.models import QRCode
+from apps.qr_codes.services.verification_cache import cached_verify, local_cache
+from core.crypto.payload import (
+    base45_decode,
+    base45_encode,
+    decode_qr_payload,
+    encode_qr_payload,
+)
+from core.crypto.qr_generator import SecureQRGenerator, QRVerifier, signed_message
+
+User = get_user_model()
+
+
+class PayloadFormatTestCase(SimpleTestCase):
+
+    def test_base45_roundtrip(self):
+        """base45 (RFC 9285) est réversible, y compris en longueur impaire"""
+        self.assertEqual(base45_encode(b"AB"), "BB8")
+        for data in (b"", b"\x00", b"\xff\xff\xff", bytes(range(256))):
+            self.assertEqual(base45_decode(base45_encode(data)), data)
+
+    def test_v2_is_alphanumeric_and_smaller(self):
+        """L'enveloppe v2 est plus courte et reste décodable"""
+        qr_data = {
+            "v": "1.1",
+            "id": "ST-CI-2025-0A1B2C3D",
+            "kid": "rsa-1",
+            "data": "AAECAwQFBgcICQ==",
+            "sig": "c2lnbmF0dXJl",
+        }
+
+        v1 = encode_qr_payload(qr_data, "v1")
+        v2 = encode_qr_payload(qr_data, "v2")
+
+        self.assertLess(len(v2), len(v1))
+        self.assertEqual(v2, v2.upper())
+        decoded = decode_qr_payload(v2)
+        for field in ("id", "kid", "data", "sig"):
+            self.assertEqual(decoded[field], qr_data[field])
+
+    def test_v2_keeps_code_binding(self):
+        """Le drapeau bnd passe par la version de l'enveloppe (0x05)"""
+        qr_data = {"id": "ST-CI-2025-0A1B2C3D", "data": "AAAA", "sig": "AAAA"}
+
+        self.assertNotIn("bnd", decode_qr_payload(encode_qr_payload(qr_data, "v2")))
+        bound = decode_qr_payload(encode_qr_payload({**qr_data, "bnd": 1}, "v2"))
+        self.assertEqual(bound["bnd"], 1)
+
+    def test_v2_rejects_truncated_payload(self):
+        """Un payload v2 tronqué est refusé"""
+        v2 = encode_qr_payload(
+            {"id": "ST-CI-2025-0A1B2C3D", "data": "AAAA", "sig": "AAAA"}, "v2"
+        )
+        with self.assertRaises(ValueError):
+            decode_qr_payload(v2[:-3])
+
+
+class PayloadVerificationTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="payload",
+            email="payload@example.com",
+            password="testpass123",
+            first_name="Awa",
+            last_name="Koné",
+        )
+
+    def _issue(self, payload_format, legacy=False):
+        generator = SecureQRGenerator(payload_format=payload_format)
+        result = generator.generate(self.user)
+        if legacy:
+            # Code antérieur au lien code/signature : chiffré seul signé
+            result["signature"] = generator._sign(
+                signed_message(result["encrypted_data"])
+            )
+            result["qr_data"].pop("bnd")
+            result["qr_data"]["sig"] = result["signature"]
+            result["qr_payload"] = encode_qr_payload(result["qr_data"], payload_format)
+        QRCode.objects.create(
+            user=self.user,
+            unique_code=result["unique_code"],
+            encrypted_data=result["encrypted_data"],
+            signature=result["signature"],
+            hash_value=result["hash_value"],
+            salt=result["salt"],
+            key_id=result["key_id"],
+            expires_at=result["expires_at"],
+            code_bound=not legacy,
+        )
+        return result["qr_payload"]
+
+    def _relabel(self, qr_payload, unique_code, **changes):
+        qr_data = decode_qr_payload(qr_payload)
+        qr_data.update(id=unique_code, **changes)
+        return encode_qr_payload(qr_data, "v2")
+
+    def test_verifier_detects_both_formats(self):
+        """QRVerifier accepte indifféremment v1 et v2"""
+        for payload_format in ("v1", "v2"):
+            result = QRVerifier().verify(self._issue(payload_format))
+            self.assertTrue(result["valid"], payload_format)
+
+    def test_relabeled_payload_rejected(self):
+        """Le chiffré signé d'un code présenté sous le code d'un autre est refusé"""
+        revoked = self._issue("v2")
+        other = decode_qr_payload(self._issue("v2"))["id"]
+        QRCode.objects.exclude(unique_code=other).update(status=QRCode.Status.REVOKED)
+
+        for forged in (
+            self._relabel(revoked, other),
+            self._relabel(revoked, other, bnd=None),
+        ):
+            result = QRVerifier().verify(forged)
+            self.assertFalse(result["valid"])
+            self.assertEqual(result["error"], "Invalid signature")
+
+    def test_legacy_relabeled_payload_rejected_online(self):
+        """Code antérieur : la base, et non le cache, refuse un chiffré d'un autre code"""
+        cache.clear()
+        local_cache.clear()
+        revoked = self._issue("v2", legacy=True)
+        genuine = self._issue("v2", legacy=True)
+        other = decode_qr_payload(genuine)["id"]
+        QRCode.objects.exclude(unique_code=other).update(status=QRCode.Status.REVOKED)
+        self.assertTrue(cached_verify(genuine).result["valid"])
+
+        context = cached_verify(self._relabel(revoked, other))
+
+        self.assertEqual(context.result["error"], "Invalid signature")
+        self.assertIsNone(context.qr_code_id)
+        # La réponse en cache du vrai code n'est pas écrasée
+        self.assertTrue(cached_verify(genuine).result["valid"])
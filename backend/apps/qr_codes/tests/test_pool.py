@@ -0,0 +1,78 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from apps.companies.models import Company
+from apps.qr_codes.models import QRCode, QRSignatureBatch
+from apps.qr_codes.services.renditions import Rendition
+from core.crypto.pool import get_crypto_pool, reset_crypto_pool
+from core.crypto.qr_generator import QRVerifier
+
+User = get_user_model()
+
+
+@override_settings(QR_CRYPTO_POOL_WORKERS=2, QR_CRYPTO_POOL_MAX_PENDING=4)
+class CryptoPoolAPITestCase(APITestCase):
+
+    def setUp(self):
+        reset_crypto_pool()
+        self.user = User.objects.create_user(
+            username="pool",
+            email="pool@example.com",
+            password="testpass123",
+            first_name="Awa",
+            last_name="Koné",
+        )
+        self.company = Company.objects.create(name="Ministère", sector="Public")
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        reset_crypto_pool()
+
+    def test_bulk_generated_in_pool(self):
+        """Les codes générés par les processus du pool sont complets et valides"""
+        response = self.client.post(
+            "/api/qr-codes/bulk/",
+            {"count": 6, "company": str(self.company.id)},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        qr_codes = QRCode.objects.filter(company=self.company)
+        self.assertEqual(qr_codes.count(), 6)
+        for qr_code in qr_codes:
+            payload = Rendition(qr_code).payload()
+            self.assertTrue(QRVerifier().verify(payload)["valid"])
+
+    @override_settings(QR_MERKLE_BATCH_SIGNING=True, QR_MERKLE_MIN_BATCH=2)
+    def test_batch_signing_per_worker(self):
+        """Chaque part signée dans un processus du pool a sa propre racine"""
+        response = self.client.post("/api/qr-codes/bulk/", {"count": 6}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(QRSignatureBatch.objects.count(), 2)
+        qr_code = QRCode.objects.first()
+        self.assertTrue(QRVerifier().verify(Rendition(qr_code).payload())["valid"])
+
+    def test_workers_not_forked_from_threaded_process(self):
+        """Les processus du pool sont lancés par forkserver ou spawn, pas fork"""
+        pool = get_crypto_pool()
+
+        self.assertIn(
+            pool._executor._mp_context.get_start_method(), ("forkserver", "spawn")
+        )
+
+    def test_saturated_pool_returns_503(self):
+        """File pleine : 503 + Retry-After, et aucun code émis"""
+        pool = get_crypto_pool()
+        for _ in range(pool.max_pending):
+            pool._slots.acquire()
+        try:
+            response = self.client.post("/api/qr-codes/", {}, format="json")
+        finally:
+            for _ in range(pool.max_pending):
+                pool._slots.release()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "5")
+        self.assertFalse(QRCode.objects.exists())
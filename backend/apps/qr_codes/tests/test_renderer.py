@@ -0,0 +1,39 @@
+from io import BytesIO
+
+from django.test import SimpleTestCase
+from PIL import Image, ImageChops
+
+from core.crypto.qr_generator import build_qr
+from core.crypto.renderer import matrix_to_image, render_png
+
+
+class MatrixRendererTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.qr = build_qr("ST2:EXEMPLE", box_size=7, border=4)
+
+    def test_same_pixels_as_qrcode(self):
+        """Le rendu NumPy est identique, pixel pour pixel, à celui de qrcode"""
+        expected = self.qr.make_image(
+            fill_color="#059669", back_color="white"
+        ).get_image()
+
+        img = matrix_to_image(
+            self.qr.get_matrix(), 7, fill_color="#059669", back_color="#ffffff"
+        )
+
+        self.assertEqual(img.mode, "P")
+        self.assertEqual(img.size, expected.size)
+        diff = ImageChops.difference(img.convert("RGB"), expected.convert("RGB"))
+        self.assertIsNone(diff.getbbox())
+
+    def test_mono(self):
+        """Le mode monochrome garde les modules sombres en noir"""
+        expected = self.qr.make_image().get_image()
+
+        png = render_png(self.qr.get_matrix(), box_size=7, mono=True)
+        img = Image.open(BytesIO(png))
+
+        self.assertEqual(img.mode, "1")
+        diff = ImageChops.difference(img.convert("L"), expected.convert("L"))
+        self.assertIsNone(diff.getbbox())
@@ -0,0 +1,143 @@
+import shutil
+import tempfile
+
+from rest_framework import status
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from apps.qr_codes.services.renditions import Rendition
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+
+
+class QRImageRenditionTestCase(QRCodeAPITestCase):
+
+    username = "image"
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        super().setUp()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_issuance_does_not_render(self):
+        """L'émission n'écrit plus d'image"""
+        self.assertFalse(self.qr_code.qr_image)
+
+    def test_image_rendered_once_and_cached(self):
+        """Le premier GET rend l'image et la conserve dans le stockage"""
+        url = f"/api/qr-codes/{self.qr_code.id}/image/"
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+        self.assertIn("max-age", response["Cache-Control"])
+
+        rendition = Rendition(self.qr_code)
+        self.assertEqual(response["ETag"], rendition.etag)
+        self.assertTrue(default_storage.exists(rendition.storage_name))
+
+    def test_if_none_match_returns_304(self):
+        """Un ETag déjà connu du client ne coûte ni rendu ni lecture"""
+        url = f"/api/qr-codes/{self.qr_code.id}/image/"
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_parameters_change_etag(self):
+        """Taille et couleurs font partie de la clé de cache"""
+        url = f"/api/qr-codes/{self.qr_code.id}/image/"
+        default = self.client.get(url)
+        small = self.client.get(url, {"size": 4, "fill": "#000000"})
+
+        self.assertNotEqual(default["ETag"], small["ETag"])
+        self.assertLess(len(small.content), len(default.content))
+
+    def test_invalid_colour_rejected(self):
+        """Une couleur non hexadécimale est refusée"""
+        response = self.client.get(
+            f"/api/qr-codes/{self.qr_code.id}/image/", {"fill": "red"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_svg_rendition(self):
+        """Le SVG est produit sans raster et en millimètres pour l'impression"""
+        response = self.client.get(
+            f"/api/qr-codes/{self.qr_code.id}/image/",
+            {"output": "svg", "module_mm": 0.5},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/svg+xml")
+        self.assertIn(b"<svg", response.content)
+        self.assertIn(b'mm"', response.content)
+
+    def test_paletted_and_mono_png_are_smaller(self):
+        """Les PNG palette / 1 bit sont bien plus légers que l'ancien RGB"""
+        from io import BytesIO
+        from PIL import Image
+        from core.crypto.qr_generator import build_qr
+
+        rgb = BytesIO()
+        build_qr(Rendition(self.qr_code).payload()).make_image(
+            fill_color="#059669", back_color="white"
+        ).save(rgb, format="PNG")
+
+        url = f"/api/qr-codes/{self.qr_code.id}/image/"
+        paletted = self.client.get(url).content
+        mono = self.client.get(url, {"output": "png-mono"}).content
+
+        self.assertLess(len(paletted) * 2, len(rgb.getvalue()))
+        self.assertLess(len(mono) * 2, len(rgb.getvalue()))
+        self.assertEqual(Image.open(BytesIO(paletted)).mode, "P")
+        self.assertEqual(Image.open(BytesIO(mono)).mode, "1")
+
+    def test_print_resolution(self):
+        """Avec dpi et module_mm, la taille de module est calculée et le dpi inscrit"""
+        from io import BytesIO
+        from PIL import Image
+
+        response = self.client.get(
+            f"/api/qr-codes/{self.qr_code.id}/image/",
+            {"dpi": 600, "module_mm": 0.508, "border": 0},
+        )
+        img = Image.open(BytesIO(response.content))
+
+        self.assertEqual(round(img.info["dpi"][0]), 600)
+        self.assertEqual(img.size[0] % 12, 0)
+
+    def test_oversized_png_rejected(self):
+        """Un PNG au-delà de QR_RENDER_MAX_SIDE pixels est refusé sans rendu"""
+        url = f"/api/qr-codes/{self.qr_code.id}/image/"
+
+        response = self.client.get(url, {"dpi": 2400, "module_mm": 10})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(
+            default_storage.exists(f"qr_codes/renditions/{self.qr_code.unique_code}")
+        )
+        # Vectoriel : pas de trame, donc pas de limite
+        response = self.client.get(url, {"output": "svg", "dpi": 2400, "module_mm": 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(QR_RENDITIONS_PER_CODE=2)
+    def test_old_renditions_evicted(self):
+        """Seules les renditions les plus récentes d'un code sont conservées"""
+        url = f"/api/qr-codes/{self.qr_code.id}/image/"
+        for size in (4, 5, 6):
+            self.client.get(url, {"size": size})
+
+        _, files = default_storage.listdir(
+            f"qr_codes/renditions/{self.qr_code.unique_code}"
+        )
+
+        self.assertEqual(len(files), 2)
+        self.assertNotIn(
+            Rendition(self.qr_code, box_size=4).storage_name.rsplit("/", 1)[1], files
+        )
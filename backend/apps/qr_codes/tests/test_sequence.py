@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.qr_codes.models import QRCode, QRCodeSequence
+from apps.qr_codes.services.sequence import (
+    CodeAllocator,
+    format_unique_code,
+    permutation_key,
+)
+from core.crypto.permutation import FeistelPermutation
+
+User = get_user_model()
+
+
+class FeistelPermutationTestCase(SimpleTestCase):
+
+    def test_permutation_is_invertible(self):
+        """permute/invert sont réciproques, donc la permutation est injective"""
+        permutation = FeistelPermutation(b"k" * 32, tweak=b"2025")
+        values = list(range(1000)) + [2**32 - 1]
+        permuted = [permutation.permute(value) for value in values]
+
+        self.assertEqual(len(set(permuted)), len(values))
+        self.assertEqual([permutation.invert(value) for value in permuted], values)
+
+    def test_key_and_year_change_mapping(self):
+        """Changer de clé ou d'année change la permutation"""
+        a = FeistelPermutation(b"a" * 32, tweak=b"2025")
+        self.assertNotEqual(
+            a.permute(1), FeistelPermutation(b"b" * 32, b"2025").permute(1)
+        )
+        self.assertNotEqual(
+            a.permute(1), FeistelPermutation(b"a" * 32, b"2026").permute(1)
+        )
+
+
+class PermutationKeyTestCase(SimpleTestCase):
+
+    @override_settings(QR_CODE_PERMUTATION_KEY="")
+    def test_default_key_derived_from_encryption_key(self):
+        """Sans clé dédiée, sous-clé HKDF distincte de ENCRYPTION_KEY"""
+        key = permutation_key()
+
+        self.assertEqual(len(key), 32)
+        self.assertNotEqual(key, bytes.fromhex(settings.ENCRYPTION_KEY))
+        self.assertEqual(key, permutation_key())
+
+    @override_settings(QR_CODE_PERMUTATION_KEY="ab" * 32)
+    def test_explicit_key_used_as_is(self):
+        """Une clé configurée est utilisée telle quelle"""
+        self.assertEqual(permutation_key(), b"\xab" * 32)
+
+
+class CodeAllocatorTestCase(TestCase):
+
+    def test_codes_unique_and_formatted(self):
+        """Les codes sont uniques, au format historique, et peu de blocs sont pris"""
+        allocator = CodeAllocator(block_size=100)
+        codes = [allocator.allocate() for _ in range(250)]
+
+        self.assertEqual(len(set(codes)), 250)
+        for code in codes:
+            self.assertRegex(code, r"^ST-CI-\d{4}-[0-9A-F]{8}$")
+        year = timezone.now().year
+        self.assertEqual(QRCodeSequence.objects.get(year=year).next_value, 300)
+
+    def test_processes_never_share_a_block(self):
+        """Deux allocateurs (ou un worker forké) réservent des blocs disjoints"""
+        first = CodeAllocator(block_size=10)
+        second = CodeAllocator(block_size=10)
+        codes = {first.allocate(), second.allocate()}
+
+        with mock.patch("os.getpid", return_value=-1):
+            codes.add(first.allocate())
+
+        self.assertEqual(len(codes), 3)
+        self.assertEqual(QRCodeSequence.objects.get().next_value, 30)
+
+    def test_legacy_random_codes_are_skipped(self):
+        """Un code aléatoire déjà émis n'est jamais réattribué"""
+        year = timezone.now().year
+        allocator = CodeAllocator(block_size=5)
+        legacy = format_unique_code(
+            year,
+            FeistelPermutation(allocator.key, str(year).encode()).permute(2),
+        )
+        user = User.objects.create_user(
+            username="legacy", email="legacy@example.com", password="testpass123"
+        )
+        QRCode.objects.create(
+            user=user,
+            unique_code=legacy,
+            encrypted_data="",
+            signature="",
+            hash_value="",
+            salt="",
+            expires_at=timezone.now(),
+        )
+
+        codes = [allocator.allocate() for _ in range(5)]
+
+        self.assertNotIn(legacy, codes)
+        self.assertEqual(len(set(codes)), 5)
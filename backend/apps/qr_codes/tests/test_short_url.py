@@ -0,0 +1,133 @@
+from rest_framework import status
+from django.test import SimpleTestCase, override_settings
+from apps.qr_codes.services.issuance import issue_qr_codes
+from apps.qr_codes.services.renditions import Rendition
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+from core.crypto.payload import decode_qr_payload
+from core.crypto.qr_generator import SecureQRGenerator
+
+JSON = {"HTTP_ACCEPT": "application/json"}
+
+
+@override_settings(QR_SHORT_URL_BASE="https://verif.stamptech.ci/")
+class ShortUrlTestCase(QRCodeAPITestCase):
+
+    username = "shorturl"
+
+    def setUp(self):
+        super().setUp()
+        self.url = f"/v/{self.qr_code.unique_code}"
+
+    def _get(self, url=None, **headers):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(url or self.url, **headers)
+
+    def test_json_response(self):
+        """Réponse JSON publique, cachable et sans email"""
+        response = self._get(**JSON)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        data = response.json()
+        self.assertTrue(data["valid"])
+        self.assertEqual(data["data"]["holder"], "Awa Koné")
+        # Réponse publique, mise en cache par les CDN : pas d'email
+        self.assertNotIn("email", data["data"])
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=60", response["Cache-Control"])
+        self.assertIn("Accept", response["Vary"])
+        self.assertEqual(self.qr_code.verifications.count(), 1)
+
+    def test_html_page_by_default(self):
+        """Un navigateur reçoit la page HTML"""
+        response = self._get(HTTP_ACCEPT="text/html,*/*;q=0.8")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, "Cachet authentique")
+        self.assertNotContains(response, "shorturl@example.com")
+        self.assertEqual(
+            self._get(f"{self.url}?output=json")["Content-Type"], "application/json"
+        )
+
+    def test_revalidation(self):
+        """Un ETag inchangé donne 304"""
+        etag = self._get(**JSON)["ETag"]
+
+        response = self._get(HTTP_IF_NONE_MATCH=etag, **JSON)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        # Une autre représentation a son propre ETag
+        self.assertNotEqual(self._get()["ETag"], etag)
+
+    def test_status_change_changes_etag(self):
+        """Un changement de statut change l'ETag"""
+        etag = self._get(**JSON)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/qr-codes/{self.qr_code.id}/revoke/")
+        response = self._get(HTTP_IF_NONE_MATCH=etag, **JSON)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["error"], "QR code is revoked")
+        self.assertContains(self._get(), "Cachet non valide")
+
+    def test_unknown_code(self):
+        """Code inconnu : réponse invalide ; code mal formé : 404"""
+        response = self._get("/v/ST-CI-2026-DEADBEEF", **JSON)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.json()["valid"])
+        self.assertEqual(self._get("/v/pas%20un%20code").status_code, 404)
+
+    @override_settings(QR_VERIFY_CODE_BURST=1)
+    def test_rate_limited_response_not_cached(self):
+        """Une réponse 429 n'est pas mise en cache"""
+        self._get(**JSON)
+
+        response = self._get(**JSON)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("no-store", response["Cache-Control"])
+
+    def test_image_with_url_payload(self):
+        """L'image peut porter l'URL courte au lieu du payload"""
+        rendition = Rendition(self.qr_code, payload_format="url")
+        self.assertEqual(
+            rendition.payload(),
+            f"https://verif.stamptech.ci/v/{self.qr_code.unique_code}",
+        )
+
+        response = self.client.get(f"/api/qr-codes/{self.qr_code.id}/image/")
+        url_response = self.client.get(
+            f"/api/qr-codes/{self.qr_code.id}/image/?payload=url"
+        )
+        self.assertEqual(url_response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(url_response["ETag"], response["ETag"])
+
+    def test_generator_url_form(self):
+        """Le générateur produit directement l'URL courte"""
+        result = SecureQRGenerator(payload_format="url").generate(self.user)
+
+        self.assertEqual(
+            result["qr_payload"],
+            f"https://verif.stamptech.ci/v/{result['unique_code']}",
+        )
+
+    @override_settings(QR_MERKLE_BATCH_SIGNING=True, QR_MERKLE_MIN_BATCH=4)
+    def test_batch_signed_code(self):
+        """Un code signé par lot est vérifiable par son URL"""
+        qr_codes = issue_qr_codes(self.user, [{}] * 4, ip_address="127.0.0.1")
+
+        response = self._get(f"/v/{qr_codes[0].unique_code}", **JSON)
+
+        self.assertTrue(response.json()["valid"])
+
+
+class UrlPayloadTestCase(SimpleTestCase):
+
+    def test_verify_endpoint_rejects_urls(self):
+        """Une URL courte n'est pas un payload signé"""
+        with self.assertRaises(ValueError):
+            decode_qr_payload("https://verif.stamptech.ci/v/ST-CI-2026-00000001")
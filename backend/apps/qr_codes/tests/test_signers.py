@@ -0,0 +1,122 @@
+import os
+import tempfile
+import uuid
+from types import SimpleNamespace
+
+from cryptography.hazmat.primitives import serialization
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from core.crypto.keyring import reset_keyring
+from core.crypto.payload import (
+    V2_PREFIX,
+    base45_decode,
+    base45_encode,
+    decode_qr_payload,
+)
+from core.crypto.qr_generator import QRVerifier, SecureQRGenerator
+from core.crypto.signers import get_signer
+
+
+def _write_ed25519_pair(directory):
+    private_key = get_signer("ed25519").generate_private_key()
+    private_path = os.path.join(directory, "ed_private.pem")
+    public_path = os.path.join(directory, "ed_public.pem")
+    with open(private_path, "wb") as f:
+        f.write(
+            private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+    with open(public_path, "wb") as f:
+        f.write(
+            private_key.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+        )
+    return private_path, public_path
+
+
+class SignatureAlgorithmTestCase(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        private_path, public_path = _write_ed25519_pair(self.tmpdir.name)
+        keys = dict(settings.QR_SIGNING_KEYS)
+        keys["ed-test"] = {
+            "algorithm": "ed25519",
+            "private_key_path": private_path,
+            "public_key_path": public_path,
+        }
+        self.settings_override = override_settings(QR_SIGNING_KEYS=keys)
+        self.settings_override.enable()
+        reset_keyring()
+        self.user = SimpleNamespace(id=uuid.uuid4())
+
+    def tearDown(self):
+        self.settings_override.disable()
+        reset_keyring()
+        self.tmpdir.cleanup()
+
+    def test_ed25519_signature_is_recorded_and_smaller(self):
+        """L'algorithme de la clé est inscrit dans le payload v1 et v2"""
+        rsa_code = SecureQRGenerator(key_id="rsa-1").generate(self.user)
+        ed_code = SecureQRGenerator(key_id="ed-test").generate(self.user)
+
+        self.assertEqual(ed_code["signature_algorithm"], "ed25519")
+        self.assertEqual(ed_code["qr_data"]["alg"], "ed25519")
+        self.assertEqual(decode_qr_payload(ed_code["qr_payload"])["alg"], "ed25519")
+        self.assertEqual(
+            decode_qr_payload(rsa_code["qr_payload"])["alg"], "rsa-pss-sha256"
+        )
+        self.assertLess(len(ed_code["qr_payload"]), len(rsa_code["qr_payload"]) - 200)
+
+    def test_signature_verified_per_key(self):
+        """Chaque signature est vérifiée avec l'algorithme de sa clé"""
+        verifier = QRVerifier()
+        for key_id in ("rsa-1", "ed-test"):
+            qr_data = SecureQRGenerator(key_id=key_id).generate(self.user)["qr_data"]
+            self.assertTrue(
+                verifier._verify_signature(
+                    qr_data["data"],
+                    qr_data["sig"],
+                    qr_data["kid"],
+                    qr_data["alg"],
+                    unique_code=qr_data["id"],
+                ),
+                key_id,
+            )
+
+    def test_algorithm_mismatch_rejected(self):
+        """Un alg de payload qui contredit la clé est refusé"""
+        qr_data = SecureQRGenerator(key_id="ed-test").generate(self.user)["qr_data"]
+
+        self.assertFalse(
+            QRVerifier()._verify_signature(
+                qr_data["data"],
+                qr_data["sig"],
+                "ed-test",
+                "rsa-pss-sha256",
+                unique_code=qr_data["id"],
+            )
+        )
+        self.assertFalse(
+            QRVerifier()._verify_signature(
+                qr_data["data"], qr_data["sig"], "rsa-1", unique_code=qr_data["id"]
+            )
+        )
+
+    def test_legacy_v2_envelope_still_decodes(self):
+        """Les enveloppes 0x02 (sans octet alg) restent lisibles"""
+        payload = SecureQRGenerator(key_id="rsa-1", payload_format="v2").generate(
+            self.user
+        )["qr_payload"]
+        raw = base45_decode(payload[len(V2_PREFIX) :])
+        legacy = V2_PREFIX + base45_encode(b"\x02" + raw[2:])
+
+        decoded = decode_qr_payload(legacy)
+        self.assertIsNone(decoded["alg"])
+        self.assertEqual(decoded["sig"], decode_qr_payload(payload)["sig"])
@@ -0,0 +1,153 @@
+import os
+import tempfile
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.qr_codes.models import QRCode
+from apps.qr_codes.services.status import change_qr_status
+from apps.qr_codes.services.status_index import (
+    StatusIndex,
+    build_status_index,
+    get_status_index,
+    reset_status_index,
+)
+from apps.qr_codes.tests.base import QRCodeTestMixin
+from core.crypto.qr_generator import QRVerifier, VerificationContext
+
+
+class StatusIndexTestCase(QRCodeTestMixin, TestCase):
+
+    username = "index"
+    issue_code = False
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "qr_status.idx")
+        settings_override = override_settings(QR_STATUS_INDEX_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(reset_status_index)
+        reset_status_index()
+        super().setUp()
+        self.qr_code = self._create("ST-CI-2026-00000001")
+
+    def _create(self, unique_code, **kwargs):
+        return QRCode.objects.create(
+            unique_code=unique_code,
+            user=self.user,
+            encrypted_data="x",
+            signature="x",
+            expires_at=kwargs.pop("expires_at", timezone.now() + timedelta(days=30)),
+            **kwargs,
+        )
+
+    def _rebuild(self, **kwargs):
+        count = build_status_index(**kwargs)
+        reset_status_index()
+        return count
+
+    def _check(self, unique_code):
+        """Étapes status à response, pour un code seul (URL courte)"""
+        return QRVerifier().run(
+            VerificationContext.for_code(unique_code),
+            stages=("status", "record", "response"),
+        )
+
+    def test_lookup(self):
+        """L'index donne le statut et l'id de chaque code"""
+        self._create("ST-CI-2026-00000002", status=QRCode.Status.SUSPENDED)
+        self.assertEqual(self._rebuild(), 2)
+
+        entry = get_status_index().lookup(self.qr_code.unique_code)
+        self.assertEqual(entry.status, QRCode.Status.ACTIVE)
+        self.assertEqual(entry.qr_code_id, self.qr_code.pk)
+        self.assertIsNone(entry.error())
+        self.assertEqual(
+            get_status_index().lookup("ST-CI-2026-00000002").error(),
+            "QR code is suspended",
+        )
+        self.assertIsNone(get_status_index().lookup("ST-CI-2026-FFFFFFFF"))
+
+    def test_revoked_code_rejected_without_query(self):
+        """Un code révoqué dans l'index est refusé sans requête"""
+        change_qr_status(
+            QRCode.objects.filter(pk=self.qr_code.pk), QRCode.Status.REVOKED
+        )
+        self._rebuild()
+
+        with self.assertNumQueries(0):
+            context = self._check(self.qr_code.unique_code)
+
+        self.assertEqual(context.result["error"], "QR code is revoked")
+        self.assertEqual(context.qr_code_id, self.qr_code.pk)
+        self.assertNotIn("record", context.timings)
+
+    def test_expired_by_date_rejected(self):
+        """Un code actif dont la date est passée est refusé par l'index"""
+        QRCode.objects.filter(pk=self.qr_code.pk).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self._rebuild(full=True)
+
+        entry = get_status_index().lookup(self.qr_code.unique_code)
+        self.assertEqual(entry.status, QRCode.Status.ACTIVE)
+        self.assertIsNotNone(entry.error())
+
+    def test_stale_after_status_change_until_rebuilt(self):
+        """Un changement de statut rend l'index périmé jusqu'à sa reconstruction"""
+        self._rebuild()
+        self.assertIsNotNone(get_status_index().lookup(self.qr_code.unique_code))
+
+        change_qr_status(
+            QRCode.objects.filter(pk=self.qr_code.pk), QRCode.Status.SUSPENDED
+        )
+        self.assertFalse(get_status_index().is_fresh())
+        self.assertIsNone(get_status_index().lookup(self.qr_code.unique_code))
+
+        self._rebuild()
+        entry = get_status_index().lookup(self.qr_code.unique_code)
+        self.assertEqual(entry.status, QRCode.Status.SUSPENDED)
+
+    def test_incremental_rebuild(self):
+        """Une reconstruction incrémentale ne relit que les codes récents"""
+        self._rebuild()
+        self._create("ST-CI-2026-00000002")
+
+        with CaptureQueriesContext(connection) as queries:
+            count = build_status_index()
+
+        self.assertEqual(count, 2)
+        self.assertEqual(len(queries), 1)
+        self.assertIn("status_changed_at", queries[0]["sql"])
+        reset_status_index()
+        self.assertIsNotNone(get_status_index().lookup("ST-CI-2026-00000002"))
+
+    def test_reader_reloads_replaced_file(self):
+        """Le lecteur recharge un fichier remplacé"""
+        build_status_index()
+        reader = StatusIndex(self.path, max_age=300, check_interval=0)
+        self.assertIsNone(reader.lookup("ST-CI-2026-00000002"))
+
+        self._create("ST-CI-2026-00000002")
+        build_status_index(full=True)
+
+        self.assertIsNotNone(reader.lookup("ST-CI-2026-00000002"))
+
+    def test_too_old_index_ignored(self):
+        """Un index trop ancien est ignoré"""
+        build_status_index()
+        reader = StatusIndex(self.path, max_age=0, check_interval=0)
+
+        self.assertFalse(reader.is_fresh())
+        self.assertIsNone(reader.lookup(self.qr_code.unique_code))
+
+    def test_missing_index_falls_back_to_database(self):
+        """Sans index, le statut est lu en base"""
+        context = self._check(self.qr_code.unique_code)
+
+        self.assertTrue(context.result["valid"])
+        self.assertEqual(context.qr_code, self.qr_code)
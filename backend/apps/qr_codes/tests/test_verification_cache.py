@@ -0,0 +1,133 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from rest_framework import status
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from apps.qr_codes.models import QRCode, QRVerification
+from apps.qr_codes.services.status_index import build_status_index, reset_status_index
+from apps.qr_codes.services.verification_cache import (
+    RESPONSE_PREFIX,
+    SIGNATURE_PREFIX,
+    cached_verify,
+    invalidate_verification_cache,
+    payload_digest,
+)
+from apps.qr_codes.tasks import mark_expired_qr_codes
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+from core.crypto.payload import decode_qr_payload, encode_qr_payload
+from core.crypto.qr_generator import QRVerifier
+
+
+class VerificationCacheTestCase(QRCodeAPITestCase):
+
+    username = "cache"
+
+    def _verify(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/qr-codes/verify/verify/", {"qr_data": self.payload}, format="json"
+            )
+
+    def test_repeated_scan_served_from_cache(self):
+        """Un second scan ne refait ni la vérification RSA ni la requête"""
+        with mock.patch.object(
+            QRVerifier,
+            "_verify_signature",
+            autospec=True,
+            side_effect=QRVerifier._verify_signature,
+        ) as verify_signature, mock.patch.object(
+            QRVerifier,
+            "stage_record",
+            autospec=True,
+            side_effect=QRVerifier.stage_record,
+        ) as stage_record:
+            first = self._verify()
+            second = self._verify()
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertTrue(first.data["valid"])
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(verify_signature.call_count, 1)
+        self.assertEqual(stage_record.call_count, 1)
+        self.assertEqual(QRVerification.objects.filter(qr_code=self.qr_code).count(), 2)
+
+    def test_revoke_invalidates(self):
+        """La révocation via l'API invalide la réponse en cache"""
+        self.assertTrue(self._verify().data["valid"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/qr-codes/{self.qr_code.id}/revoke/")
+
+        response = self._verify()
+        self.assertFalse(response.data["valid"])
+        self.assertEqual(response.data["error"], "QR code is revoked")
+
+    def test_response_read_before_status_change_not_cached(self):
+        """Une lecture en base antérieure à l'invalidation n'est pas mise en cache"""
+        stage_record = QRVerifier.stage_record
+
+        def read_then_revoke(verifier, context):
+            stage_record(verifier, context)
+            # Révocation validée et invalidée pendant la vérification
+            invalidate_verification_cache([context.code])
+
+        with mock.patch.object(
+            QRVerifier, "stage_record", autospec=True, side_effect=read_then_revoke
+        ):
+            self.assertTrue(cached_verify(self.payload).result["valid"])
+
+        self.assertIsNone(cache.get(RESPONSE_PREFIX + self.qr_code.unique_code))
+
+    def test_expiry_task_invalidates(self):
+        """mark_expired_qr_codes invalide aussi le cache"""
+        self.assertTrue(self._verify().data["valid"])
+        QRCode.objects.filter(pk=self.qr_code.pk).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_expired_qr_codes()
+
+        self.assertEqual(self._verify().data["error"], "QR code is expired")
+
+    def test_invalid_signature_not_cached(self):
+        """Un payload falsifié est refusé à chaque fois, sans entrée en cache"""
+        qr_data = decode_qr_payload(self.payload)
+        forged = encode_qr_payload({**qr_data, "sig": qr_data["data"]}, "v2")
+        with mock.patch.object(
+            QRVerifier,
+            "stage_signature",
+            autospec=True,
+            side_effect=QRVerifier.stage_signature,
+        ) as stage_signature:
+            for _ in range(2):
+                response = self.client.post(
+                    "/api/qr-codes/verify/verify/", {"qr_data": forged}, format="json"
+                )
+                self.assertFalse(response.data["valid"])
+
+        self.assertEqual(stage_signature.call_count, 2)
+        self.assertIsNone(cache.get(SIGNATURE_PREFIX + payload_digest(forged)))
+
+    def test_status_index_overrides_cached_response(self):
+        """Un code inactif d'après l'index n'est plus servi depuis le cache"""
+        self.assertTrue(self._verify().data["valid"])
+        # Changement sans invalidation (autre machine, SQL direct)
+        QRCode.objects.filter(pk=self.qr_code.pk).update(
+            status=QRCode.Status.SUSPENDED, status_changed_at=timezone.now()
+        )
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            QR_STATUS_INDEX_PATH=os.path.join(tmp, "qr_status.idx")
+        ):
+            reset_status_index()
+            self.addCleanup(reset_status_index)
+            build_status_index()
+            response = self._verify()
+
+        self.assertFalse(response.data["valid"])
+        self.assertEqual(response.data["error"], "QR code is suspended")
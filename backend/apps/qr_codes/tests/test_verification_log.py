@@ -0,0 +1,142 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.qr_codes.models import QRCode, QRVerification
+from apps.qr_codes.services.verification_log import VerificationBuffer
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+
+User = get_user_model()
+
+
+def _count(queries, statement):
+    return sum(1 for query in queries if query["sql"].startswith(statement))
+
+
+class VerificationBufferTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="buffer", email="buffer@example.com", password="testpass123"
+        )
+        self.qr_codes = [
+            QRCode.objects.create(
+                unique_code=f"ST-CI-2026-0000000{i}",
+                user=self.user,
+                encrypted_data="x",
+                signature="x",
+                expires_at=timezone.now() + timedelta(days=30),
+            )
+            for i in range(2)
+        ]
+        self.buffer = VerificationBuffer(flush_interval=60, flush_size=100, max_size=5)
+
+    def test_add_does_not_write(self):
+        """Ajouter au tampon n'écrit rien en base"""
+        with self.assertNumQueries(0):
+            self.buffer.add(self.qr_codes[0].pk, True, "127.0.0.1", "test")
+
+        self.assertEqual(len(self.buffer), 1)
+        self.assertFalse(QRVerification.objects.exists())
+
+    def test_flush_coalesces_last_verified_at(self):
+        """Un bulk_create et une seule mise à jour pour tous les codes"""
+        first, second = self.qr_codes
+        for qr_code in (first, first, second, first):
+            self.buffer.add(qr_code.pk, True, "127.0.0.1")
+        latest = self.buffer._last_verified[first.pk]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.buffer.flush(), 4)
+
+        self.assertEqual(_count(queries, "INSERT"), 1)
+        self.assertEqual(_count(queries, 'UPDATE "qr_codes"'), 1)
+        # Compteurs : une mise à jour par propriétaire, pas par vérification
+        self.assertEqual(_count(queries, 'UPDATE "qr_code_counters"'), 1)
+        self.assertEqual(QRVerification.objects.filter(qr_code=first).count(), 3)
+        self.assertEqual(QRVerification.objects.filter(qr_code=second).count(), 1)
+        first.refresh_from_db()
+        self.assertEqual(first.last_verified_at, latest)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_bounded(self):
+        """Au-delà de max_size, les plus anciens événements sont abandonnés"""
+        for _ in range(7):
+            self.buffer.add(self.qr_codes[0].pk, True)
+
+        self.assertEqual(len(self.buffer), 5)
+        self.assertEqual(self.buffer.dropped, 2)
+
+    def test_deleted_code_skipped(self):
+        """Les vérifications d'un code supprimé sont abandonnées"""
+        self.buffer.add(self.qr_codes[0].pk, True)
+        self.buffer.add(self.qr_codes[1].pk, False)
+        self.qr_codes[1].delete()
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(QRVerification.objects.count(), 1)
+
+    def test_failed_flush_requeued(self):
+        """Un vidage en échec remet les entrées dans le tampon"""
+        self.buffer.add(self.qr_codes[0].pk, True)
+
+        with mock.patch.object(
+            QRVerification.objects, "bulk_create", side_effect=DatabaseError
+        ):
+            self.assertEqual(self.buffer.flush(), 0)
+
+        self.assertEqual(len(self.buffer), 1)
+        self.assertEqual(self.buffer.flush(), 1)
+
+    def test_stop_flushes(self):
+        """L'arrêt vide le tampon"""
+        self.buffer.add(self.qr_codes[0].pk, True)
+        self.buffer.stop()
+
+        self.assertEqual(QRVerification.objects.count(), 1)
+
+
+class BufferedVerifyTestCase(QRCodeAPITestCase):
+
+    username = "scan"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=None)
+
+        self.buffer = VerificationBuffer(
+            flush_interval=60, flush_size=100, max_size=100
+        )
+        patcher = mock.patch(
+            "apps.qr_codes.services.verification_log.get_verification_buffer",
+            return_value=self.buffer,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_verify_is_write_free(self):
+        """Le scan public ne fait plus que des lectures"""
+        self.client.post(
+            "/api/qr-codes/verify/verify/", {"qr_data": self.payload}, format="json"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/qr-codes/verify/verify/",
+                {"qr_data": self.payload},
+                format="json",
+                HTTP_USER_AGENT="scanner",
+            )
+
+        self.assertTrue(response.data["valid"])
+        self.assertEqual(_count(queries, "INSERT") + _count(queries, "UPDATE"), 0)
+        self.assertFalse(QRVerification.objects.exists())
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(QRVerification.objects.filter(user_agent="scanner").count(), 1)
+        self.qr_code.refresh_from_db()
+        self.assertIsNotNone(self.qr_code.last_verified_at)
@@ -0,0 +1,166 @@
+import base64
+import json
+import os
+import tempfile
+from unittest import mock
+
+from rest_framework import status
+from django.test import SimpleTestCase, override_settings
+from apps.qr_codes.models import QRCode, QRVerification
+from apps.qr_codes.services.status import change_qr_status
+from apps.qr_codes.services.status_index import build_status_index, reset_status_index
+from apps.qr_codes.services.verification_cache import cached_verify
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+from core.crypto.qr_generator import QRVerifier
+from core.utils.metrics import Histogram, registry, server_timing
+
+URL = "/api/qr-codes/verify/verify/"
+
+
+class HistogramTestCase(SimpleTestCase):
+
+    def test_quantiles(self):
+        """Les quantiles sont estimés à la précision des seaux"""
+        histogram = Histogram()
+        for _ in range(98):
+            histogram.observe(0.001)
+        histogram.observe(0.5)
+        histogram.observe(0.5)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 100)
+        # Borne du seau, à ~12 % près
+        self.assertAlmostEqual(snapshot["p50_ms"], 1.0, delta=0.13)
+        self.assertAlmostEqual(snapshot["p99_ms"], 500.0, delta=60)
+        self.assertEqual(snapshot["max_ms"], 500.0)
+
+    def test_server_timing(self):
+        """Durées des étapes au format Server-Timing, en millisecondes"""
+        self.assertEqual(
+            server_timing({"decode": 0.0001, "signature": 0.0025}),
+            "decode;dur=0.100, signature;dur=2.500",
+        )
+
+
+class VerificationPipelineTestCase(QRCodeAPITestCase):
+
+    username = "pipeline"
+
+    def setUp(self):
+        registry.reset()
+        super().setUp()
+
+    def _forged(self, **fields):
+        qr_data = {"id": self.qr_code.unique_code, "data": "eA==", "sig": "eA=="}
+        qr_data.update(fields)
+        return base64.b64encode(json.dumps(qr_data).encode()).decode()
+
+    def test_stages_and_context(self):
+        """Toutes les étapes sont chronométrées, dans l'ordre"""
+        context = cached_verify(self.payload)
+
+        self.assertTrue(context.result["valid"])
+        self.assertEqual(context.qr_code, self.qr_code)
+        self.assertEqual(
+            list(context.timings),
+            [
+                "decode",
+                "format",
+                "filter",
+                "status",
+                "signature",
+                "cache",
+                "record",
+                "response",
+            ],
+        )
+        self.assertEqual(registry.histogram("qr_verify.signature").count, 1)
+
+    def test_server_timing_header(self):
+        """La réponse porte l'en-tête Server-Timing"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(URL, {"qr_data": self.payload}, format="json")
+
+        self.assertTrue(response.data["valid"])
+        self.assertIn("signature;dur=", response["Server-Timing"])
+        self.assertIn("response;dur=", response["Server-Timing"])
+
+    def test_unknown_key_rejected_before_signature(self):
+        """Une clé inconnue est refusée avant la signature"""
+        with mock.patch.object(QRVerifier, "_verify_message") as verify_message:
+            with self.assertNumQueries(0):
+                context = cached_verify(self._forged(kid="unknown"))
+
+        self.assertEqual(context.result["error"], "Invalid signature")
+        self.assertNotIn("signature", context.timings)
+        verify_message.assert_not_called()
+
+    def test_malformed_payload_rejected(self):
+        """Un payload incomplet s'arrête au contrôle de format"""
+        context = cached_verify(self._forged(sig=None))
+
+        self.assertEqual(context.result["error"], "Invalid QR code format")
+        self.assertEqual(list(context.timings), ["decode", "format"])
+
+    def test_forged_signature_costs_no_query(self):
+        """Une signature forgée est refusée sans requête"""
+        with self.assertNumQueries(0):
+            context = cached_verify(self._forged())
+
+        self.assertEqual(context.result["error"], "Invalid signature")
+
+    def test_revoked_in_index_skips_signature(self):
+        """Un code révoqué dans l'index n'est pas vérifié cryptographiquement"""
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            QR_STATUS_INDEX_PATH=os.path.join(tmp, "qr_status.idx")
+        ):
+            self.addCleanup(reset_status_index)
+            change_qr_status(
+                QRCode.objects.filter(pk=self.qr_code.pk), QRCode.Status.REVOKED
+            )
+            build_status_index()
+            reset_status_index()
+
+            with mock.patch.object(QRVerifier, "_verify_message") as verify_message:
+                context = cached_verify(self.payload)
+
+        self.assertEqual(context.result["error"], "QR code is revoked")
+        # Payload non encore authentifié : le code n'est pas retenu
+        self.assertIsNone(context.qr_code_id)
+        verify_message.assert_not_called()
+
+    def test_forged_payload_for_revoked_code_not_recorded(self):
+        """Un payload forgé portant un code révoqué n'est pas journalisé"""
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            QR_STATUS_INDEX_PATH=os.path.join(tmp, "qr_status.idx")
+        ):
+            self.addCleanup(reset_status_index)
+            change_qr_status(
+                QRCode.objects.filter(pk=self.qr_code.pk), QRCode.Status.REVOKED
+            )
+            build_status_index()
+            reset_status_index()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    URL, {"qr_data": self._forged()}, format="json"
+                )
+
+        self.assertEqual(response.data["error"], "QR code is revoked")
+        self.assertFalse(QRVerification.objects.exists())
+        self.qr_code.refresh_from_db()
+        self.assertEqual(self.qr_code.verification_count, 0)
+
+    def test_metrics_endpoint_admin_only(self):
+        """Les métriques sont réservées aux administrateurs"""
+        cached_verify(self.payload)
+
+        response = self.client.get("/api/qr-codes/verify/metrics/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/api/qr-codes/verify/metrics/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["stages"]["qr_verify.record"]["count"], 1)
+        self.assertIn("p99_ms", response.data["stages"]["qr_verify.signature"])
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.qr_codes.models import QRCode, QRVerification
+from apps.qr_codes.services.renditions import Rendition
+from apps.qr_codes.tests.base import QRCodeAPITestCase
+from core.crypto.qr_generator import QRVerifier
+
+URL = "/api/qr-codes/verify/batch/"
+
+
+class VerifyBatchTestCase(QRCodeAPITestCase):
+
+    username = "lot"
+    issue_code = False
+
+    def setUp(self):
+        super().setUp()
+        response = self.client.post("/api/qr-codes/bulk/", {"count": 3}, format="json")
+        self.qr_codes = [
+            QRCode.objects.get(pk=item["id"]) for item in response.data["results"]
+        ]
+        self.payloads = [Rendition(qr).payload() for qr in self.qr_codes]
+
+    def test_results_in_input_order(self):
+        """Les résultats suivent l'ordre des payloads reçus"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/qr-codes/{self.qr_codes[1].id}/revoke/")
+        forged = self.payloads[0][:-4] + (
+            "AAAA" if self.payloads[0][-4:] != "AAAA" else "BBBB"
+        )
+        qr_data = [self.payloads[2], "not a payload", self.payloads[1], forged]
+
+        with mock.patch.object(
+            QRVerifier,
+            "load_records",
+            autospec=True,
+            side_effect=QRVerifier.load_records,
+        ) as load_records:
+            response = self.client.post(URL, {"qr_data": qr_data}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(len(results), 4)
+        self.assertTrue(results[0]["valid"])
+        self.assertEqual(results[0]["data"]["id"], self.qr_codes[2].unique_code)
+        self.assertFalse(results[1]["valid"])
+        self.assertEqual(results[2]["error"], "QR code is revoked")
+        self.assertFalse(results[3]["valid"])
+        # Un seul passage en base pour tous les codes
+        self.assertEqual(load_records.call_count, 1)
+
+        self.assertEqual(QRVerification.objects.count(), 2)
+        self.assertTrue(QRVerification.objects.get(qr_code=self.qr_codes[2]).is_valid)
+
+    def test_single_lookup_query(self):
+        """Tout le lot est chargé en une requête et journalisé en une insertion"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(URL, {"qr_data": self.payloads}, format="json")
+
+        self.assertTrue(all(result["valid"] for result in response.data["results"]))
+        lookups = [
+            query
+            for query in queries
+            if query["sql"].startswith("SELECT")
+            and '"qr_codes"."unique_code" IN' in query["sql"]
+        ]
+        self.assertEqual(len(lookups), 1)
+        inserts = [
+            query
+            for query in queries
+            if query["sql"].startswith('INSERT INTO "qr_verifications"')
+        ]
+        self.assertEqual(len(inserts), 1)
+
+    def test_requires_authentication(self):
+        """La vérification par lot est réservée aux utilisateurs authentifiés"""
+        self.client.force_authenticate(user=None)
+        response = self.client.post(URL, {"qr_data": self.payloads}, format="json")
+        self.assertIn(
+            response.status_code,
+            (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN),
+        )
+
+    def test_empty_rejected(self):
+        """Un lot vide est refusé"""
+        response = self.client.post(URL, {"qr_data": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -5,9 +5,13 @@ from . import views
 app_name = "qr_codes"
 
 router = DefaultRouter()
+# Enregistré avant "" pour ne pas être capturé par la route détail des QR codes
+router.register(r"jobs", views.QRIssuanceJobViewSet, basename="qr-issuance-jobs")
 router.register(r"", views.QRCodeViewSet, basename="qr-codes")
 router.register(r"verify", views.QRVerificationView, basename="qr-verification")
 
 urlpatterns = [
+    # Vérification publique native ASGI (même réponse que verify/verify/)
+    path("verify/async/", views.verify_async, name="qr-verify-async"),
     path("", include(router.urls)),
 ]
@@ -1,15 +1,86 @@
-from rest_framework import viewsets, status
+import hashlib
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
-from django.db.models import Count, Q
-from django.core.files.base import ContentFile
+from django.utils.cache import (
+    add_never_cache_headers,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import parse_etags
+from django.conf import settings
+from django.db import transaction
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .models import QRCode, QRVerification, QRCodeTemplate, QRIssuanceJob
+from .serializers import (
+    QRCodeSerializer,
+    QRVerificationSerializer,
+    QRCodeBulkCreateSerializer,
+    QRIssuanceJobSerializer,
+    QRImageQuerySerializer,
+    QRVerifyBatchSerializer,
+    QROfflineBundleQuerySerializer,
+    QRStatisticsQuerySerializer,
+)
+from .services.admission import (
+    admission_stats,
+    admit,
+    check_code_rate_limit,
+    release,
+)
+from .services.code_filter import get_code_filter
+from .services.counters import get_counters
+from .services.issuance import issue_qr_codes
+from .services.offline_bundle import build_bundle
+from .services.renditions import Rendition, get_rendition_content
+from .services.status import change_qr_status
+from .services.verification_cache import (
+    acached_verify,
+    cached_verify,
+    cached_verify_code,
+    cached_verify_many,
+)
+from .services.verification_log import (
+    record_verification,
+    record_verification_soon,
+    record_verifications,
+)
+from .tasks import run_qr_issuance_job
+from apps.companies.models import Company
+from core.crypto.pool import get_crypto_pool
+from core.pagination import CreatedAtCursorPagination, VerifiedAtCursorPagination
+from core.exceptions import RateLimitError, ServiceUnavailableError
+from core.utils.metrics import registry as metrics, server_timing
+from core.utils.network import get_client_ip
+
 
-from .models import QRCode, QRVerification, QRCodeTemplate
-from .serializers import QRCodeSerializer, QRVerificationSerializer
-from core.crypto.qr_generator import SecureQRGenerator, QRVerifier
-from apps.audit.models import AuditLog
+def retry_later_response(exc, response_class=Response):
+    """
+    Réponse 503 (service saturé) ou 429 (limite de débit) + Retry-After,
+    ou None pour les autres exceptions
+    """
+    if isinstance(exc, ServiceUnavailableError):
+        status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    elif isinstance(exc, RateLimitError):
+        status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    else:
+        return None
+    return response_class(
+        {"error": exc.message},
+        status=status_code,
+        headers={"Retry-After": str(exc.details["retry_after"])},
+    )
 
 
 class QRCodeViewSet(viewsets.ModelViewSet):
@@ -17,92 +88,178 @@ class QRCodeViewSet(viewsets.ModelViewSet):
 
     serializer_class = QRCodeSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
-        """Filtre les QR codes par utilisateur"""
-        return (
-            QRCode.objects.filter(user=self.request.user)
-            .select_related("company")
-            .prefetch_related("verifications")
-        )
+        """
+        Filtre les QR codes par utilisateur
+
+        Pas de prefetch des vérifications : verification_count et
+        last_verified_at sont des colonnes, l'historique est paginé
+        (action verifications).
+        """
+        return QRCode.objects.filter(user=self.request.user).select_related("company")
+
+    def handle_exception(self, exc):
+        """Pool de génération saturé : 503 + Retry-After"""
+        return retry_later_response(exc) or super().handle_exception(exc)
 
     def create(self, request):
         """Génère un nouveau QR code"""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Générer QR sécurisé
-        generator = SecureQRGenerator()
-        company = serializer.validated_data.get("company")
-
-        qr_result = generator.generate(
-            user=request.user, company=company, expires_days=365
+        (qr_code,) = issue_qr_codes(
+            user=request.user,
+            items=[
+                {
+                    "company": serializer.validated_data.get("company"),
+                    "expires_days": 365,
+                }
+            ],
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+            crypto_pool=get_crypto_pool(),
         )
 
-        # Sauvegarder en base
-        qr_code = QRCode.objects.create(
+        return Response(QRCodeSerializer(qr_code).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Génère un lot de QR codes en un seul appel"""
+        serializer = QRCodeBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        qr_codes = issue_qr_codes(
             user=request.user,
-            company=company,
-            unique_code=qr_result["unique_code"],
-            encrypted_data=qr_result["encrypted_data"],
-            signature=qr_result["signature"],
-            hash_value=qr_result["hash_value"],
-            salt=qr_result["salt"],
-            expires_at=qr_result["expires_at"],
+            items=serializer.get_items(),
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+            crypto_pool=get_crypto_pool(),
         )
 
-        # Sauvegarder image
-        qr_code.qr_image.save(
-            f"{qr_code.unique_code}.png", ContentFile(qr_result["qr_image"])
+        return Response(
+            {
+                "count": len(qr_codes),
+                "results": QRCodeSerializer(qr_codes, many=True).data,
+            },
+            status=status.HTTP_201_CREATED,
         )
 
-        # Log audit
-        AuditLog.objects.create(
-            user=request.user,
-            action=AuditLog.Action.QR_GENERATED,
-            entity_type="QRCode",
-            entity_id=qr_code.id,
-            ip_address=self.get_client_ip(request),
+    @action(detail=True, methods=["get"])
+    def image(self, request, pk=None):
+        """
+        Image du QR code, rendue au premier appel puis servie depuis le cache
+
+        Query params : output (png, png-mono, svg), size (px/module), border,
+        fill, back, dpi et module_mm (impression), payload (v1, v2, url).
+        """
+        qr_code = self.get_object()
+        params = QRImageQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        rendition = Rendition(
+            qr_code,
+            format=params.validated_data["output"],
+            box_size=params.validated_data["size"],
+            border=params.validated_data["border"],
+            fill_color=params.validated_data["fill"],
+            back_color=params.validated_data["back"],
+            dpi=params.validated_data.get("dpi"),
+            module_mm=params.validated_data.get("module_mm"),
+            payload_format=params.validated_data.get("payload"),
         )
 
-        return Response(QRCodeSerializer(qr_code).data, status=status.HTTP_201_CREATED)
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and (
+            if_none_match.strip() == "*" or rendition.etag in parse_etags(if_none_match)
+        ):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif rendition.too_large:
+            raise ValidationError(
+                f"Image larger than {settings.QR_RENDER_MAX_SIDE} pixels per side"
+            )
+        else:
+            response = HttpResponse(
+                get_rendition_content(rendition), content_type=rendition.content_type
+            )
+
+        response["ETag"] = rendition.etag
+        patch_cache_control(
+            response, private=True, max_age=settings.QR_IMAGE_CACHE_MAX_AGE
+        )
+        return response
+
+    @action(detail=True, methods=["get"])
+    def verifications(self, request, pk=None):
+        """Historique paginé des vérifications du QR code, plus récentes d'abord"""
+        qr_code = self.get_object()
+        paginator = VerifiedAtCursorPagination()
+        page = paginator.paginate_queryset(
+            QRVerification.objects.filter(qr_code=qr_code), request, view=self
+        )
+        serializer = QRVerificationSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=["post"])
     def revoke(self, request, pk=None):
         """Révoque un QR code"""
         qr_code = self.get_object()
-        qr_code.status = QRCode.Status.REVOKED
-        qr_code.revoked_at = timezone.now()
-        qr_code.save()
+        change_qr_status(QRCode.objects.filter(pk=qr_code.pk), QRCode.Status.REVOKED)
 
         return Response({"status": "revoked"})
 
     @action(detail=False, methods=["get"])
     def statistics(self, request):
-        """Statistiques des QR codes"""
-        queryset = self.get_queryset()
-
-        stats = {
-            "total": queryset.count(),
-            "active": queryset.filter(status=QRCode.Status.ACTIVE).count(),
-            "revoked": queryset.filter(status=QRCode.Status.REVOKED).count(),
-            "expired": queryset.filter(status=QRCode.Status.EXPIRED).count(),
-            "verifications_today": QRVerification.objects.filter(
-                qr_code__user=request.user,
-                verified_at__date=timezone.now().date(),
-            ).count(),
-        }
-
-        return Response(stats)
-
-    def get_client_ip(self, request):
-        """Récupère l'IP du client"""
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(",")[0]
-        else:
-            ip = request.META.get("REMOTE_ADDR")
-        return ip
+        """
+        Statistiques des QR codes de l'utilisateur, ou de l'entreprise
+        ?company=<id> dont il est membre
+
+        Lues dans les compteurs tenus à jour (une requête)
+        """
+        query = QRStatisticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        company_id = query.validated_data.get("company")
+        if company_id:
+            company = get_object_or_404(
+                Company.objects.filter(
+                    members__user=request.user, members__is_active=True
+                ).distinct(),
+                pk=company_id,
+            )
+            return Response(get_counters(company=company))
+
+        return Response(get_counters(user=request.user))
+
+
+class QRIssuanceJobViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """API des jobs d'émission asynchrones"""
+
+    serializer_class = QRIssuanceJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return QRIssuanceJob.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        """Crée un job et le confie à Celery"""
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+    def perform_create(self, serializer):
+        job = serializer.save(
+            user=self.request.user,
+            ip_address=get_client_ip(self.request),
+            user_agent=self.request.META.get("HTTP_USER_AGENT", ""),
+        )
+        transaction.on_commit(lambda: run_qr_issuance_job.delay(str(job.id)))
 
 
 class QRVerificationView(viewsets.GenericViewSet):
@@ -110,6 +267,10 @@ class QRVerificationView(viewsets.GenericViewSet):
 
     permission_classes = [AllowAny]
 
+    def handle_exception(self, exc):
+        """Limite de débit : 429, vérification délestée : 503"""
+        return retry_later_response(exc) or super().handle_exception(exc)
+
     @action(detail=False, methods=["post"])
     def verify(self, request):
         """Vérifie un QR code (endpoint public)"""
@@ -121,29 +282,190 @@ class QRVerificationView(viewsets.GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Vérifier QR
-        verifier = QRVerifier()
-        result = verifier.verify(qr_data)
+        # Limite de débit par IP et admission, puis vérification (signature
+        # et réponse servies depuis le cache si possible) ; le seau du code
+        # n'est débité qu'une fois le code authentifié
+        admitted_at = admit(get_client_ip(request))
+        try:
+            context = cached_verify(qr_data)
+        finally:
+            release(admitted_at)
+        check_code_rate_limit(context)
 
-        # Logger la vérification
-        if "data" in result:
-            qr_code = QRCode.objects.get(unique_code=result["data"]["id"])
-
-            QRVerification.objects.create(
-                qr_code=qr_code,
-                is_valid=result["valid"],
-                ip_address=self.get_client_ip(request),
+        # Logger la vérification (et last_verified_at), en différé
+        if context.qr_code_id is not None:
+            record_verification(
+                context.qr_code_id,
+                is_valid=context.result["valid"],
+                ip_address=get_client_ip(request),
                 user_agent=request.META.get("HTTP_USER_AGENT", ""),
             )
 
-            # Mettre à jour last_verified_at
-            qr_code.last_verified_at = timezone.now()
-            qr_code.save(update_fields=["last_verified_at"])
+        response = Response(context.result)
+        response["Server-Timing"] = server_timing(context.timings)
+        return response
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    def batch(self, request):
+        """Vérifie une liste de QR codes (chaînes de traitement, bornes)"""
+        serializer = QRVerifyBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Signatures en parallèle, états lus en une seule requête
+        contexts = cached_verify_many(serializer.validated_data["qr_data"])
+
+        record_verifications(
+            [
+                (context.qr_code_id, context.result["valid"])
+                for context in contexts
+                if context.qr_code_id is not None
+            ],
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+        )
+
+        return Response({"results": [context.result for context in contexts]})
 
-        return Response(result)
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def bundle(self, request):
+        """Clés publiques et liste de révocation signées (terminaux hors ligne)"""
+        query = QROfflineBundleQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        return Response(build_bundle(since=query.validated_data.get("since")))
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def metrics(self, request):
+        """
+        Durées des étapes de vérification (p50, p99), filtre des codes
+        émis, limites de débit et admission, dans ce processus
+        """
+        return Response(
+            {
+                "stages": metrics.snapshot(prefix="qr_verify."),
+                "code_filter": get_code_filter().stats(),
+                **admission_stats(),
+            }
+        )
+
+
+@csrf_exempt
+@require_POST
+async def verify_async(request):
+    """
+    Vérifie un QR code (endpoint public, servi nativement sous ASGI)
+
+    Même réponse que QRVerificationView.verify. Signature et cache passent
+    par le pool de threads de vérification, la lecture par l'ORM asynchrone
+    (qui, sous Django 5.2, occupe encore un thread le temps de la requête
+    SQL) ; voir la commande benchmark_verify_load.
+    """
+    try:
+        qr_data = json.loads(request.body or b"{}").get("qr_data")
+    except (ValueError, AttributeError):
+        qr_data = None
+
+    if not qr_data or not isinstance(qr_data, str):
+        return JsonResponse({"valid": False, "error": "Missing qr_data"}, status=400)
+
+    try:
+        admitted_at = await sync_to_async(admit, thread_sensitive=False)(
+            get_client_ip(request)
+        )
+        try:
+            context = await acached_verify(qr_data)
+        finally:
+            release(admitted_at)
+        await sync_to_async(check_code_rate_limit, thread_sensitive=False)(context)
+    except (RateLimitError, ServiceUnavailableError) as exc:
+        return retry_later_response(exc, response_class=JsonResponse)
+
+    # Journalisation sans attendre l'écriture
+    if context.qr_code_id is not None:
+        record_verification_soon(
+            context.qr_code_id,
+            is_valid=context.result["valid"],
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+        )
+
+    response = JsonResponse(context.result)
+    response["Server-Timing"] = server_timing(context.timings)
+    return response
+
+
+SHORT_URL_TYPES = ["text/html", "application/json"]
+
+
+def short_url_result(result):
+    """Réponse publique de /v/<code> : sans l'email du titulaire"""
+    if not result["valid"]:
+        return result
+    data = {key: value for key, value in result["data"].items() if key != "email"}
+    return {**result, "data": data}
+
+
+def short_url_max_age(result) -> int:
+    """QR_SHORT_URL_MAX_AGE, sans dépasser l'expiration d'un code valide"""
+    max_age = settings.QR_SHORT_URL_MAX_AGE
+    if result["valid"]:
+        expires_at = datetime.fromisoformat(result["data"]["expires_at"])
+        remaining = (expires_at - timezone.now()).total_seconds()
+        max_age = max(0, min(max_age, int(remaining)))
+    return max_age
+
+
+@require_GET
+def verify_short(request, unique_code):
+    """
+    Vérifie un code depuis son URL courte (scan à l'appareil photo)
+
+    Page HTML, ou JSON si Accept le préfère (ou ?output=json). Réponse
+    publique cachable QR_SHORT_URL_MAX_AGE secondes : un CDN ou un proxy
+    sert les scans répétés, puis revalide par If-None-Match. L'ETag dépend
+    du résultat : un changement de statut donne une nouvelle réponse.
+    """
+    if request.GET.get("output") == "json":
+        media_type = "application/json"
+    else:
+        media_type = request.get_preferred_type(SHORT_URL_TYPES) or "text/html"
+
+    try:
+        admitted_at = admit(get_client_ip(request))
+        try:
+            context = cached_verify_code(unique_code)
+        finally:
+            release(admitted_at)
+        check_code_rate_limit(context)
+    except (RateLimitError, ServiceUnavailableError) as exc:
+        response = retry_later_response(exc, response_class=JsonResponse)
+        add_never_cache_headers(response)
+        return response
+
+    if context.qr_code_id is not None:
+        record_verification(
+            context.qr_code_id,
+            is_valid=context.result["valid"],
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+        )
+
+    result = short_url_result(context.result)
+    body = json.dumps(result, sort_keys=True)
+    etag = f'"{hashlib.sha256(f"{media_type}|{body}".encode()).hexdigest()[:32]}"'
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    elif media_type == "application/json":
+        response = HttpResponse(body, content_type="application/json")
+    else:
+        response = render(
+            request, "qr_codes/verify.html", {"code": unique_code, "result": result}
+        )
 
-    def get_client_ip(self, request):
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            return x_forwarded_for.split(",")[0]
-        return request.META.get("REMOTE_ADDR")
+    response["ETag"] = etag
+    response["Server-Timing"] = server_timing(context.timings)
+    patch_cache_control(response, public=True, max_age=short_url_max_age(result))
+    patch_vary_headers(response, ["Accept"])
+    return response
@@ -154,6 +154,24 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    "rebuild-qr-status-index": {
+        "task": "apps.qr_codes.tasks.rebuild_status_index",
+        "schedule": 15.0,
+    },
+    "rebuild-qr-code-filter": {
+        "task": "apps.qr_codes.tasks.rebuild_code_filter",
+        "schedule": 60.0,
+    },
+    "rebuild-qr-counters": {
+        "task": "apps.qr_codes.tasks.rebuild_qr_counters",
+        "schedule": 3600.0,
+    },
+    "fail-stale-qr-issuance-jobs": {
+        "task": "apps.qr_codes.tasks.fail_stale_issuance_jobs",
+        "schedule": 300.0,
+    },
+}
 
 # Cryptography
 ENCRYPTION_KEY = os.environ.get(
@@ -162,6 +180,139 @@ ENCRYPTION_KEY = os.environ.get(
 RSA_PRIVATE_KEY_PATH = BASE_DIR / "keys" / "private.pem"
 RSA_PUBLIC_KEY_PATH = BASE_DIR / "keys" / "public.pem"
 
+# Trousseau de clés de signature QR, indexé par key id.
+# "algorithm" : voir core.crypto.signers.SIGNER_REGISTRY (rsa-pss-sha256 par
+# défaut). Clé Ed25519 : openssl genpkey -algorithm ed25519
+QR_ACTIVE_KEY_ID = os.environ.get("QR_ACTIVE_KEY_ID", "rsa-1")
+# Clé des codes émis sans kid, avant l'introduction du trousseau
+QR_LEGACY_KEY_ID = "rsa-1"
+QR_SIGNING_KEYS = {
+    "rsa-1": {
+        "algorithm": "rsa-pss-sha256",
+        "private_key_path": RSA_PRIVATE_KEY_PATH,
+        "public_key_path": RSA_PUBLIC_KEY_PATH,
+    },
+    "ed25519-1": {
+        "algorithm": "ed25519",
+        "private_key_path": BASE_DIR / "keys" / "ed25519_private.pem",
+        "public_key_path": BASE_DIR / "keys" / "ed25519_public.pem",
+    },
+}
+# KDF des nouveaux codes (voir core.crypto.kdf.KDF_REGISTRY)
+QR_DEFAULT_KDF = os.environ.get("QR_DEFAULT_KDF", "hkdf-sha256")
+# Format du payload encodé dans les nouveaux QR codes ("v1", "v2" ou "url")
+QR_PAYLOAD_FORMAT = os.environ.get("QR_PAYLOAD_FORMAT", "v2")
+# Format "url" : QR_SHORT_URL_BASE/v/<unique_code>. Réponses de GET /v/
+# cachables MAX_AGE secondes (CDN, proxy), revalidées par ETag ensuite
+QR_SHORT_URL_BASE = os.environ.get("QR_SHORT_URL_BASE", "http://localhost:8000")
+QR_SHORT_URL_MAX_AGE = 60
+# Niveau de correction d'erreur des symboles QR (L, M, Q, H)
+QR_ERROR_CORRECTION = "H"
+# Délai (secondes) entre deux contrôles de mtime des fichiers de clés
+QR_KEYRING_CHECK_INTERVAL = 5
+
+# Images QR rendues à la demande et conservées dans le stockage
+QR_RENDITIONS_DIR = "qr_codes/renditions"
+# Côté maximal d'un PNG rendu (pixels, marge comprise) et nombre de
+# renditions conservées par code, les plus récentes
+QR_RENDER_MAX_SIDE = 4096
+QR_RENDITIONS_PER_CODE = 8
+QR_IMAGE_CACHE_MAX_AGE = 86400
+
+# Émission en lot
+QR_BULK_MAX_COUNT = 5000
+QR_BULK_BATCH_SIZE = 500
+# Signature par lot (racine de Merkle) des émissions groupées : une seule
+# opération de clé privée par lot, au prix d'une preuve de log2(n) hachés
+# de 32 octets dans chaque symbole
+QR_MERKLE_BATCH_SIGNING = os.environ.get("QR_MERKLE_BATCH_SIGNING", "False") == "True"
+QR_MERKLE_MIN_BATCH = 32
+# Allocation des unique_code : blocs réservés par processus dans
+# QRCodeSequence, puis permutation à clé (hex ; vide : sous-clé HKDF
+# dérivée de ENCRYPTION_KEY). Ne jamais changer la clé en cours d'année :
+# les codes déjà émis pourraient être réattribués.
+QR_CODE_BLOCK_SIZE = 1000
+QR_CODE_PERMUTATION_KEY = os.environ.get("QR_CODE_PERMUTATION_KEY", "")
+# Pool de processus de génération (core.crypto.pool), par worker gunicorn :
+# workers gunicorn × QR_CRYPTO_POOL_WORKERS au plus égal au nombre de
+# coeurs. 0 : génération dans le thread de la requête
+QR_CRYPTO_POOL_WORKERS = int(os.environ.get("QR_CRYPTO_POOL_WORKERS", "0"))
+# Tâches en attente au-delà desquelles l'API répond 503 + Retry-After
+QR_CRYPTO_POOL_MAX_PENDING = 64
+QR_CRYPTO_POOL_RETRY_AFTER = 5
+
+# Cache de vérification (services.verification_cache) : durée de vie des
+# contrôles de signature et des réponses dans le cache Django, et durée
+# maximale d'une entrée dans le LRU local de chaque processus
+QR_VERIFY_SIGNATURE_TTL = 86400
+QR_VERIFY_CACHE_TTL = 300
+QR_VERIFY_LOCAL_TTL = 5
+QR_VERIFY_LOCAL_SIZE = 4096
+# Proxys de confiance devant l'application (répartiteur, CDN). L'adresse du
+# client est la N-ième de X-Forwarded-For en partant de la droite ; 0 :
+# REMOTE_ADDR, l'en-tête étant alors entièrement fourni par le client
+TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", "0"))
+# Endpoint public de vérification (services.admission) : seaux à jetons
+# par IP et par unique_code (jetons par seconde, capacité ; 0 désactive ;
+# le seau d'un code n'est débité que par ses vérifications valides), puis
+# délestage au-delà de MAX_IN_FLIGHT requêtes en cours par processus ou
+# d'une latence moyenne de LATENCY_TARGET secondes (0 désactive)
+QR_VERIFY_IP_RATE = float(os.environ.get("QR_VERIFY_IP_RATE", "5"))
+QR_VERIFY_IP_BURST = 60
+QR_VERIFY_CODE_RATE = float(os.environ.get("QR_VERIFY_CODE_RATE", "0.5"))
+QR_VERIFY_CODE_BURST = 20
+QR_VERIFY_MAX_IN_FLIGHT = 64
+QR_VERIFY_LATENCY_TARGET = 0.25
+QR_VERIFY_SHED_RETRY_AFTER = 1
+# Vérification par lot (POST /api/qr-codes/verify/batch/) : nombre maximal de
+# payloads par requête et threads de contrôle des signatures
+QR_VERIFY_BATCH_MAX = 500
+QR_VERIFY_BATCH_WORKERS = min(8, os.cpu_count() or 1)
+# Bundle de vérification hors ligne (GET /api/qr-codes/verify/bundle/) :
+# délai avant qu'un événement de révocation compte dans le numéro de
+# séquence, taille maximale d'un delta, cache du bundle complet
+QR_OFFLINE_SEQ_SETTLE = 30
+QR_OFFLINE_DELTA_MAX = 50000
+QR_OFFLINE_BUNDLE_CACHE_TTL = 300
+# Index de statuts partagé (services.status_index) : fichier mappé en mémoire
+# par tous les workers de la machine, reconstruit par rebuild_status_index.
+# Au-delà de MAX_AGE secondes sans reconstruction, retour à la base.
+QR_STATUS_INDEX_PATH = os.environ.get(
+    "QR_STATUS_INDEX_PATH", str(BASE_DIR / "var" / "qr_status.idx")
+)
+QR_STATUS_INDEX_MAX_AGE = 300
+# Recouvrement (secondes) des relectures incrémentales
+QR_STATUS_INDEX_OVERLAP = 5
+# Filtre de Bloom des codes émis (services.code_filter), reconstruit par
+# rebuild_code_filter. Codes émis depuis : inscrits dans le cache pour
+# RECENT_TTL secondes, qui doit dépasser MAX_AGE. Au-delà de MAX_AGE
+# secondes sans reconstruction, le filtre n'est plus consulté.
+QR_CODE_FILTER_PATH = os.environ.get(
+    "QR_CODE_FILTER_PATH", str(BASE_DIR / "var" / "qr_codes.bloom")
+)
+QR_CODE_FILTER_ERROR_RATE = float(os.environ.get("QR_CODE_FILTER_ERROR_RATE", "0.001"))
+QR_CODE_FILTER_MIN_CAPACITY = 100000
+QR_CODE_FILTER_MAX_AGE = 600
+QR_CODE_FILTER_RECENT_TTL = 1800
+QR_CODE_FILTER_OVERLAP = 3600
+# Journal des vérifications en écriture différée (services.verification_log) :
+# écriture groupée toutes les FLUSH_INTERVAL secondes, ou dès FLUSH_SIZE
+# événements ; au-delà de BUFFER_MAX, les plus anciens sont abandonnés.
+# 0 : écriture synchrone dans la requête
+QR_VERIFICATION_FLUSH_INTERVAL = float(
+    os.environ.get("QR_VERIFICATION_FLUSH_INTERVAL", "0")
+)
+QR_VERIFICATION_FLUSH_SIZE = 500
+QR_VERIFICATION_BUFFER_MAX = 20000
+
+# Jobs d'émission asynchrones (Celery)
+QR_ISSUANCE_MAX_COUNT = 100000
+QR_ISSUANCE_CHUNK_SIZE = 500
+QR_ISSUANCE_CONCURRENCY = 4
+QR_ISSUANCE_MAX_ERRORS = 50
+# Au-delà (secondes), un job RUNNING est clos en échec (0 : jamais)
+QR_ISSUANCE_JOB_TIMEOUT = int(os.environ.get("QR_ISSUANCE_JOB_TIMEOUT", "10800"))
+
 # Logging
 LOGGING = {
     "version": 1,
@@ -10,6 +10,14 @@ DEBUG = False
 
 ALLOWED_HOSTS = os.environ.get("ALLOWED_HOSTS", "").split(",")
 
+# Génération des QR codes hors du thread de la requête : 2 processus par
+# worker gunicorn (voir core.crypto.pool pour le dimensionnement)
+QR_CRYPTO_POOL_WORKERS = int(os.environ.get("QR_CRYPTO_POOL_WORKERS", "2"))
+# Vérifications journalisées par lots : le scan public ne fait que des lectures
+QR_VERIFICATION_FLUSH_INTERVAL = float(
+    os.environ.get("QR_VERIFICATION_FLUSH_INTERVAL", "2")
+)
+
 # Security settings for production
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -3,10 +3,12 @@ URL configuration for stamp project.
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from apps.qr_codes.views import verify_short
+
 # from rest_framework import permissions
 # from drf_yasg.views import get_schema_view
 # from drf_yasg import openapi
@@ -37,6 +39,10 @@ urlpatterns = [
     path("api/companies/", include("apps.companies.urls")),
     path("api/audit/", include("apps.audit.urls")),
     path("api/notifications/", include("apps.notifications.urls")),
+    # Vérification par URL courte (contenu des QR codes au format "url")
+    re_path(
+        r"^v/(?P<unique_code>[A-Za-z0-9-]{1,50})$", verify_short, name="qr-verify-short"
+    ),
 ]
 
 # Serve media files in development
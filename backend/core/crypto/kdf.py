@@ -0,0 +1,94 @@
+"""
+Registre des fonctions de dérivation de clé (KDF) des payloads QR
+
+Chaque KDF est identifiée par le couple (algorithm, version) enregistré
+sur QRCode, ce qui permet de relire les codes émis avec une KDF
+antérieure.
+"""
+
+import hashlib
+from typing import Dict
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+
+class PayloadKDF:
+    """Dérive la clé AES-256 à usage unique d'un payload"""
+
+    name = None
+    algorithm = None
+    version = None
+    key_length = 32
+
+    def derive(self, data: bytes, salt: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class PBKDF2PayloadKDF(PayloadKDF):
+    """PBKDF2-HMAC-SHA256, 100 000 itérations (codes historiques)"""
+
+    name = "pbkdf2-sha256"
+    algorithm = "AES256-GCM"
+    version = "1.0"
+    iterations = 100000
+
+    def derive(self, data: bytes, salt: bytes) -> bytes:
+        return hashlib.pbkdf2_hmac(
+            "sha256", data, salt, self.iterations, dklen=self.key_length
+        )
+
+
+class HKDFPayloadKDF(PayloadKDF):
+    """
+    HKDF-SHA256 (RFC 5869)
+
+    Le sel aléatoire de 32 octets apporte déjà toute l'entropie de la clé :
+    l'étirement de PBKDF2 n'apporte rien pour une clé à usage unique.
+    """
+
+    name = "hkdf-sha256"
+    algorithm = "AES256-GCM/HKDF-SHA256"
+    version = "1.1"
+    info = b"stamp-tech-ivoire/qr-payload"
+
+    def derive(self, data: bytes, salt: bytes) -> bytes:
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=self.key_length,
+            salt=salt,
+            info=self.info,
+        ).derive(data)
+
+
+def derive_subkey(key: bytes, info: bytes, length: int = 32) -> bytes:
+    """
+    Sous-clé HKDF-SHA256 de `key` réservée à l'usage désigné par `info`
+
+    Deux usages d'une même clé maîtresse reçoivent des sous-clés
+    indépendantes : aucune ne révèle la clé maîtresse ni l'autre sous-clé.
+    """
+    return HKDF(algorithm=hashes.SHA256(), length=length, salt=None, info=info).derive(
+        key
+    )
+
+
+KDF_REGISTRY: Dict[str, PayloadKDF] = {
+    kdf.name: kdf for kdf in (PBKDF2PayloadKDF(), HKDFPayloadKDF())
+}
+
+
+def get_kdf(name: str) -> PayloadKDF:
+    """Retourne la KDF enregistrée sous ce nom"""
+    try:
+        return KDF_REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown KDF: {name}")
+
+
+def get_kdf_for_algorithm(algorithm: str, version: str = None) -> PayloadKDF:
+    """Retrouve la KDF d'un code à partir de QRCode.algorithm/version"""
+    for kdf in KDF_REGISTRY.values():
+        if kdf.algorithm == algorithm and (version is None or kdf.version == version):
+            return kdf
+    raise ValueError(f"Unknown payload algorithm: {algorithm} v{version}")
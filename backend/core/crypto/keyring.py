@@ -0,0 +1,133 @@
+"""
+Trousseau de clés de signature partagé par processus
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from cryptography.hazmat.primitives import serialization
+from django.conf import settings
+
+from .signers import PayloadSigner, get_signer
+
+
+class _CachedKey:
+    """Clé chargée avec la date de modification du fichier source"""
+
+    __slots__ = ("key", "mtime", "next_check")
+
+    def __init__(self, key, mtime: int, next_check: float):
+        self.key = key
+        self.mtime = mtime
+        self.next_check = next_check
+
+
+class KeyRing:
+    """
+    Charge les clés PEM une seule fois par worker, indexées par key id.
+
+    Les fichiers sont re-stat()és au plus une fois par intervalle
+    (QR_KEYRING_CHECK_INTERVAL) et rechargés si leur mtime a changé.
+    Les payloads sans kid (antérieurs au trousseau) sont vérifiés avec la
+    clé `legacy_key_id`.
+    """
+
+    def __init__(
+        self,
+        keys: Dict[str, Dict],
+        active_key_id: str,
+        check_interval=5.0,
+        legacy_key_id: Optional[str] = None,
+    ):
+        self.keys = keys
+        self.active_key_id = active_key_id
+        self.legacy_key_id = legacy_key_id or active_key_id
+        self.check_interval = check_interval
+        self._cache: Dict[tuple, _CachedKey] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            keys=settings.QR_SIGNING_KEYS,
+            active_key_id=settings.QR_ACTIVE_KEY_ID,
+            check_interval=getattr(settings, "QR_KEYRING_CHECK_INTERVAL", 5.0),
+            legacy_key_id=getattr(settings, "QR_LEGACY_KEY_ID", None),
+        )
+
+    def key_ids(self):
+        return list(self.keys)
+
+    def algorithm(self, key_id: Optional[str] = None) -> str:
+        """Algorithme de signature de la clé (RSA-PSS si non précisé)"""
+        key_id = key_id or self.active_key_id
+        try:
+            return get_signer(self.keys[key_id].get("algorithm")).name
+        except KeyError:
+            raise KeyError(f"Unknown signing key: {key_id}")
+
+    def signer(self, key_id: Optional[str] = None) -> PayloadSigner:
+        return get_signer(self.algorithm(key_id))
+
+    def private_key(self, key_id: Optional[str] = None):
+        """Retourne la clé privée (clé active par défaut)"""
+        return self._get(key_id or self.active_key_id, "private_key_path")
+
+    def public_key(self, key_id: Optional[str] = None):
+        """Retourne la clé publique (clé active par défaut)"""
+        return self._get(key_id or self.active_key_id, "public_key_path")
+
+    def _get(self, key_id: str, kind: str):
+        try:
+            path = self.keys[key_id][kind]
+        except KeyError:
+            raise KeyError(f"Unknown signing key: {key_id}")
+
+        cache_key = (key_id, kind)
+        cached = self._cache.get(cache_key)
+        now = time.monotonic()
+        if cached is not None and now < cached.next_check:
+            return cached.key
+
+        mtime = os.stat(path).st_mtime_ns
+        if cached is not None and cached.mtime == mtime:
+            cached.next_check = now + self.check_interval
+            return cached.key
+
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is None or cached.mtime != mtime:
+                cached = _CachedKey(self._load(path, kind), mtime, 0.0)
+                self._cache[cache_key] = cached
+            cached.next_check = now + self.check_interval
+            return cached.key
+
+    def _load(self, path, kind: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        if kind == "private_key_path":
+            return serialization.load_pem_private_key(data, password=None)
+        return serialization.load_pem_public_key(data)
+
+
+_keyring = None
+_keyring_lock = threading.Lock()
+
+
+def get_keyring() -> KeyRing:
+    """Trousseau unique du processus, construit à la première utilisation"""
+    global _keyring
+    if _keyring is None:
+        with _keyring_lock:
+            if _keyring is None:
+                _keyring = KeyRing.from_settings()
+    return _keyring
+
+
+def reset_keyring():
+    """Oublie le trousseau courant (tests, changement de configuration)"""
+    global _keyring
+    with _keyring_lock:
+        _keyring = None
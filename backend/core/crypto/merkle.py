@@ -0,0 +1,108 @@
+"""
+Arbre de Merkle des lots de signature QR
+
+Une seule opération de clé privée signe la racine d'un lot ; chaque code
+porte son index, la taille du lot et la preuve d'inclusion (hachés
+frères, des feuilles vers la racine).
+
+Hachage avec séparation de domaine (cf. RFC 6962) :
+    feuille = SHA-256(0x00 || données)
+    noeud   = SHA-256(0x01 || gauche || droite)
+Un noeud sans frère (niveau de taille impaire) remonte tel quel, sans
+duplication.
+"""
+
+import hashlib
+from typing import List
+
+HASH_SIZE = 32
+ROOT_SIGNATURE_PREFIX = b"stamp-tech-ivoire/merkle-root:"
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def root_message(root: bytes) -> bytes:
+    """Message effectivement signé pour une racine de lot"""
+    return ROOT_SIGNATURE_PREFIX + root
+
+
+class MerkleTree:
+    """Arbre complet d'un lot, construit une fois à l'émission"""
+
+    def __init__(self, leaves: List[bytes]):
+        if not leaves:
+            raise ValueError("Empty Merkle tree")
+        self.levels = [[leaf_hash(leaf) for leaf in leaves]]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            parents = [
+                node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)
+            ]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    @property
+    def size(self) -> int:
+        return len(self.levels[0])
+
+    def proof(self, index: int) -> List[bytes]:
+        """Hachés frères de la feuille `index`, des feuilles vers la racine"""
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(level[sibling])
+            index //= 2
+        return proof
+
+
+def compute_root(data: bytes, index: int, size: int, proof: List[bytes]) -> bytes:
+    """
+    Recalcule la racine à partir d'une feuille et de sa preuve
+
+    Lève ValueError si la preuve ne correspond pas à (index, size).
+    """
+    if not 0 <= index < size:
+        raise ValueError("Invalid Merkle leaf index")
+
+    node = leaf_hash(data)
+    remaining = list(proof)
+    width = size
+    while width > 1:
+        if index % 2 == 0 and index == width - 1:
+            # Noeud sans frère : remonte tel quel
+            pass
+        else:
+            if not remaining:
+                raise ValueError("Merkle proof too short")
+            sibling = remaining.pop(0)
+            if index % 2:
+                node = node_hash(sibling, node)
+            else:
+                node = node_hash(node, sibling)
+        index //= 2
+        width = (width + 1) // 2
+    if remaining:
+        raise ValueError("Merkle proof too long")
+    return node
+
+
+def pack_proof(proof: List[bytes]) -> bytes:
+    return b"".join(proof)
+
+
+def unpack_proof(packed: bytes) -> List[bytes]:
+    if len(packed) % HASH_SIZE:
+        raise ValueError("Invalid Merkle proof length")
+    return [packed[i : i + HASH_SIZE] for i in range(0, len(packed), HASH_SIZE)]
@@ -0,0 +1,221 @@
+"""
+Formats de payload des QR codes
+
+v1 : base64(JSON) contenant le chiffré et la signature eux-mêmes en base64.
+v2 : enveloppe binaire à disposition fixe, encodée en base45 (RFC 9285)
+     pour tenir dans le mode alphanumérique des QR codes :
+
+        version   u8      (0x03)
+        alg       u8      (index dans SIGNATURE_ALGORITHMS)
+        kid       u8 longueur + ASCII
+        code      u8 longueur + ASCII
+        data      u16 longueur + octets (nonce + chiffré AES-GCM)
+        sig       u16 longueur + octets
+
+     Les enveloppes 0x02, sans octet alg (RSA-PSS), restent décodées.
+
+     Les codes signés par lot (core.crypto.merkle) utilisent la version
+     0x04 : disposition 0x03 suivie de
+
+        index     u32     (mi : position dans le lot)
+        size      u32     (mn : taille du lot)
+        proof     u8 nombre de hachés + hachés SHA-256 (mp)
+
+     Les codes dont la signature (ou la feuille de Merkle) couvre aussi
+     unique_code ("bnd" du document, voir qr_generator.signed_message)
+     utilisent 0x05 (disposition 0x03) et 0x06 (disposition 0x04). Seuls
+     ceux-là sont vérifiables hors ligne : ailleurs, rien ne lie le code
+     lu au chiffré signé.
+
+url : URL courte QR_SHORT_URL_BASE/v/<unique_code>, pour les scans à
+      l'appareil photo d'un téléphone. Ni chiffré ni signature : la
+      vérification se fait en ligne (GET /v/<code>), pas par POST verify.
+"""
+
+import base64
+import json
+import struct
+from typing import Dict
+
+V2_PREFIX = "ST2:"
+V2_VERSION = 0x03
+V2_LEGACY_VERSION = 0x02
+V2_BATCH_VERSION = 0x04
+V2_BOUND_VERSION = 0x05
+V2_BOUND_BATCH_VERSION = 0x06
+
+# Codage sur un octet des algorithmes de core.crypto.signers : ne jamais
+# réordonner, uniquement ajouter en fin de tuple
+SIGNATURE_ALGORITHMS = ("rsa-pss-sha256", "ed25519")
+
+BASE45_CHARSET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+_BASE45_INDEX = {c: i for i, c in enumerate(BASE45_CHARSET)}
+
+
+def base45_encode(data: bytes) -> str:
+    out = []
+    for i in range(0, len(data) - 1, 2):
+        n = data[i] * 256 + data[i + 1]
+        n, c = divmod(n, 45)
+        e, d = divmod(n, 45)
+        out.append(BASE45_CHARSET[c] + BASE45_CHARSET[d] + BASE45_CHARSET[e])
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        out.append(BASE45_CHARSET[c] + BASE45_CHARSET[d])
+    return "".join(out)
+
+
+def base45_decode(text: str) -> bytes:
+    try:
+        values = [_BASE45_INDEX[c] for c in text]
+    except KeyError:
+        raise ValueError("Invalid base45 character")
+
+    out = bytearray()
+    for i in range(0, len(values), 3):
+        chunk = values[i : i + 3]
+        if len(chunk) == 3:
+            n = chunk[0] + chunk[1] * 45 + chunk[2] * 45 * 45
+            if n > 0xFFFF:
+                raise ValueError("Invalid base45 chunk")
+            out += n.to_bytes(2, "big")
+        elif len(chunk) == 2:
+            n = chunk[0] + chunk[1] * 45
+            if n > 0xFF:
+                raise ValueError("Invalid base45 chunk")
+            out.append(n)
+        else:
+            raise ValueError("Invalid base45 length")
+    return bytes(out)
+
+
+def encode_v1(qr_data: Dict) -> str:
+    """Encode le document QR au format historique base64(JSON)"""
+    return base64.b64encode(json.dumps(qr_data).encode("utf-8")).decode("utf-8")
+
+
+def encode_v2(qr_data: Dict) -> str:
+    """Encode le document QR dans l'enveloppe binaire v2"""
+    alg = SIGNATURE_ALGORITHMS.index(qr_data.get("alg") or SIGNATURE_ALGORITHMS[0])
+    kid = (qr_data.get("kid") or "").encode("ascii")
+    code = qr_data["id"].encode("ascii")
+    data = base64.b64decode(qr_data["data"])
+    sig = base64.b64decode(qr_data["sig"])
+    batched = qr_data.get("mp") is not None
+    if qr_data.get("bnd"):
+        version = V2_BOUND_BATCH_VERSION if batched else V2_BOUND_VERSION
+    else:
+        version = V2_BATCH_VERSION if batched else V2_VERSION
+
+    parts = [
+        struct.pack(">BBB", version, alg, len(kid)),
+        kid,
+        struct.pack(">B", len(code)),
+        code,
+        struct.pack(">H", len(data)),
+        data,
+        struct.pack(">H", len(sig)),
+        sig,
+    ]
+    if batched:
+        proof = base64.b64decode(qr_data["mp"])
+        parts += [
+            struct.pack(">IIB", qr_data["mi"], qr_data["mn"], len(proof) // 32),
+            proof,
+        ]
+    return V2_PREFIX + base45_encode(b"".join(parts))
+
+
+def decode_v2(text: str) -> Dict:
+    raw = base45_decode(text[len(V2_PREFIX) :])
+    offset = 0
+
+    def take(fmt):
+        nonlocal offset
+        try:
+            values = struct.unpack_from(fmt, raw, offset)
+        except struct.error:
+            raise ValueError("Truncated v2 payload")
+        offset += struct.calcsize(fmt)
+        return values[0]
+
+    def take_bytes(length):
+        nonlocal offset
+        if offset + length > len(raw):
+            raise ValueError("Truncated v2 payload")
+        value = raw[offset : offset + length]
+        offset += length
+        return value
+
+    version = take(">B")
+    if version in (
+        V2_VERSION,
+        V2_BATCH_VERSION,
+        V2_BOUND_VERSION,
+        V2_BOUND_BATCH_VERSION,
+    ):
+        try:
+            alg = SIGNATURE_ALGORITHMS[take(">B")]
+        except IndexError:
+            raise ValueError("Unknown signature algorithm")
+    elif version == V2_LEGACY_VERSION:
+        alg = None
+    else:
+        raise ValueError("Unsupported payload version")
+    kid = take_bytes(take(">B")).decode("ascii")
+    code = take_bytes(take(">B")).decode("ascii")
+    data = take_bytes(take(">H"))
+    sig = take_bytes(take(">H"))
+    merkle = {}
+    if version in (V2_BATCH_VERSION, V2_BOUND_BATCH_VERSION):
+        merkle["mi"] = take(">I")
+        merkle["mn"] = take(">I")
+        proof = take_bytes(take(">B") * 32)
+        merkle["mp"] = base64.b64encode(proof).decode("utf-8")
+    if offset != len(raw):
+        raise ValueError("Trailing bytes in v2 payload")
+    bound = {"bnd": 1} if version in (V2_BOUND_VERSION, V2_BOUND_BATCH_VERSION) else {}
+
+    # Même forme que le document v1 : la signature porte sur data en base64
+    return {
+        "v": "2",
+        "id": code,
+        "kid": kid or None,
+        "alg": alg,
+        "data": base64.b64encode(data).decode("utf-8"),
+        "sig": base64.b64encode(sig).decode("utf-8"),
+        **merkle,
+        **bound,
+    }
+
+
+def short_url(unique_code: str) -> str:
+    from django.conf import settings
+
+    return f"{settings.QR_SHORT_URL_BASE.rstrip('/')}/v/{unique_code}"
+
+
+def encode_url(qr_data: Dict) -> str:
+    """Encode le document QR sous forme d'URL courte de vérification"""
+    return short_url(qr_data["id"])
+
+
+PAYLOAD_ENCODERS = {"v1": encode_v1, "v2": encode_v2, "url": encode_url}
+
+
+def encode_qr_payload(qr_data: Dict, payload_format: str = "v2") -> str:
+    """Encode le document QR dans le format demandé"""
+    try:
+        return PAYLOAD_ENCODERS[payload_format](qr_data)
+    except KeyError:
+        raise ValueError(f"Unknown payload format: {payload_format}")
+
+
+def decode_qr_payload(text: str) -> Dict:
+    """Décode un payload scanné, en détectant v1 (base64 JSON) ou v2"""
+    text = text.strip()
+    if text.startswith(V2_PREFIX):
+        return decode_v2(text)
+    if text.startswith(("http://", "https://")):
+        raise ValueError("Short URL payload: verify with GET /v/<code>")
+    return json.loads(base64.b64decode(text))
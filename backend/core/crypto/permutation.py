@@ -0,0 +1,44 @@
+"""
+Permutation à clé sur 32 bits (réseau de Feistel)
+
+Transforme un numéro de séquence en identifiant d'apparence aléatoire.
+C'est une bijection : deux numéros distincts donnent toujours deux
+identifiants distincts, sans contrôle d'unicité.
+"""
+
+import hashlib
+import hmac
+
+ROUNDS = 6
+HALF_BITS = 16
+HALF_MASK = (1 << HALF_BITS) - 1
+DOMAIN_SIZE = 1 << (2 * HALF_BITS)
+
+
+class FeistelPermutation:
+    """Permutation de [0, 2^32) paramétrée par une clé et un domaine (année)"""
+
+    def __init__(self, key: bytes, tweak: bytes = b""):
+        self.key = key
+        self.tweak = tweak
+
+    def _round(self, index: int, half: int) -> int:
+        message = self.tweak + bytes([index]) + half.to_bytes(2, "big")
+        digest = hmac.new(self.key, message, hashlib.sha256).digest()
+        return int.from_bytes(digest[:2], "big")
+
+    def permute(self, value: int) -> int:
+        if not 0 <= value < DOMAIN_SIZE:
+            raise ValueError("Value out of permutation domain")
+        left, right = value >> HALF_BITS, value & HALF_MASK
+        for index in range(ROUNDS):
+            left, right = right, left ^ self._round(index, right)
+        return (left << HALF_BITS) | right
+
+    def invert(self, value: int) -> int:
+        if not 0 <= value < DOMAIN_SIZE:
+            raise ValueError("Value out of permutation domain")
+        left, right = value >> HALF_BITS, value & HALF_MASK
+        for index in reversed(range(ROUNDS)):
+            left, right = right ^ self._round(index, left), left
+        return (left << HALF_BITS) | right
@@ -0,0 +1,195 @@
+"""
+Pool de processus pour la génération des QR codes
+
+La dérivation, le chiffrement et la signature sont purement CPU : exécutés
+dans le thread de la requête, ils bloquent un worker gunicorn pendant toute
+l'émission. Chaque worker gunicorn démarre son propre pool de
+QR_CRYPTO_POOL_WORKERS processus et y répartit les lots.
+
+Les processus sont lancés par forkserver (spawn à défaut), jamais par un
+fork du worker : celui-ci a des threads (gunicorn gthread, exécuteurs de
+vérification) dont les verrous seraient copiés dans un état quelconque.
+Chaque processus initialise Django et charge les clés au démarrage.
+
+Dimensionnement : le serveur compte workers gunicorn ×
+QR_CRYPTO_POOL_WORKERS processus de génération, en plus des workers eux-
+mêmes. Garder ce produit au plus égal au nombre de coeurs (par exemple 4
+workers × 2 sur 8 coeurs) ; au-delà, les processus se disputent les coeurs
+sans rien émettre de plus.
+
+Les processus du pool ne touchent jamais la base : les unique_code sont
+alloués dans le processus appelant et passés avec le travail.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List
+
+from django.conf import settings
+
+from core.exceptions import ServiceUnavailableError
+
+from .keyring import get_keyring
+
+
+def _start_method() -> str:
+    methods = multiprocessing.get_all_start_methods()
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+
+def _init_worker():
+    """Initialise Django dans le processus du pool, puis charge les clés"""
+    import django
+
+    django.setup()
+    _preload_keys()
+
+
+def _preload_keys():
+    """Parse toutes les clés du trousseau"""
+    keyring = get_keyring()
+    for key_id in keyring.key_ids():
+        try:
+            keyring.private_key(key_id)
+            keyring.public_key(key_id)
+        except OSError:
+            # Clé déclarée mais non provisionnée sur cette machine
+            continue
+
+
+_generators = {}
+
+
+def generate_in_worker(options: Dict, entries: List[Dict], batch_signing: bool):
+    """
+    Génère des QR codes dans un processus du pool
+
+    Args:
+        options: {"key_id", "kdf", "payload_format"} du générateur appelant
+        entries: dicts {"unique_code", "user_id", "company_id", "expires_days"}
+        batch_signing: signer l'ensemble via une racine de Merkle
+
+    Returns:
+        (lot ou None, résultats) comme SecureQRGenerator.generate_batch
+    """
+    from .qr_generator import SecureQRGenerator
+
+    key = (options["key_id"], options["kdf"], options["payload_format"])
+    generator = _generators.get(key)
+    if generator is None:
+        generator = _generators[key] = SecureQRGenerator(**options)
+
+    entries = [
+        {
+            "unique_code": entry["unique_code"],
+            "user": SimpleNamespace(id=entry["user_id"]),
+            "company": (
+                SimpleNamespace(id=entry["company_id"]) if entry["company_id"] else None
+            ),
+            "expires_days": entry["expires_days"],
+        }
+        for entry in entries
+    ]
+    if batch_signing:
+        return generator.generate_batch(entries)
+    return None, [generator.generate(**entry) for entry in entries]
+
+
+class CryptoPool:
+    """
+    Pool de processus à file d'attente bornée
+
+    Au-delà de `max_pending` tâches en attente, submit_many() refuse le
+    travail avec ServiceUnavailableError (503 + Retry-After côté API)
+    plutôt que de laisser les requêtes s'empiler.
+    """
+
+    def __init__(self, workers: int, max_pending: int, retry_after: int = 5):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.pid = os.getpid()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(_start_method()),
+            initializer=_init_worker,
+        )
+
+    def split(self, items: List, min_size: int = 1) -> List[List]:
+        """
+        Découpe `items` en au plus `workers` parts équilibrées
+
+        Chaque part compte au moins `min_size` éléments (sauf si `items`
+        lui-même est plus court).
+        """
+        count = max(1, min(self.workers, len(items) // max(min_size, 1)))
+        size, extra = divmod(len(items), count)
+        parts, start = [], 0
+        for index in range(count):
+            end = start + size + (1 if index < extra else 0)
+            parts.append(items[start:end])
+            start = end
+        return parts
+
+    def submit_many(self, fn, calls: List[tuple]):
+        """
+        Soumet toutes les tâches ou aucune
+
+        Raises:
+            ServiceUnavailableError: pas assez de places dans la file
+        """
+        acquired = 0
+        for _ in calls:
+            if not self._slots.acquire(blocking=False):
+                for _ in range(acquired):
+                    self._slots.release()
+                raise ServiceUnavailableError(
+                    "QR generation is saturated, retry later",
+                    code="crypto_pool_saturated",
+                    details={"retry_after": self.retry_after},
+                )
+            acquired += 1
+
+        futures = []
+        for args in calls:
+            future = self._executor.submit(fn, *args)
+            future.add_done_callback(lambda _: self._slots.release())
+            futures.append(future)
+        return futures
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_crypto_pool():
+    """Pool du processus, ou None si QR_CRYPTO_POOL_WORKERS vaut 0"""
+    global _pool
+    if not settings.QR_CRYPTO_POOL_WORKERS:
+        return None
+    # Un pool hérité d'un fork (worker gunicorn préchargé) n'est pas utilisable
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = CryptoPool(
+                    workers=settings.QR_CRYPTO_POOL_WORKERS,
+                    max_pending=settings.QR_CRYPTO_POOL_MAX_PENDING,
+                    retry_after=settings.QR_CRYPTO_POOL_RETRY_AFTER,
+                )
+    return _pool
+
+
+def reset_crypto_pool():
+    """Arrête le pool courant (tests, changement de configuration)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
@@ -1,27 +1,42 @@
 import secrets
-import hashlib
 import json
 import base64
-from datetime import datetime, timedelta
-from typing import Dict, Any
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives import hashes, serialization
 from django.conf import settings
+from django.utils import timezone
 import qrcode
-from io import BytesIO
+
+from core.utils.metrics import registry as metrics
+
+from .kdf import get_kdf, get_kdf_for_algorithm
+from .keyring import get_keyring
+from .merkle import MerkleTree, compute_root, pack_proof, root_message, unpack_proof
+from .payload import decode_qr_payload, encode_qr_payload
 
 
 class SecureQRGenerator:
     """Générateur de QR codes sécurisés"""
 
-    def __init__(self):
+    def __init__(self, key_id=None, kdf=None, payload_format=None):
+        self.keyring = get_keyring()
+        self.key_id = key_id or self.keyring.active_key_id
+        self.signer = self.keyring.signer(self.key_id)
+        self.kdf = get_kdf(kdf or settings.QR_DEFAULT_KDF)
+        self.payload_format = payload_format or settings.QR_PAYLOAD_FORMAT
         self.encryption_key = self._load_encryption_key()
         self.private_key = self._load_private_key()
         self.public_key = self._load_public_key()
 
-    def generate(self, user, company=None, expires_days=365) -> Dict[str, Any]:
+    def generate(
+        self, user, company=None, expires_days=365, unique_code=None
+    ) -> Dict[str, Any]:
         """
         Génère un QR code sécurisé
 
@@ -29,23 +44,92 @@ class SecureQRGenerator:
             user: User instance
             company: Company instance (optional)
             expires_days: Nombre de jours avant expiration
+            unique_code: Code déjà alloué (pool de processus), sinon alloué ici
 
         Returns:
             Dict avec QR code et métadonnées
         """
+        prepared = self._prepare(user, company, expires_days, unique_code)
+
+        # 6. Signature (RSA-PSS ou Ed25519 selon la clé) du code et du chiffré
+        signature = self._sign(
+            signed_message(prepared["encrypted_data"], prepared["unique_code"])
+        )
+
+        return self._seal(prepared, signature)
+
+    def generate_batch(
+        self, entries: List[Dict]
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Génère un lot de QR codes signés par une seule signature
+
+        La racine de Merkle des couples (code, chiffré) est signée une fois ;
+        chaque code porte son index et sa preuve d'inclusion.
+
+        Args:
+            entries: liste de dicts {"user", "company", "expires_days"} et,
+                en option, "unique_code" déjà alloué
+
+        Returns:
+            (lot, codes) : lot = {"root", "signature", "size", "key_id",
+            "signature_algorithm"}, codes = même forme que generate()
+        """
+        prepared = [
+            self._prepare(
+                entry["user"],
+                entry.get("company"),
+                entry.get("expires_days", 365),
+                entry.get("unique_code"),
+            )
+            for entry in entries
+        ]
+
+        tree = MerkleTree(
+            [signed_message(p["encrypted_data"], p["unique_code"]) for p in prepared]
+        )
+        signature = base64.b64encode(
+            self.signer.sign(self.private_key, root_message(tree.root))
+        ).decode("utf-8")
+
+        batch = {
+            "root": tree.root.hex(),
+            "signature": signature,
+            "size": tree.size,
+            "key_id": self.key_id,
+            "signature_algorithm": self.signer.name,
+        }
+        results = [
+            self._seal(
+                p,
+                signature,
+                merkle={
+                    "index": index,
+                    "size": tree.size,
+                    "proof": base64.b64encode(pack_proof(tree.proof(index))).decode(
+                        "utf-8"
+                    ),
+                },
+            )
+            for index, p in enumerate(prepared)
+        ]
+        return batch, results
+
+    def _prepare(self, user, company, expires_days, unique_code=None) -> Dict[str, Any]:
+        """Étapes 1 à 5 : identifiant, payload, dérivation et chiffrement"""
         # 1. Génération ID unique
-        unique_code = self._generate_unique_id()
+        unique_code = unique_code or self._generate_unique_id()
+        now = timezone.now()
+        expires_at = now + timedelta(days=expires_days)
 
         # 2. Création du payload
         payload = {
             "id": unique_code,
             "user_id": str(user.id),
             "company_id": str(company.id) if company else None,
-            "timestamp": int(datetime.now().timestamp()),
-            "expires_at": int(
-                (datetime.now() + timedelta(days=expires_days)).timestamp()
-            ),
-            "version": "1.0",
+            "timestamp": int(now.timestamp()),
+            "expires_at": int(expires_at.timestamp()),
+            "version": self.kdf.version,
         }
 
         # 3. Génération sel unique
@@ -57,44 +141,65 @@ class SecureQRGenerator:
         # 5. Chiffrement AES-256-GCM
         encrypted_data = self._encrypt(payload, hash_value)
 
-        # 6. Signature RSA
-        signature = self._sign(encrypted_data)
+        return {
+            "unique_code": unique_code,
+            "encrypted_data": encrypted_data,
+            "hash_value": hash_value,
+            "salt": salt,
+            "expires_at": expires_at,
+        }
 
+    def _seal(self, prepared: Dict, signature: str, merkle=None) -> Dict[str, Any]:
+        """Étapes 7 et 8 : document QR signé et encodage"""
         # 7. Construction données finales
-        qr_data = {
-            "v": "1.0",
-            "id": unique_code,
-            "enc": "AES256-GCM",
-            "data": encrypted_data,
-            "sig": signature,
-            "exp": (datetime.now() + timedelta(days=expires_days)).isoformat(),
-            "iss": "STAMP-TECH-IVOIRE",
-        }
+        qr_data = build_qr_data(
+            unique_code=prepared["unique_code"],
+            key_id=self.key_id,
+            algorithm=self.kdf.algorithm,
+            version=self.kdf.version,
+            encrypted_data=prepared["encrypted_data"],
+            signature_algorithm=self.signer.name,
+            signature=signature,
+            expires_at=prepared["expires_at"],
+            merkle=merkle,
+            code_bound=True,
+        )
 
-        # 8. Génération image QR
-        qr_image = self._generate_qr_image(qr_data)
+        # 8. Encodage (v1 base64 JSON ou enveloppe binaire v2)
+        qr_payload = encode_qr_payload(qr_data, self.payload_format)
 
         return {
-            "unique_code": unique_code,
-            "encrypted_data": encrypted_data,
+            "unique_code": prepared["unique_code"],
+            "encrypted_data": prepared["encrypted_data"],
             "signature": signature,
-            "hash_value": hash_value.hex(),
-            "salt": salt.hex(),
-            "qr_image": qr_image,
+            "hash_value": prepared["hash_value"].hex(),
+            "salt": prepared["salt"].hex(),
             "qr_data": qr_data,
-            "expires_at": datetime.now() + timedelta(days=expires_days),
+            "qr_payload": qr_payload,
+            "key_id": self.key_id,
+            "signature_algorithm": self.signer.name,
+            "algorithm": self.kdf.algorithm,
+            "version": self.kdf.version,
+            "expires_at": prepared["expires_at"],
+            "merkle": merkle,
+            "code_bound": True,
         }
 
     def _generate_unique_id(self) -> str:
-        """Génère un ID unique au format ST-CI-YYYY-XXXXXX"""
-        year = datetime.now().year
-        random_part = secrets.token_hex(4).upper()
-        return f"ST-CI-{year}-{random_part}"
+        """
+        Génère un ID unique au format ST-CI-YYYY-XXXXXXXX
+
+        Tiré d'un bloc de séquence réservé par le processus puis permuté :
+        unique par construction, sans contrôle en base à l'insertion.
+        """
+        from apps.qr_codes.services.sequence import allocate_unique_code
+
+        return allocate_unique_code()
 
     def _hash_payload(self, payload: Dict, salt: bytes) -> bytes:
-        """Hash le payload avec SHA-256 et sel"""
+        """Dérive la clé du payload avec la KDF configurée et le sel"""
         data = json.dumps(payload, sort_keys=True).encode("utf-8")
-        return hashlib.pbkdf2_hmac("sha256", data, salt, 100000)
+        return self.kdf.derive(data, salt)
 
     def _encrypt(self, payload: Dict, key: bytes) -> str:
         """Chiffre le payload avec AES-256-GCM"""
@@ -108,60 +213,239 @@ class SecureQRGenerator:
         encrypted = nonce + ciphertext
         return base64.b64encode(encrypted).decode("utf-8")
 
-    def _sign(self, data: str) -> str:
-        """Signe les données avec RSA"""
-        signature = self.private_key.sign(
-            data.encode("utf-8"),
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH,
-            ),
-            hashes.SHA256(),
-        )
+    def _sign(self, message: bytes) -> str:
+        """Signe le message avec l'algorithme de la clé"""
+        signature = self.signer.sign(self.private_key, message)
         return base64.b64encode(signature).decode("utf-8")
 
-    def _generate_qr_image(self, qr_data: Dict) -> bytes:
-        """Génère l'image QR code"""
-        qr = qrcode.QRCode(
-            version=5,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=4,
-        )
-
-        # Encode data en base64
-        data_str = base64.b64encode(json.dumps(qr_data).encode("utf-8")).decode("utf-8")
-
-        qr.add_data(data_str)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="#059669", back_color="white")  # Vert émeraude
-
-        # Convert to bytes
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        return buffer.getvalue()
-
     def _load_encryption_key(self) -> bytes:
         """Charge la clé de chiffrement"""
         return bytes.fromhex(settings.ENCRYPTION_KEY)
 
     def _load_private_key(self):
-        """Charge la clé privée RSA"""
-        with open(settings.RSA_PRIVATE_KEY_PATH, "rb") as f:
-            return serialization.load_pem_private_key(f.read(), password=None)
+        """Charge la clé privée depuis le trousseau"""
+        return self.keyring.private_key(self.key_id)
 
     def _load_public_key(self):
-        """Charge la clé publique RSA"""
-        with open(settings.RSA_PUBLIC_KEY_PATH, "rb") as f:
-            return serialization.load_pem_public_key(f.read())
+        """Charge la clé publique depuis le trousseau"""
+        return self.keyring.public_key(self.key_id)
+
+
+ERROR_CORRECTION_LEVELS = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H,
+}
+
+
+QR_ISSUER = "STAMP-TECH-IVOIRE"
+
+
+def signed_message(encrypted_data: str, unique_code: str = None) -> bytes:
+    """
+    Message signé d'un code, ou feuille de Merkle de son lot
+
+    Les codes émis sont liés à leur unique_code ("bnd" du document) : un
+    chiffré signé ne peut pas être présenté sous l'identifiant d'un autre
+    code. Sans unique_code, message des codes antérieurs (chiffré seul).
+    """
+    if unique_code is None:
+        return encrypted_data.encode("utf-8")
+    # "|" n'apparaît ni dans un unique_code ni dans du base64
+    return f"{unique_code}|{encrypted_data}".encode("utf-8")
+
+
+def build_qr_data(
+    unique_code,
+    key_id,
+    algorithm,
+    version,
+    encrypted_data,
+    signature,
+    expires_at,
+    signature_algorithm=None,
+    merkle=None,
+    code_bound=False,
+) -> Dict[str, Any]:
+    """
+    Document QR (avant encodage v1/v2), depuis la génération ou la base
+
+    `merkle` ({"index", "size", "proof"}) pour un code signé par lot : la
+    signature porte alors sur la racine du lot. `code_bound` : signature
+    (ou feuille) couvrant aussi unique_code, voir signed_message.
+    """
+    qr_data = {
+        "v": version,
+        "id": unique_code,
+        "kid": key_id or None,
+        "alg": signature_algorithm,
+        "enc": algorithm,
+        "data": encrypted_data,
+        "sig": signature,
+        "exp": expires_at.isoformat(),
+        "iss": QR_ISSUER,
+    }
+    if merkle:
+        qr_data.update(mi=merkle["index"], mn=merkle["size"], mp=merkle["proof"])
+    if code_bound:
+        qr_data["bnd"] = 1
+    return qr_data
+
+
+def build_qr(qr_payload: str, box_size=10, border=4) -> qrcode.QRCode:
+    """
+    Construit le symbole QR du payload
+
+    La version est choisie au plus juste (fit) ; un payload v2 entièrement
+    base45 est encodé en mode alphanumérique.
+    """
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=ERROR_CORRECTION_LEVELS[settings.QR_ERROR_CORRECTION],
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(qr_payload)
+    qr.make(fit=True)
+    return qr
+
+
+def decrypt_payload(encrypted_data: str, key: bytes) -> Dict:
+    """Déchiffre un payload AES-256-GCM (nonce + ciphertext en base64)"""
+    raw = base64.b64decode(encrypted_data)
+    plaintext = AESGCM(key).decrypt(raw[:12], raw[12:], None)
+    return json.loads(plaintext)
+
+
+def check_payload_key(
+    payload: Dict, salt: bytes, key: bytes, algorithm: str, version: str = None
+) -> bool:
+    """Vérifie que la clé stockée dérive bien du payload (PBKDF2 ou HKDF)"""
+    kdf = get_kdf_for_algorithm(algorithm, version)
+    data = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return secrets.compare_digest(kdf.derive(data, salt), key)
+
+
+def bound_code(qr_data: Dict) -> Optional[str]:
+    """unique_code couvert par la signature du document, None si non lié"""
+    return qr_data["id"] if qr_data.get("bnd") else None
+
+
+class _VerifiedRootCache:
+    """
+    Racines de lot dont la signature a déjà été vérifiée (LRU, par processus)
+
+    Seule la validité cryptographique est mise en cache : la révocation
+    d'un lot reste contrôlée en base à chaque vérification.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._roots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            if key not in self._roots:
+                return False
+            self._roots.move_to_end(key)
+            return True
+
+    def add(self, key):
+        with self._lock:
+            self._roots[key] = True
+            self._roots.move_to_end(key)
+            while len(self._roots) > self.max_size:
+                self._roots.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._roots.clear()
+
+
+verified_roots = _VerifiedRootCache()
+
+
+class VerificationContext:
+    """
+    État d'une vérification, complété étape par étape
+
+    Une étape qui conclut pose `result` ; les suivantes ne sont pas
+    exécutées. `timings` donne la durée de chaque étape (secondes).
+
+    `signed` est faux pour une vérification par URL courte : pas de
+    payload, le code seul est recherché (étapes filter à response).
+    """
+
+    def __init__(self, qr_data_str: str):
+        self.qr_data_str = qr_data_str
+        self.signed = True
+        self.qr_data: Optional[Dict[str, Any]] = None
+        self.code: Optional[str] = None
+        self.root: Optional[str] = None
+        self.qr_code = None
+        self.qr_code_id = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.timings: Dict[str, float] = {}
+
+    @classmethod
+    def for_code(cls, unique_code: str) -> "VerificationContext":
+        context = cls("")
+        context.signed = False
+        context.code = unique_code
+        return context
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def reject(self, error: str):
+        self.result = {"valid": False, "error": error}
+
+    def record_timing(self, stage: str, seconds: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        metrics.observe(f"qr_verify.{stage}", seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_timing(name, time.perf_counter() - start)
 
 
 class QRVerifier:
-    """Vérificateur de QR codes"""
+    """
+    Vérificateur de QR codes
+
+    Étapes, de la moins coûteuse à la plus coûteuse :
+
+        decode     payload v1 (base64 JSON) ou enveloppe binaire v2
+        format     champs attendus, clé connue, algorithme cohérent
+        filter     filtre de Bloom des codes émis ("Unknown code")
+        status     index de statuts partagé (révoqué, suspendu, expiré)
+        signature  vérification cryptographique (code ou racine du lot)
+        record     lecture du QRCode en base, lot et statut
+        response   réponse publique
+
+    La lecture en base reste après la signature : un payload forgé ne
+    coûte jamais de requête SQL.
+    """
+
+    STAGES = (
+        "decode",
+        "format",
+        "filter",
+        "status",
+        "signature",
+        "record",
+        "response",
+    )
 
     def __init__(self):
-        self.public_key = self._load_public_key()
+        self.keyring = get_keyring()
 
     def verify(self, qr_data_str: str, qr_code_instance=None) -> Dict[str, Any]:
         """
@@ -171,66 +455,250 @@ class QRVerifier:
             Dict avec résultat de vérification
         """
         try:
-            # 1. Decode base64
-            decoded = base64.b64decode(qr_data_str)
-            qr_data = json.loads(decoded)
+            return self.run(qr_data_str).result
+        except Exception as e:
+            return {"valid": False, "error": str(e)}
+
+    def run(self, context, stages=STAGES) -> VerificationContext:
+        """
+        Exécute les étapes demandées, jusqu'à la première qui conclut
+
+        Args:
+            context: VerificationContext, ou payload brut
+            stages: noms d'étapes, dans l'ordre
+
+        Returns:
+            Le contexte de vérification
+        """
+        if isinstance(context, str):
+            context = VerificationContext(context)
+        for name in stages:
+            if context.done:
+                break
+            with context.stage(name):
+                getattr(self, f"stage_{name}")(context)
+        return context
+
+    def stage_decode(self, context: VerificationContext):
+        try:
+            context.qr_data = decode_qr_payload(context.qr_data_str)
+        except Exception as e:
+            context.reject(str(e))
+
+    def stage_format(self, context: VerificationContext):
+        qr_data = context.qr_data
+        if not isinstance(qr_data, dict) or not all(
+            isinstance(qr_data.get(field), str) and qr_data[field]
+            for field in ("id", "data", "sig")
+        ):
+            context.reject("Invalid QR code format")
+            return
+        if qr_data.get("bnd") not in (None, 1):
+            context.reject("Invalid QR code format")
+            return
+        if qr_data.get("mp") is not None and not (
+            isinstance(qr_data.get("mi"), int) and isinstance(qr_data.get("mn"), int)
+        ):
+            context.reject("Invalid QR code format")
+            return
+
+        # Clé inconnue ou algorithme contredisant celui de la clé
+        try:
+            algorithm = self.keyring.algorithm(
+                qr_data.get("kid") or self.keyring.legacy_key_id
+            )
+        except KeyError:
+            context.reject("Invalid signature")
+            return
+        if qr_data.get("alg") and qr_data["alg"] != algorithm:
+            context.reject("Invalid signature")
+            return
+        context.code = qr_data["id"]
+
+    def stage_filter(self, context: VerificationContext):
+        from apps.qr_codes.services.code_filter import get_code_filter
+
+        # Code jamais émis : refus distinct d'une signature invalide
+        if not get_code_filter().might_exist(context.code):
+            context.reject("Unknown code")
+
+    def stage_status(self, context: VerificationContext):
+        """
+        Refus d'après l'index de statuts partagé, sans la base
+
+        Un index périmé, un code absent, ambigu ou actif ne conclut pas.
+        Le refus précède la signature : pour un payload, rien n'atteste
+        encore l'identifiant, et le code n'est pas retenu (ni journalisé,
+        ni compté).
+        """
+        from apps.qr_codes.services.status_index import get_status_index
+
+        entry = get_status_index().lookup(context.code)
+        if entry is not None and entry.error():
+            context.reject(entry.error())
+            if not context.signed:
+                context.qr_code_id = entry.qr_code_id
+
+    def stage_signature(self, context: VerificationContext):
+        """Signature du code, ou de la racine de son lot"""
+        qr_data = context.qr_data
+        if qr_data.get("mp") is not None:
+            root = self._verify_batch_signature(qr_data)
+            valid = root is not None
+            context.root = root.hex() if valid else None
+        else:
+            valid = self._verify_signature(
+                qr_data["data"],
+                qr_data["sig"],
+                qr_data.get("kid"),
+                qr_data.get("alg"),
+                unique_code=bound_code(qr_data),
+            )
+        if not valid:
+            context.reject("Invalid signature")
 
-            # 2. Vérifier signature
-            if not self._verify_signature(qr_data["data"], qr_data["sig"]):
-                return {"valid": False, "error": "Invalid signature"}
+    def stage_record(self, context: VerificationContext):
+        from apps.qr_codes.models import QRCode
 
-            # 3. Vérifier en base de données
-            from apps.qr_codes.models import QRCode
+        queryset = QRCode.objects.select_related("user", "company", "batch")
+        try:
+            qr_code = queryset.get(unique_code=context.code)
+        except QRCode.DoesNotExist:
+            qr_code = None
+        self.check_record(context, qr_code)
 
+    async def arun_record(self, context: VerificationContext) -> VerificationContext:
+        """Étapes record et response avec l'ORM asynchrone"""
+        from apps.qr_codes.models import QRCode
+
+        queryset = QRCode.objects.select_related("user", "company", "batch")
+        with context.stage("record"):
             try:
-                qr_code = QRCode.objects.select_related("user", "company").get(
-                    unique_code=qr_data["id"]
-                )
+                qr_code = await queryset.aget(unique_code=context.code)
             except QRCode.DoesNotExist:
-                return {"valid": False, "error": "QR code not found"}
-
-            # 4. Vérifier statut
-            if not qr_code.is_valid():
-                return {
-                    "valid": False,
-                    "error": f"QR code is {qr_code.status.lower()}",
-                }
-
-            # 5. Déchiffrer et retourner infos
-            return {
-                "valid": True,
-                "data": {
-                    "holder": f"{qr_code.user.first_name} {qr_code.user.last_name}",
-                    "email": qr_code.user.email,
-                    "company": qr_code.company.name if qr_code.company else None,
-                    "issued_at": qr_code.created_at.isoformat(),
-                    "expires_at": qr_code.expires_at.isoformat(),
-                },
-            }
+                qr_code = None
+            self.check_record(context, qr_code)
+        return self.run(context, stages=("response",))
 
-        except Exception as e:
-            return {"valid": False, "error": str(e)}
+    def load_records(self, contexts: List[VerificationContext]):
+        """
+        Étapes record et response pour plusieurs contextes, une requête SQL
 
-    def _verify_signature(self, data: str, signature: str) -> bool:
-        """Vérifie la signature RSA"""
+        Chaque contexte compte la durée de la requête commune.
+        """
+        from apps.qr_codes.models import QRCode
+
+        pending = [context for context in contexts if not context.done]
+        if not pending:
+            return
+        start = time.perf_counter()
+        queryset = QRCode.objects.select_related("user", "company", "batch")
+        qr_codes = queryset.in_bulk(
+            {context.code for context in pending}, field_name="unique_code"
+        )
+        elapsed = time.perf_counter() - start
+        for context in pending:
+            with context.stage("record"):
+                self.check_record(context, qr_codes.get(context.code))
+            context.timings["record"] += elapsed
+            self.run(context, stages=("response",))
+
+    def check_record(self, context: VerificationContext, qr_code):
+        """Lot de signature et statut du QRCode lu en base"""
+        if qr_code is None:
+            context.reject("QR code not found")
+            return
+        # Chiffré signé d'un autre code présenté sous cet identifiant (les
+        # codes antérieurs à signed_message ne lient pas les deux). Le code
+        # n'est pas retenu : ni journalisé, ni mis en cache sous ce refus.
+        if context.signed and context.qr_data is not None:
+            if context.qr_data["data"] != qr_code.encrypted_data:
+                context.reject("Invalid signature")
+                return
+        context.qr_code = qr_code
+        context.qr_code_id = qr_code.pk
+
+        # Lot de signature : racine enregistrée et non révoquée
+        if qr_code.batch_id:
+            if context.signed and context.root != qr_code.batch.root:
+                context.reject("Invalid signature")
+                return
+            if not qr_code.batch.is_active():
+                context.reject("QR code batch is revoked")
+                return
+
+        if not qr_code.is_valid():
+            context.reject(f"QR code is {qr_code.status.lower()}")
+
+    def stage_response(self, context: VerificationContext):
+        qr_code = context.qr_code
+        context.result = {
+            "valid": True,
+            "data": {
+                "id": qr_code.unique_code,
+                "holder": f"{qr_code.user.first_name} {qr_code.user.last_name}",
+                "email": qr_code.user.email,
+                "company": qr_code.company.name if qr_code.company else None,
+                "issued_at": qr_code.created_at.isoformat(),
+                "expires_at": qr_code.expires_at.isoformat(),
+            },
+        }
+
+    def _verify_signature(
+        self, data: str, signature: str, key_id=None, algorithm=None, unique_code=None
+    ) -> bool:
+        """
+        Vérifie la signature avec la clé désignée par le kid
+
+        L'algorithme est celui de la clé ; un "alg" de payload qui le
+        contredit est refusé plutôt que d'être suivi. `unique_code` pour
+        un code lié à son identifiant (voir signed_message).
+        """
+        return self._verify_message(
+            signed_message(data, unique_code), signature, key_id, algorithm
+        )
+
+    def _verify_batch_signature(self, qr_data: Dict) -> Optional[bytes]:
+        """
+        Recalcule la racine du lot depuis la preuve et vérifie sa signature
+
+        Une racine déjà vérifiée (même clé, même signature) est reprise du
+        cache : un lot de 10 000 codes ne coûte qu'une vérification.
+
+        Returns:
+            La racine si la signature est valide, sinon None
+        """
         try:
-            sig_bytes = base64.b64decode(signature)
-            self.public_key.verify(
-                sig_bytes,
-                data.encode("utf-8"),
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH,
-                ),
-                hashes.SHA256(),
+            root = compute_root(
+                signed_message(qr_data["data"], bound_code(qr_data)),
+                qr_data["mi"],
+                qr_data["mn"],
+                unpack_proof(base64.b64decode(qr_data["mp"])),
             )
-            return True
-        except:
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        key_id = qr_data.get("kid") or self.keyring.legacy_key_id
+        cache_key = (key_id, qr_data.get("alg"), root, qr_data["sig"])
+        if cache_key in verified_roots:
+            return root
+        if not self._verify_message(
+            root_message(root), qr_data["sig"], key_id, qr_data.get("alg")
+        ):
+            return None
+        verified_roots.add(cache_key)
+        return root
+
+    def _verify_message(
+        self, message: bytes, signature: str, key_id=None, algorithm=None
+    ) -> bool:
+        try:
+            key_id = key_id or self.keyring.legacy_key_id
+            signer = self.keyring.signer(key_id)
+            if algorithm and algorithm != signer.name:
+                return False
+            return signer.verify(
+                self.keyring.public_key(key_id), base64.b64decode(signature), message
+            )
+        except Exception:
             return False
-
-    def _load_public_key(self):
-        """Charge la clé publique"""
-        from django.conf import settings
-
-        with open(settings.RSA_PUBLIC_KEY_PATH, "rb") as f:
-            return serialization.load_pem_public_key(f.read())
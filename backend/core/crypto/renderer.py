@@ -0,0 +1,111 @@
+"""
+Rendu des symboles QR à partir de la matrice de modules
+
+Trois sorties :
+    - PNG palette 2 couleurs (profondeur 1 bit, couleurs conservées)
+    - PNG monochrome 1 bit (noir sur blanc)
+    - SVG vectoriel, sans aucun travail raster
+
+Le raster ne passe plus par le PilImage de qrcode, qui dessine chaque
+module un par un : la matrice est agrandie d'un bloc avec NumPy puis
+transmise à PIL en un seul appel `Image.frombuffer`.
+"""
+
+from io import BytesIO
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+RENDER_FORMATS = ("png", "png-mono", "svg")
+
+
+def _hex_to_rgb(color: str):
+    color = color.lstrip("#")
+    return tuple(int(color[i : i + 2], 16) for i in (0, 2, 4))
+
+
+def matrix_to_image(
+    matrix: List[List[bool]],
+    box_size: int = 10,
+    fill_color: str = "#000000",
+    back_color: str = "#ffffff",
+    mono: bool = False,
+) -> Image.Image:
+    """
+    Agrandit la matrice de modules (bordure incluse) en image PIL
+
+    Mode "P" à 2 couleurs, ou mode "1" noir sur blanc si `mono`.
+    """
+    modules = np.asarray(matrix, dtype=bool)
+    pixels = modules.repeat(box_size, axis=0).repeat(box_size, axis=1)
+    height, width = pixels.shape
+
+    if mono:
+        # Lignes empaquetées 8 px / octet ; "1;I" : bit à 1 = module sombre
+        data = np.packbits(pixels, axis=1).tobytes()
+        return Image.frombuffer("1", (width, height), data, "raw", "1;I", 0, 1)
+
+    data = pixels.astype(np.uint8).tobytes()
+    img = Image.frombuffer("P", (width, height), data, "raw", "P", 0, 1)
+    img.putpalette(_hex_to_rgb(back_color) + _hex_to_rgb(fill_color))
+    return img
+
+
+def render_png(
+    matrix: List[List[bool]],
+    box_size: int = 10,
+    fill_color: str = "#000000",
+    back_color: str = "#ffffff",
+    mono: bool = False,
+    dpi: Optional[int] = None,
+) -> bytes:
+    """Rend la matrice en PNG palette 2 couleurs, ou monochrome si `mono`"""
+    img = matrix_to_image(matrix, box_size, fill_color, back_color, mono)
+
+    buffer = BytesIO()
+    options = {"optimize": True}
+    if dpi:
+        options["dpi"] = (dpi, dpi)
+    img.save(buffer, format="PNG", **options)
+    return buffer.getvalue()
+
+
+def render_svg(
+    matrix: List[List[bool]],
+    box_size: float = 10,
+    fill_color: str = "#000000",
+    back_color: str = "#ffffff",
+    unit: str = "",
+) -> bytes:
+    """
+    Rend la matrice (bordure incluse) en SVG
+
+    Les modules sombres contigus d'une ligne sont fusionnés en un seul
+    rectangle du chemin ; `box_size` + `unit` (ex. "mm") fixent la taille
+    physique du document.
+    """
+    size = len(matrix)
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            path.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+
+    dimension = f"{size * box_size:g}{unit}"
+    svg = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{dimension}" '
+        f'height="{dimension}" viewBox="0 0 {size} {size}" '
+        'shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="{back_color}"/>'
+        f'<path fill="{fill_color}" d="{"".join(path)}"/>'
+        "</svg>"
+    )
+    return svg.encode("utf-8")
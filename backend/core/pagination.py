@@ -0,0 +1,29 @@
+"""
+Keyset (cursor) pagination
+
+PageNumberPagination runs a COUNT(*) and an OFFSET scan on every page, so
+deep pages get slower as tables grow. These paginators use DRF's
+CursorPagination instead: each page is a range read on the ordering
+columns, which the models back with matching composite indexes. The id
+column breaks ties between rows sharing a timestamp.
+
+Responses carry "next" and "previous" cursor links and no "count".
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Newest first, on (created_at, id)."""
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class VerifiedAtCursorPagination(CursorPagination):
+    """Newest first, on (verified_at, id)."""
+
+    ordering = ("-verified_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,64 @@
+"""
+Bloom filter
+
+Set membership with no false negatives and a bounded false positive rate.
+Bit positions come from double hashing of SHA-256: h1 + i * h2 for the
+i-th of k hashes (Kirsch-Mitzenmacher), which costs a single digest per
+operation.
+
+The bit array can be any buffer supporting indexing, so a filter can be
+served straight from a read-only mmap.
+"""
+
+import hashlib
+import math
+from typing import Tuple
+
+
+def optimal_size(capacity: int, error_rate: float) -> Tuple[int, int]:
+    """(number of bits, number of hashes) for `capacity` items."""
+    capacity = max(1, capacity)
+    num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    num_bits = max(8, (num_bits + 7) // 8 * 8)
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+class BloomFilter:
+    def __init__(self, num_bits: int, num_hashes: int, bits=None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray(num_bits // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float) -> "BloomFilter":
+        return cls(*optimal_size(capacity, error_rate))
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def false_positive_rate(self, count: int) -> float:
+        """Expected false positive rate once `count` items are added."""
+        return (
+            1 - math.exp(-self.num_hashes * count / self.num_bits)
+        ) ** self.num_hashes
+
+    @property
+    def size(self) -> int:
+        """Size of the bit array in bytes."""
+        return self.num_bits // 8
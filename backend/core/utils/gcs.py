@@ -0,0 +1,96 @@
+"""
+Golomb-Rice coded sets
+
+Compact encoding of a set of fixed-width hashes. The values are sorted and
+each difference with the previous one is Rice-coded with parameter p: the
+quotient (diff >> p) in unary (ones terminated by a zero), then the p low
+bits. For n values spread over 2**bits, p = floor(log2(2**bits / n)) costs
+about p + 2 bits per value, instead of `bits`.
+
+Bits are written most significant first; the last byte is zero-padded.
+"""
+
+from typing import Iterable, List
+
+
+def rice_parameter(count: int, bits: int) -> int:
+    """Optimal Rice parameter for `count` values over a `bits`-bit space."""
+    if count <= 0:
+        return 0
+    return max(0, ((1 << bits) // count).bit_length() - 1)
+
+
+class _BitWriter:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.accumulator = 0
+        self.length = 0
+
+    def write(self, value: int, width: int):
+        self.accumulator = (self.accumulator << width) | value
+        self.length += width
+        while self.length >= 8:
+            self.length -= 8
+            self.buffer.append((self.accumulator >> self.length) & 0xFF)
+        self.accumulator &= (1 << self.length) - 1
+
+    def write_unary(self, count: int):
+        while count >= 32:
+            self.write(0xFFFFFFFF, 32)
+            count -= 32
+        self.write(((1 << count) - 1) << 1, count + 1)
+
+    def getvalue(self) -> bytes:
+        if self.length:
+            return bytes(self.buffer) + bytes(
+                [(self.accumulator << (8 - self.length)) & 0xFF]
+            )
+        return bytes(self.buffer)
+
+
+class _BitReader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+
+    def read_bit(self) -> int:
+        byte = self.position >> 3
+        if byte >= len(self.data):
+            raise ValueError("Truncated Golomb-Rice set")
+        bit = (self.data[byte] >> (7 - (self.position & 7))) & 1
+        self.position += 1
+        return bit
+
+    def read(self, width: int) -> int:
+        value = 0
+        for _ in range(width):
+            value = (value << 1) | self.read_bit()
+        return value
+
+    def read_unary(self) -> int:
+        count = 0
+        while self.read_bit():
+            count += 1
+        return count
+
+
+def encode(values: Iterable[int], p: int) -> bytes:
+    """Encode a set of non-negative integers (duplicates are dropped)."""
+    writer = _BitWriter()
+    previous = 0
+    for value in sorted(set(values)):
+        diff = value - previous
+        writer.write_unary(diff >> p)
+        writer.write(diff & ((1 << p) - 1), p)
+        previous = value
+    return writer.getvalue()
+
+
+def decode(data: bytes, count: int, p: int) -> List[int]:
+    """Decode `count` values, in ascending order."""
+    reader = _BitReader(data)
+    values, previous = [], 0
+    for _ in range(count):
+        previous += (reader.read_unary() << p) | reader.read(p)
+        values.append(previous)
+    return values
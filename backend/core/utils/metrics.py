@@ -0,0 +1,99 @@
+"""
+In-process metrics
+
+Latency histograms with fixed logarithmic buckets: constant memory, a
+bisect and a counter increment per observation, quantiles estimated from
+the bucket bounds (about 12% resolution). Each process keeps its own
+registry; values are not aggregated across workers.
+"""
+
+import bisect
+import threading
+from typing import Dict
+
+# Bucket upper bounds in seconds, 20 per decade from 10 µs to 100 s
+BUCKETS = tuple(1e-5 * 10 ** (step / 20) for step in range(0, 141))
+
+
+class Histogram:
+    """Latency histogram (seconds)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            cumulative = 0
+            for index, count in enumerate(self.counts):
+                cumulative += count
+                if cumulative >= rank:
+                    break
+            bound = self.buckets[index] if index < len(self.buckets) else self.max
+            return min(bound, self.max)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Summary in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.quantile(0.5) * 1000,
+            "p90_ms": self.quantile(0.9) * 1000,
+            "p99_ms": self.quantile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class MetricsRegistry:
+    """Named histograms of the current process."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name: str, value: float):
+        self.histogram(name).observe(value)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, Dict[str, float]]:
+        return {
+            name: histogram.snapshot()
+            for name, histogram in sorted(self._histograms.items())
+            if name.startswith(prefix)
+        }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+registry = MetricsRegistry()
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Server-Timing header value from {name: seconds}."""
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items()
+    )
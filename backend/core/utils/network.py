@@ -0,0 +1,29 @@
+"""
+Client address behind reverse proxies
+"""
+
+import ipaddress
+
+from django.conf import settings
+
+
+def get_client_ip(request):
+    """
+    Address of the client that sent the request
+
+    Each proxy appends the address it received the request from to the
+    right of X-Forwarded-For, so behind TRUSTED_PROXY_COUNT proxies the
+    client is the N-th value from the right. Values further left are set
+    by the client and never used. A header that is too short or invalid
+    falls back to REMOTE_ADDR.
+    """
+    proxies = settings.TRUSTED_PROXY_COUNT
+    if proxies:
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+        if len(forwarded) >= proxies:
+            candidate = forwarded[-proxies].strip()
+            try:
+                return str(ipaddress.ip_address(candidate))
+            except ValueError:
+                pass
+    return request.META.get("REMOTE_ADDR")
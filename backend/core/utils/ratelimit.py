@@ -0,0 +1,191 @@
+"""
+Token-bucket rate limiting and admission control
+
+Buckets follow GCRA (generic cell rate algorithm): a bucket of `burst`
+tokens refilled at `rate` per second is stored as a single timestamp, the
+theoretical arrival time (TAT) of the next request. Bucket states live in
+the Django cache so all workers share them; when the cache is unreachable
+they fall back to a bounded in-process store.
+
+Updates are read-modify-write without a lock across workers: concurrent
+requests on the same key may overshoot the limit slightly.
+
+AdmissionController sheds load per process, on the number of requests in
+flight and on a moving average of their latency.
+"""
+
+import math
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, NamedTuple, Tuple
+
+from django.core.cache import cache
+
+
+class Bucket(NamedTuple):
+    key: str
+    rate: float
+    burst: int
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    retry_after: float
+    # Fraction of the burst still available after this request (0..1)
+    headroom: float
+
+
+class _LocalStore:
+    """Bounded in-process fallback for bucket states."""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.time()
+        values = {}
+        with self._lock:
+            for key in keys:
+                expires, value = self._entries.get(key, (0, None))
+                if expires > now:
+                    values[key] = value
+        return values
+
+    def set_many(self, values, ttl):
+        expires = time.time() + ttl
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (expires, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RateLimiter:
+    """Token buckets shared through the Django cache."""
+
+    def __init__(self, prefix: str, fallback_size=10000):
+        self.prefix = prefix
+        self.fallback = _LocalStore(fallback_size)
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def _load(self, keys):
+        try:
+            return cache.get_many(keys), False
+        except Exception:
+            self.count("fallback")
+            return self.fallback.get_many(keys), True
+
+    def _store(self, values, ttl, fallback: bool):
+        if not fallback:
+            try:
+                cache.set_many(values, ttl)
+                return
+            except Exception:
+                self.count("fallback")
+        self.fallback.set_many(values, ttl)
+
+    def consume(self, buckets: List[Bucket]) -> List[Decision]:
+        """
+        Take one token from each bucket
+
+        Tokens are only taken if every bucket allows the request: a
+        request refused by one limit does not drain the others.
+        """
+        keys = [self.prefix + bucket.key for bucket in buckets]
+        states, fallback = self._load(keys)
+        now = time.time()
+
+        decisions, updates, ttl = [], {}, 1
+        for key, bucket in zip(keys, buckets):
+            interval = 1.0 / bucket.rate
+            tolerance = bucket.burst * interval
+            # Delay until the bucket is full again, after this request
+            backlog = max((states.get(key) or now) - now, 0.0) + interval
+            excess = backlog - tolerance
+            # Epoch timestamps are only exact to ~0.2 µs
+            if excess > 1e-6:
+                decisions.append(Decision(False, excess, 0.0))
+                continue
+            decisions.append(Decision(True, 0.0, max(0.0, -excess / tolerance)))
+            updates[key] = now + backlog
+            ttl = max(ttl, math.ceil(backlog))
+
+        if all(decision.allowed for decision in decisions):
+            self._store(updates, ttl, fallback)
+        return decisions
+
+
+class AdmissionController:
+    """
+    Per-process load shedding
+
+    A request is refused when `max_in_flight` requests are already being
+    served. While the latency moving average exceeds `latency_target`,
+    non-priority requests are refused with a probability growing with the
+    overshoot, capped so that the average keeps being measured.
+    """
+
+    MAX_SHED_PROBABILITY = 0.9
+
+    def __init__(self, max_in_flight: int, latency_target: float, alpha=0.1):
+        self.max_in_flight = max_in_flight
+        self.latency_target = latency_target
+        self.alpha = alpha
+        self.in_flight = 0
+        self.latency = 0.0
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    def shed_probability(self) -> float:
+        if not self.latency_target or self.latency <= self.latency_target:
+            return 0.0
+        overshoot = (self.latency - self.latency_target) / self.latency_target
+        return min(self.MAX_SHED_PROBABILITY, overshoot)
+
+    def try_enter(self, priority=False) -> Tuple[bool, str]:
+        """(admitted, reason) ; reason is "queue" or "latency" when refused."""
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                self.counters["shed_queue"] += 1
+                return False, "queue"
+            if not priority and random.random() < self.shed_probability():
+                self.counters["shed_latency"] += 1
+                return False, "latency"
+            self.in_flight += 1
+            self.counters["admitted"] += 1
+            return True, ""
+
+    def leave(self, elapsed: float = None):
+        with self._lock:
+            self.in_flight -= 1
+            if elapsed is not None:
+                self.latency += self.alpha * (elapsed - self.latency)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "latency_ms": self.latency * 1000,
+                "latency_target_ms": self.latency_target * 1000,
+                "shed_probability": self.shed_probability(),
+                "counters": dict(self.counters),
+            }